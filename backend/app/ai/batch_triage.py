@@ -0,0 +1,260 @@
+import os
+import re
+import json
+import asyncio
+import logging
+import threading
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from backend.app.ai.llm_client import llm_manager, LLMUnavailable
+from backend.app.ai import triage
+from backend.app.ai.telemetry import telemetry
+from backend.app.core.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Backlogs and incident bursts: several tickets per triage call
+AI_BATCHED_TRIAGE = os.getenv("AI_BATCHED_TRIAGE", "false").lower() == "true"
+# Prompt budget per call (system prompt + tickets), in estimated tokens
+TRIAGE_BATCH_TOKEN_BUDGET = int(os.getenv("TRIAGE_BATCH_TOKEN_BUDGET", "4000"))
+# Also bounds the response: every ticket adds ~60 output tokens
+TRIAGE_BATCH_MAX_SIZE = int(os.getenv("TRIAGE_BATCH_MAX_SIZE", "20"))
+# Missing or malformed entries: retry that ticket alone (else use the fallback)
+TRIAGE_BATCH_RETRY_SINGLE = os.getenv("TRIAGE_BATCH_RETRY_SINGLE", "true").lower() == "true"
+
+BATCH_SYSTEM_PROMPT = triage.TRIAGE_SYSTEM_PROMPT + """
+You will receive SEVERAL tickets, each introduced by "### Ticket <index>".
+Classify each one independently with the rules above.
+
+Return a JSON array with one object per ticket. Each object is the
+structure above plus "index": <the ticket's index>, e.g.
+
+[{"index": 0, "category": "...", ...}, {"index": 1, "category": "...", ...}]
+
+Return ONLY the JSON array.
+"""
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token; close enough for budgeting prompts."""
+    return len(text) // 4 + 1
+
+
+SYSTEM_PROMPT_TOKENS = estimate_tokens(BATCH_SYSTEM_PROMPT)
+
+
+def ticket_block(index: int, title: str, description: str) -> str:
+    return f"### Ticket {index}\nTitle: {title}\nDescription: {description}\n"
+
+
+class BatchPlanner:
+    """
+    Packs tickets greedily into batches that fit the prompt budget. A ticket
+    that would overflow the current batch closes it and starts the next; one
+    too large for any batch ends up alone (and is triaged on its own).
+    """
+
+    def __init__(self, token_budget=TRIAGE_BATCH_TOKEN_BUDGET, max_size=TRIAGE_BATCH_MAX_SIZE):
+        self.token_budget = token_budget
+        self.max_size = max_size
+        self._batch = []
+        self._tokens = SYSTEM_PROMPT_TOKENS
+
+    def add(self, item, title: str, description: str):
+        """Queue `item`; returns the batch it closed, if any."""
+        # Indexes are at most a few digits; budget with the widest one
+        tokens = estimate_tokens(ticket_block(self.max_size, title, description))
+        closed = None
+        if self._batch and (
+            self._tokens + tokens > self.token_budget or len(self._batch) >= self.max_size
+        ):
+            closed = self.drain()
+        self._batch.append(item)
+        self._tokens += tokens
+        return closed
+
+    def drain(self):
+        batch, self._batch = self._batch, []
+        self._tokens = SYSTEM_PROMPT_TOKENS
+        return batch
+
+
+def plan_batches(tickets):
+    """Index lists, in order, for a list of (title, description)."""
+    planner = BatchPlanner()
+    batches = []
+    for i, (title, description) in enumerate(tickets):
+        closed = planner.add(i, title, description)
+        if closed:
+            batches.append(closed)
+    last = planner.drain()
+    if last:
+        batches.append(last)
+    return batches
+
+
+def batch_messages(tickets):
+    return [
+        SystemMessage(content=BATCH_SYSTEM_PROMPT),
+        HumanMessage(content="\n".join(
+            ticket_block(i, title, description) for i, (title, description) in enumerate(tickets)
+        ))
+    ]
+
+
+def usable_batch(size: int):
+    """Cache check for a batch response: every entry present and valid."""
+    return lambda content: None not in parse_batch(content, size)
+
+
+def parse_batch(content: str, size: int):
+    """Per-ticket triage dicts in input order; None where an entry is unusable."""
+    results = [None] * size
+
+    match = re.search(r"\[.*\]", content.strip(), re.DOTALL)
+    if not match:
+        return results
+    try:
+        entries = json.loads(match.group())
+    except json.JSONDecodeError:
+        return results
+    if not isinstance(entries, list):
+        return results
+
+    for entry in entries:
+        index = entry.get("index") if isinstance(entry, dict) else None
+        if isinstance(index, int) and 0 <= index < size and results[index] is None:
+            results[index] = triage.validate_entry(entry)
+    return results
+
+
+class BatchTriageStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {
+            "batches": 0,
+            "batched_tickets": 0,
+            "single_calls": 0,
+            "invalid_entries": 0,
+            "retried_single": 0,
+            "fallbacks": 0,
+        }
+
+    def add(self, **deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                self.counts[key] += delta
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        batches = counts["batches"]
+        return {
+            "enabled": AI_BATCHED_TRIAGE,
+            "token_budget": TRIAGE_BATCH_TOKEN_BUDGET,
+            "max_size": TRIAGE_BATCH_MAX_SIZE,
+            "avg_batch_size": round(counts["batched_tickets"] / batches, 2) if batches else 0.0,
+            **counts,
+        }
+
+
+stats = BatchTriageStats()
+
+
+def _missing(results):
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        logger.warning(f"BATCH TRIAGE → {len(missing)}/{len(results)} entries missing or malformed")
+        handled = "retried_single" if TRIAGE_BATCH_RETRY_SINGLE else "fallbacks"
+        stats.add(invalid_entries=len(missing), **{handled: len(missing)})
+        telemetry.record_parse_failure("triage", len(missing))
+    return missing
+
+
+def run_ai_triage_batch(tickets):
+    """
+    One call for a list of (title, description); returns triage dicts in
+    the same order. Entries the model dropped or garbled are retried one by
+    one (or fall back), so every ticket gets a usable result.
+    """
+    if len(tickets) == 1:
+        stats.add(single_calls=1)
+        return [triage.run_ai_triage(*tickets[0])]
+
+    stats.add(batches=1, batched_tickets=len(tickets))
+    try:
+        response = llm_manager.invoke(
+            "triage", batch_messages(tickets),
+            temperature=triage.TRIAGE_TEMPERATURE, cacheable=usable_batch(len(tickets))
+        )
+    except LLMUnavailable:
+        # Retrying singly would only hit the open circuit again
+        logger.warning("BATCH TRIAGE SKIPPED → LLM unavailable, using fallback")
+        stats.add(fallbacks=len(tickets))
+        return [triage.fallback_response("unavailable") for _ in tickets]
+
+    results = parse_batch(response.content, len(tickets))
+    missing = _missing(results)
+
+    for i in missing:
+        results[i] = (
+            triage.run_ai_triage(*tickets[i]) if TRIAGE_BATCH_RETRY_SINGLE
+            else triage.fallback_response("parse_failure")
+        )
+    return results
+
+
+async def arun_ai_triage_batch(tickets):
+    if len(tickets) == 1:
+        stats.add(single_calls=1)
+        return [await triage.arun_ai_triage(*tickets[0])]
+
+    stats.add(batches=1, batched_tickets=len(tickets))
+    try:
+        response = await llm_manager.ainvoke(
+            "triage", batch_messages(tickets),
+            temperature=triage.TRIAGE_TEMPERATURE, cacheable=usable_batch(len(tickets))
+        )
+    except LLMUnavailable:
+        logger.warning("BATCH TRIAGE SKIPPED → LLM unavailable, using fallback")
+        stats.add(fallbacks=len(tickets))
+        return [triage.fallback_response("unavailable") for _ in tickets]
+
+    results = parse_batch(response.content, len(tickets))
+    missing = _missing(results)
+
+    if TRIAGE_BATCH_RETRY_SINGLE:
+        retried = await asyncio.gather(*(triage.arun_ai_triage(*tickets[i]) for i in missing))
+    else:
+        retried = [triage.fallback_response("parse_failure") for _ in missing]
+    for i, result in zip(missing, retried):
+        results[i] = result
+    return results
+
+
+@traced("triage_batch")
+def run_ai_triage_many(tickets):
+    """Any number of tickets, split into budget-sized batches."""
+    results = [None] * len(tickets)
+    for batch in plan_batches(tickets):
+        for i, result in zip(batch, run_ai_triage_batch([tickets[i] for i in batch])):
+            results[i] = result
+    return results
+
+
+@traced("triage_batch")
+async def arun_ai_triage_many(tickets):
+    """As run_ai_triage_many, with the batches in flight concurrently."""
+    batches = plan_batches(tickets)
+    outputs = await asyncio.gather(
+        *(arun_ai_triage_batch([tickets[i] for i in batch]) for batch in batches)
+    )
+    results = [None] * len(tickets)
+    for batch, output in zip(batches, outputs):
+        for i, result in zip(batch, output):
+            results[i] = result
+    return results
+
+
+def batch_triage_stats():
+    return stats.snapshot()
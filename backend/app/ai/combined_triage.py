@@ -0,0 +1,93 @@
+import os
+import logging
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from backend.app.ai.llm_client import llm_manager, LLMUnavailable
+from backend.app.ai.rag import retrieve_context
+from backend.app.ai import triage
+from backend.app.ai.telemetry import telemetry
+from backend.app.core.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# One LLM call returns the triage JSON plus a candidate customer reply
+AI_COMBINED_TRIAGE = os.getenv("AI_COMBINED_TRIAGE", "false").lower() == "true"
+# One call, one temperature. The default keeps triage deterministic (and
+# cacheable), so replies are written at 0 rather than the separate path's
+# REPLY_TEMPERATURE (0.3) and read more uniform. Set 0.3 to match the reply
+# style instead, at the cost of run-to-run variation in the classification.
+COMBINED_TRIAGE_TEMPERATURE = float(
+    os.getenv("COMBINED_TRIAGE_TEMPERATURE", str(triage.TRIAGE_TEMPERATURE))
+)
+
+COMBINED_SYSTEM_PROMPT = triage.TRIAGE_SYSTEM_PROMPT + """
+In the same JSON object, also include:
+
+  "reply": "final customer reply"
+
+Reply Rules (apply them using your own classification above):
+
+1. Tone Control:
+   - If sentiment is NEGATIVE → be empathetic.
+   - If sentiment is NEUTRAL → professional tone.
+
+2. Risk Awareness:
+   - If risk is HIGH → do NOT finalize resolution.
+     Provide next steps and mention escalation.
+   - If risk is LOW → you may provide complete solution.
+
+3. Knowledge Usage:
+   - Use knowledge base context if relevant.
+   - Do NOT invent policies.
+   - If knowledge is insufficient, respond cautiously.
+
+4. Response Structure:
+   - Greeting
+   - Acknowledgement
+   - Clear solution steps
+   - Closing reassurance
+
+Never mention you are an AI.
+Keep the reply concise but helpful.
+"""
+
+
+@traced("triage")
+def run_ai_triage_with_reply(title: str, description: str):
+    """
+    Returns (ai_data, reply). `reply` is None when the model did not produce
+    one; the decision engine discards it for tickets routed to an agent.
+    """
+    # Retrieval up front, so one call can classify and answer
+    context = retrieve_context(description)
+
+    user_prompt = f"""
+Knowledge Base Context:
+{context}
+
+Title: {title}
+Description: {description}
+"""
+
+    try:
+        response = llm_manager.invoke("triage", [
+            SystemMessage(content=COMBINED_SYSTEM_PROMPT),
+            HumanMessage(content=user_prompt)
+        ], temperature=COMBINED_TRIAGE_TEMPERATURE, cacheable=triage.usable_response)
+    except LLMUnavailable:
+        logger.warning("AI TRIAGE SKIPPED → LLM unavailable, using fallback")
+        return triage.fallback_response("unavailable"), None
+
+    parsed = triage.extract_json(response.content)
+
+    if parsed is None:
+        telemetry.record_parse_failure("triage")
+        return triage.fallback_response("parse_failure"), None
+
+    reply = parsed.pop("reply", None)
+    if not isinstance(reply, str) or not reply.strip():
+        reply = None
+
+    logger.info(f"AI TRIAGE RESULT (combined) → {parsed}")
+    return parsed, reply
@@ -0,0 +1,337 @@
+"""
+Rolling conversation summaries for agent drafts. Instead of the whole
+thread, the draft prompt gets a stored per-ticket summary plus the newest
+messages, under a hard token budget.
+
+The summary is brought up to date lazily when a draft is requested: only
+messages after `last_message_id` are sent to the LLM (purpose "summary"),
+together with the previous summary, and only once enough of them have
+piled up beyond the DRAFT_RECENT_MESSAGES that are always sent verbatim.
+"""
+import os
+import threading
+import logging
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from backend.app.ai.llm_client import llm_manager, LLMUnavailable
+from backend.app.ai.batch_triage import estimate_tokens
+from backend.app.ai.telemetry import ticket_scope
+from backend.app.core.tracing import span
+from backend.app.tickets.models import TicketMessage, TicketConversationSummary
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_SUMMARY_ENABLED = os.getenv("CONVERSATION_SUMMARY_ENABLED", "true").lower() == "true"
+# K: newest messages that always go into the draft prompt verbatim
+DRAFT_RECENT_MESSAGES = int(os.getenv("DRAFT_RECENT_MESSAGES", "6"))
+# Hard cap on summary + messages in the draft prompt, in estimated tokens (0 = no cap)
+DRAFT_HISTORY_TOKEN_BUDGET = int(os.getenv("DRAFT_HISTORY_TOKEN_BUDGET", "1500"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
+# Older messages waiting before a fold; fewer are folded only when over budget
+SUMMARY_FOLD_MIN_MESSAGES = int(os.getenv("SUMMARY_FOLD_MIN_MESSAGES", "8"))
+# New messages per summary call; a long backlog is folded in several calls
+SUMMARY_FOLD_TOKEN_BUDGET = int(os.getenv("SUMMARY_FOLD_TOKEN_BUDGET", "3000"))
+
+SUMMARY_TEMPERATURE = 0
+
+SUMMARY_SYSTEM_PROMPT = f"""
+You maintain the running summary of a customer support conversation.
+
+You receive the current summary (possibly empty) and the messages that
+came after it. Return the updated summary of the WHOLE conversation.
+
+Keep:
+- the customer's problem and what they asked for
+- what was tried or checked, and the outcome
+- promises, deadlines and escalations
+- identifiers mentioned (orders, invoices, plans, dates)
+- questions still open and the customer's current mood
+
+Drop greetings and repetition. Write plain prose, at most
+{SUMMARY_MAX_TOKENS * 3 // 4} words. Return ONLY the summary.
+"""
+
+
+def message_line(msg) -> str:
+    return f"{msg.sender_role}: {msg.message}"
+
+
+def clip(text: str, tokens: int) -> str:
+    """Cut `text` to about `tokens` estimated tokens."""
+    limit = tokens * 4
+    return text if len(text) <= limit else text[:limit].rstrip() + " …"
+
+
+class SummaryStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {
+            "folds": 0,
+            "summary_calls": 0,
+            "folded_messages": 0,
+            "fold_failures": 0,
+            "histories": 0,
+            "history_tokens": 0,
+            "omitted_messages": 0,
+        }
+
+    def add(self, **deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                self.counts[key] += delta
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        histories = counts["histories"]
+        return {
+            "enabled": CONVERSATION_SUMMARY_ENABLED,
+            "recent_messages": DRAFT_RECENT_MESSAGES,
+            "token_budget": DRAFT_HISTORY_TOKEN_BUDGET,
+            "avg_history_tokens": round(counts["history_tokens"] / histories, 1) if histories else 0.0,
+            **counts,
+        }
+
+
+stats = SummaryStats()
+
+
+# ---- Loading ----
+
+def unsummarized_statement(ticket_id: int, last_message_id=None):
+    statement = select(TicketMessage).where(TicketMessage.ticket_id == ticket_id)
+    if last_message_id is not None:
+        statement = statement.where(TicketMessage.id > last_message_id)
+    return statement.order_by(TicketMessage.created_at.asc(), TicketMessage.id.asc())
+
+
+def load_history(db, ticket_id: int):
+    """(summary or None, messages not folded into it yet, oldest first)."""
+    row = db.get(TicketConversationSummary, ticket_id)
+    summary, last_message_id = (row.summary, row.last_message_id) if row else (None, None)
+    messages = db.scalars(unsummarized_statement(ticket_id, last_message_id)).all()
+    return summary, messages
+
+
+async def aload_history(db, ticket_id: int):
+    row = await db.get(TicketConversationSummary, ticket_id)
+    summary, last_message_id = (row.summary, row.last_message_id) if row else (None, None)
+    messages = (await db.scalars(unsummarized_statement(ticket_id, last_message_id))).all()
+    return summary, messages
+
+
+# ---- Folding ----
+
+def due_for_fold(messages):
+    """Messages to fold into the summary now (all but the K newest), or []."""
+    if not CONVERSATION_SUMMARY_ENABLED:
+        return []
+
+    older = messages[:max(len(messages) - DRAFT_RECENT_MESSAGES, 0)]
+    if not older:
+        return []
+    if len(older) >= SUMMARY_FOLD_MIN_MESSAGES:
+        return older
+
+    # A few very long messages can overflow the budget on their own
+    verbatim_budget = DRAFT_HISTORY_TOKEN_BUDGET - SUMMARY_MAX_TOKENS
+    tokens = sum(estimate_tokens(message_line(msg)) for msg in messages)
+    if DRAFT_HISTORY_TOKEN_BUDGET > 0 and tokens > verbatim_budget:
+        return older
+    return []
+
+
+def fold_chunks(messages):
+    """Consecutive runs of messages that fit one summary call."""
+    chunk, tokens = [], 0
+    for msg in messages:
+        cost = estimate_tokens(message_line(msg))
+        if chunk and tokens + cost > SUMMARY_FOLD_TOKEN_BUDGET:
+            yield chunk
+            chunk, tokens = [], 0
+        chunk.append(msg)
+        tokens += cost
+    if chunk:
+        yield chunk
+
+
+def summary_messages(previous, messages):
+    lines = "\n".join(clip(message_line(msg), SUMMARY_FOLD_TOKEN_BUDGET) for msg in messages)
+    return [
+        SystemMessage(content=SUMMARY_SYSTEM_PROMPT),
+        HumanMessage(content=f"""
+Current Summary:
+{previous or "(none yet)"}
+
+New Messages:
+{lines}
+
+Return the updated summary.
+""")
+    ]
+
+
+def fold(previous, messages):
+    """
+    (summary, messages folded). Stops at the first failed call, so a
+    partial catch-up is kept and the rest is folded next time.
+    """
+    summary, folded = previous, []
+    for chunk in fold_chunks(messages):
+        try:
+            response = llm_manager.invoke(
+                "summary", summary_messages(summary, chunk), temperature=SUMMARY_TEMPERATURE
+            )
+        except LLMUnavailable:
+            logger.warning("CONVERSATION SUMMARY SKIPPED → LLM unavailable")
+            stats.add(fold_failures=1)
+            break
+        stats.add(summary_calls=1)
+        summary = clip(response.content.strip(), SUMMARY_MAX_TOKENS)
+        folded.extend(chunk)
+    return summary, folded
+
+
+async def afold(previous, messages):
+    summary, folded = previous, []
+    for chunk in fold_chunks(messages):
+        try:
+            response = await llm_manager.ainvoke(
+                "summary", summary_messages(summary, chunk), temperature=SUMMARY_TEMPERATURE
+            )
+        except LLMUnavailable:
+            logger.warning("CONVERSATION SUMMARY SKIPPED → LLM unavailable")
+            stats.add(fold_failures=1)
+            break
+        stats.add(summary_calls=1)
+        summary = clip(response.content.strip(), SUMMARY_MAX_TOKENS)
+        folded.extend(chunk)
+    return summary, folded
+
+
+def _apply(row, ticket_id, summary, folded):
+    """Updated or new row; None when another draft already folded further."""
+    last_message_id = folded[-1].id
+    if row is None:
+        return TicketConversationSummary(
+            ticket_id=ticket_id,
+            summary=summary,
+            last_message_id=last_message_id,
+            folded_messages=len(folded)
+        )
+    if row.last_message_id >= last_message_id:
+        return None
+    row.summary = summary
+    row.last_message_id = last_message_id
+    row.folded_messages += len(folded)
+    return row
+
+
+def save_summary(ticket_id, summary, folded):
+    # Own session: committing the caller's would expire the loaded messages
+    from backend.app.core.database import SessionLocal
+
+    with SessionLocal() as db:
+        try:
+            row = _apply(db.get(TicketConversationSummary, ticket_id), ticket_id, summary, folded)
+            if row is not None:
+                db.add(row)
+                db.commit()
+        except IntegrityError:
+            # Concurrent first fold of the same ticket; theirs is as good
+            db.rollback()
+
+
+async def asave_summary(ticket_id, summary, folded):
+    from backend.app.core.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal.get()() as db:
+        try:
+            row = _apply(await db.get(TicketConversationSummary, ticket_id), ticket_id, summary, folded)
+            if row is not None:
+                db.add(row)
+                await db.commit()
+        except IntegrityError:
+            await db.rollback()
+
+
+def _folded(ticket_id, messages, folded):
+    stats.add(folds=1, folded_messages=len(folded))
+    logger.info(f"CONVERSATION SUMMARY → Ticket {ticket_id}: folded {len(folded)} messages")
+    return messages[len(folded):]
+
+
+def refresh_history(ticket_id: int, summary, messages):
+    """Folds older messages into the summary when due; returns (summary, remaining messages)."""
+    older = due_for_fold(messages)
+    if not older:
+        return summary, messages
+
+    with ticket_scope(ticket_id), span("summary"):
+        summary, folded = fold(summary, older)
+    if not folded:
+        return summary, messages
+    save_summary(ticket_id, summary, folded)
+    return summary, _folded(ticket_id, messages, folded)
+
+
+async def arefresh_history(ticket_id: int, summary, messages):
+    """As refresh_history, for the async routes."""
+    older = due_for_fold(messages)
+    if not older:
+        return summary, messages
+
+    with ticket_scope(ticket_id), span("summary"):
+        summary, folded = await afold(summary, older)
+    if not folded:
+        return summary, messages
+    await asave_summary(ticket_id, summary, folded)
+    return summary, _folded(ticket_id, messages, folded)
+
+
+# ---- Prompt ----
+
+def history_text(summary, messages, budget=None):
+    """
+    Summary and the newest messages that fit the token budget, oldest
+    first. The newest message is always included (clipped if need be).
+    """
+    budget = DRAFT_HISTORY_TOKEN_BUDGET if budget is None else budget
+    unlimited = budget <= 0
+
+    sections = []
+    if summary:
+        summary = summary if unlimited else clip(summary, min(SUMMARY_MAX_TOKENS, budget // 2))
+        budget -= estimate_tokens(summary)
+        sections.append(f"Summary of earlier conversation:\n{summary}")
+
+    lines = []
+    for msg in reversed(messages):
+        line = message_line(msg)
+        cost = estimate_tokens(line)
+        if not unlimited and cost > budget:
+            if not lines:
+                lines.append(clip(line, max(budget, 1)))
+            break
+        lines.append(line)
+        budget -= cost
+    lines.reverse()
+
+    omitted = len(messages) - len(lines)
+    if omitted:
+        lines.insert(0, f"({omitted} earlier messages omitted)")
+    if summary:
+        sections.append("Most recent messages:\n" + "\n".join(lines))
+    else:
+        sections.append("\n".join(lines))
+
+    text = "\n\n".join(sections)
+    stats.add(histories=1, history_tokens=estimate_tokens(text), omitted_messages=omitted)
+    return text
+
+
+def conversation_summary_stats():
+    return stats.snapshot()
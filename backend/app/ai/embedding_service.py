@@ -0,0 +1,124 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+import logging
+from concurrent.futures import Future
+
+import numpy as np
+
+from backend.app.ai.vector_store import model, knowledge_base
+from backend.app.core.metrics import FAISS_SEARCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent encode/search requests from request threads and runs
+    one model.encode and one index.search per batch.
+    """
+
+    def __init__(self, max_batch_size, max_wait_ms):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._requests = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.stats = {"batches": 0, "requests": 0, "max_batch": 0}
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _enqueue(self, text, k):
+        self._ensure_started()
+        future = Future()
+        self._requests.put((text, k, future))
+        return future
+
+    def _submit(self, text, k):
+        return self._enqueue(text, k).result()
+
+    def encode(self, text: str):
+        """Embedding vector for one text."""
+        return self._submit(text, None)
+
+    def search(self, query: str, k: int):
+        """(distances, ids, snapshot) for one query against the knowledge base."""
+        return self._submit(query, k)
+
+    async def asearch(self, query: str, k: int):
+        """search() for the event loop: awaits the batch without a thread."""
+        return await asyncio.wrap_future(self._enqueue(query, k))
+
+    def _collect(self):
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._process(batch)
+            except Exception as exc:
+                logger.exception("EMBEDDING BATCH FAILED")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _process(self, batch):
+        embeddings = np.asarray(
+            model.get().encode([text for text, _, _ in batch]), dtype="float32"
+        )
+
+        self.stats["batches"] += 1
+        self.stats["requests"] += len(batch)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+
+        search_rows = [i for i, (_, k, _) in enumerate(batch) if k is not None]
+
+        if search_rows:
+            # One snapshot per batch, so ids always resolve against the
+            # index they came from even if a reindex swaps it meanwhile
+            kb = knowledge_base.get()
+            max_k = max(batch[i][1] for i in search_rows)
+            with FAISS_SEARCH_SECONDS.labels("knowledge_base").time():
+                distances, indices = kb.index.search(embeddings[search_rows], max_k)
+
+            for row, i in enumerate(search_rows):
+                k = batch[i][1]
+                batch[i][2].set_result((distances[row][:k], indices[row][:k], kb))
+
+        for i, (_, k, future) in enumerate(batch):
+            if k is None:
+                future.set_result(embeddings[i])
+
+
+embedding_service = EmbeddingBatcher(
+    max_batch_size=EMBED_BATCH_MAX_SIZE,
+    max_wait_ms=EMBED_BATCH_MAX_WAIT_MS,
+)
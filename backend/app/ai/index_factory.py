@@ -0,0 +1,110 @@
+import os
+import logging
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# flat | ivf | hnsw | ivfpq
+KB_INDEX_TYPE = os.getenv("KB_INDEX_TYPE", "flat").lower()
+
+KB_IVF_NLIST = int(os.getenv("KB_IVF_NLIST", "1024"))
+KB_PQ_M = int(os.getenv("KB_PQ_M", "16"))
+KB_HNSW_M = int(os.getenv("KB_HNSW_M", "32"))
+KB_HNSW_EF_CONSTRUCTION = int(os.getenv("KB_HNSW_EF_CONSTRUCTION", "80"))
+
+# Search-time knobs
+KB_NPROBE = int(os.getenv("KB_NPROBE", "16"))
+KB_EF_SEARCH = int(os.getenv("KB_EF_SEARCH", "64"))
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+
+# k-means wants ~39 training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+PQ_CENTROIDS = 256
+
+
+def _nlist_for(n, nlist):
+    return max(1, min(nlist, n // MIN_POINTS_PER_CENTROID))
+
+
+def buildable_type(index_type, n, d, pq_m=None):
+    """The type build_index() produces for `n` vectors of dimension `d`."""
+    pq_m = pq_m or KB_PQ_M
+    if index_type == "ivfpq" and (n < PQ_CENTROIDS or d % pq_m):
+        index_type = "ivf"
+    if index_type in ("ivf", "ivfpq") and n < MIN_POINTS_PER_CENTROID:
+        index_type = "flat"
+    return index_type
+
+
+def build_index(embeddings, ids, index_type=None, nlist=None, pq_m=None, hnsw_m=None):
+    """
+    Build and train an ID-addressable FAISS index of the requested type.
+    Falls back to a simpler type when there is too little data to train.
+    """
+    index_type = index_type or KB_INDEX_TYPE
+    nlist = nlist or KB_IVF_NLIST
+    pq_m = pq_m or KB_PQ_M
+    hnsw_m = hnsw_m or KB_HNSW_M
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown KB_INDEX_TYPE {index_type!r}, expected one of {INDEX_TYPES}")
+
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    n, d = embeddings.shape
+
+    requested, index_type = index_type, buildable_type(index_type, n, d, pq_m)
+    if index_type != requested:
+        logger.warning(f"KB INDEX → {n} vectors too few for {requested}, using {index_type}")
+
+    if index_type == "flat":
+        index = faiss.IndexIDMap2(faiss.IndexFlatL2(d))
+    elif index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(d, hnsw_m)
+        hnsw.hnsw.efConstruction = KB_HNSW_EF_CONSTRUCTION
+        index = faiss.IndexIDMap2(hnsw)
+    elif index_type == "ivf":
+        index = faiss.index_factory(d, f"IVF{_nlist_for(n, nlist)},Flat")
+    else:
+        index = faiss.index_factory(d, f"IVF{_nlist_for(n, nlist)},PQ{pq_m}")
+
+    if not index.is_trained:
+        index.train(embeddings)
+
+    index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+    apply_search_params(index)
+    return index, index_type
+
+
+def _inner(index):
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def index_kind(index):
+    inner = _inner(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def supports_remove(index):
+    # HNSW graphs cannot drop nodes; those indexes are rebuilt instead
+    return index_kind(index) != "hnsw"
+
+
+def apply_search_params(index, nprobe=None, ef_search=None):
+    inner = _inner(index)
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(nprobe or KB_NPROBE, inner.nlist)
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = ef_search or KB_EF_SEARCH
+    return index
@@ -0,0 +1,326 @@
+"""
+Fast-path triage from past tickets. Historical tickets are embedded with
+the same MiniLM model as the knowledge base; a new ticket's nearest
+neighbours vote on category, priority, sentiment and risk, weighted by
+similarity. Only when every field wins a clear majority is the LLM
+skipped; otherwise the caller runs the normal triage.
+
+Trained from LLM-labelled TicketAIMetadata only (never from its own
+predictions or fallbacks), rebuilt every KNN_TRIAGE_RETRAIN_SECONDS.
+A sample of confident predictions is also sent to the LLM to report
+how often the two agree.
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+import logging
+
+import faiss
+import numpy as np
+
+from backend.app.ai.vector_store import model
+from backend.app.ai.embedding_service import embedding_service
+from backend.app.ai.triage import run_ai_triage, arun_ai_triage
+from backend.app.core.metrics import FAISS_SEARCH_SECONDS
+from backend.app.core.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+KNN_TRIAGE_ENABLED = os.getenv("KNN_TRIAGE_ENABLED", "false").lower() == "true"
+KNN_TRIAGE_K = int(os.getenv("KNN_TRIAGE_K", "15"))
+# Vote share every field needs before the LLM is skipped
+KNN_TRIAGE_THRESHOLD = float(os.getenv("KNN_TRIAGE_THRESHOLD", "0.8"))
+# Neighbours less similar than this don't vote
+KNN_TRIAGE_MIN_SIMILARITY = float(os.getenv("KNN_TRIAGE_MIN_SIMILARITY", "0.5"))
+KNN_TRIAGE_MIN_NEIGHBOURS = int(os.getenv("KNN_TRIAGE_MIN_NEIGHBOURS", "5"))
+KNN_TRIAGE_MAX_EXAMPLES = int(os.getenv("KNN_TRIAGE_MAX_EXAMPLES", "50000"))
+KNN_TRIAGE_RETRAIN_SECONDS = float(os.getenv("KNN_TRIAGE_RETRAIN_SECONDS", "3600"))
+# Share of confident predictions double-checked by the LLM
+KNN_TRIAGE_AGREEMENT_SAMPLE_RATE = float(os.getenv("KNN_TRIAGE_AGREEMENT_SAMPLE_RATE", "0.05"))
+
+FIELDS = ("category", "priority", "sentiment", "risk")
+EMBED_CHUNK = 256
+
+
+def ticket_text(title: str, description: str) -> str:
+    return f"{title}\n{description}"
+
+
+def _normalized(embeddings):
+    embeddings = np.asarray(embeddings, dtype="float32").reshape(len(embeddings), -1)
+    faiss.normalize_L2(embeddings)
+    return embeddings
+
+
+class KNNSnapshot:
+    """Immutable index + label columns; swapped whole on retrain."""
+
+    def __init__(self, index, labels, trained_at):
+        self.index = index
+        # field -> np.array of label strings, aligned with index ids
+        self.labels = labels
+        self.trained_at = trained_at
+
+
+class KNNTriage:
+    def __init__(self, k, threshold, min_similarity, min_neighbours):
+        self.k = k
+        self.threshold = threshold
+        self.min_similarity = min_similarity
+        self.min_neighbours = min_neighbours
+
+        self._snapshot = None
+        self._train_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "predictions": 0,
+            "confident": 0,
+            "untrained": 0,
+            "retrains": 0,
+            "agreement_samples": 0,
+            "agreements": 0,
+            "field_agreements": {field: 0 for field in FIELDS},
+        }
+
+    def _count(self, key, delta=1):
+        with self._stats_lock:
+            self.stats[key] += delta
+
+    @property
+    def trained(self):
+        return self._snapshot is not None
+
+    def train(self, examples):
+        """examples: list of (text, {field: label}). Swaps in a new index."""
+        with self._train_lock:
+            start = time.perf_counter()
+            if not examples:
+                logger.info("KNN TRIAGE → no labelled tickets yet")
+                return {"examples": 0}
+
+            embeddings = np.concatenate([
+                _normalized(model.get().encode([text for text, _ in examples[i:i + EMBED_CHUNK]]))
+                for i in range(0, len(examples), EMBED_CHUNK)
+            ])
+            index = faiss.IndexFlatIP(embeddings.shape[1])
+            index.add(embeddings)
+            labels = {
+                field: np.array([label[field] for _, label in examples], dtype=object)
+                for field in FIELDS
+            }
+
+            self._snapshot = KNNSnapshot(index, labels, time.time())
+            self._count("retrains")
+
+        result = {"examples": len(examples), "seconds": round(time.perf_counter() - start, 3)}
+        logger.info(f"KNN TRIAGE → trained on {result['examples']} tickets in {result['seconds']}s")
+        return result
+
+    def vote(self, embedding):
+        """(prediction dict, confidence) from the neighbours, or None."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+
+        with FAISS_SEARCH_SECONDS.labels("knn_triage").time():
+            similarities, ids = snapshot.index.search(_normalized([embedding]), self.k)
+        keep = (ids[0] >= 0) & (similarities[0] >= self.min_similarity)
+        weights, ids = similarities[0][keep], ids[0][keep]
+        if len(ids) < self.min_neighbours:
+            return None
+
+        prediction, shares = {}, []
+        total = float(weights.sum())
+        for field in FIELDS:
+            tally = {}
+            for label, weight in zip(snapshot.labels[field][ids], weights):
+                tally[label] = tally.get(label, 0.0) + float(weight)
+            winner = max(tally, key=tally.get)
+            prediction[field] = winner
+            shares.append(tally[winner] / total)
+
+        # As strong as the least certain field
+        return prediction, round(min(shares), 4)
+
+    def predict(self, title: str, description: str):
+        """Triage dict when the vote clears the threshold, else None."""
+        self._count("predictions")
+        if self._snapshot is None:
+            self._count("untrained")
+            return None
+
+        embedding = embedding_service.encode(ticket_text(title, description))
+        voted = self.vote(embedding)
+        if voted is None:
+            return None
+
+        prediction, confidence = voted
+        if confidence < self.threshold:
+            return None
+
+        self._count("confident")
+        return {
+            **prediction,
+            "confidence": confidence,
+            "ai_summary": title.strip()[:120],
+            "source": "knn",
+        }
+
+    def record_agreement(self, prediction, llm_data):
+        matches = {field: prediction[field] == llm_data.get(field) for field in FIELDS}
+        with self._stats_lock:
+            self.stats["agreement_samples"] += 1
+            self.stats["agreements"] += all(matches.values())
+            for field, matched in matches.items():
+                self.stats["field_agreements"][field] += matched
+        if not all(matches.values()):
+            logger.info(
+                f"KNN TRIAGE DISAGREED → knn={ {f: prediction[f] for f in FIELDS} } "
+                f"llm={ {f: llm_data.get(f) for f in FIELDS} }"
+            )
+
+    def snapshot(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+            stats["field_agreements"] = dict(self.stats["field_agreements"])
+
+        samples = stats["agreement_samples"]
+        snapshot = self._snapshot
+        return {
+            "enabled": KNN_TRIAGE_ENABLED,
+            "threshold": self.threshold,
+            "k": self.k,
+            "examples": snapshot.index.ntotal if snapshot else 0,
+            "trained_at": snapshot.trained_at if snapshot else None,
+            "fast_path_rate": (
+                round(stats["confident"] / stats["predictions"], 4) if stats["predictions"] else 0.0
+            ),
+            "agreement_rate": round(stats["agreements"] / samples, 4) if samples else None,
+            "field_agreement_rates": {
+                field: round(count / samples, 4) if samples else None
+                for field, count in stats["field_agreements"].items()
+            },
+            **stats,
+        }
+
+
+knn_triage = KNNTriage(
+    k=KNN_TRIAGE_K,
+    threshold=KNN_TRIAGE_THRESHOLD,
+    min_similarity=KNN_TRIAGE_MIN_SIMILARITY,
+    min_neighbours=KNN_TRIAGE_MIN_NEIGHBOURS,
+)
+
+
+def training_examples(db, limit=KNN_TRIAGE_MAX_EXAMPLES):
+    """Most recent LLM-labelled tickets as (text, labels)."""
+    from backend.app.tickets.models import Ticket, TicketAIMetadata
+
+    rows = (
+        db.query(
+            Ticket.title,
+            Ticket.description,
+            *(getattr(TicketAIMetadata, field) for field in FIELDS)
+        )
+        .join(TicketAIMetadata, TicketAIMetadata.ticket_id == Ticket.id)
+        # NULL: labelled before sources were recorded, i.e. by the LLM
+        .filter((TicketAIMetadata.source == "llm") | (TicketAIMetadata.source.is_(None)))
+        .filter(TicketAIMetadata.ai_summary != "AI parsing failed.")
+        .order_by(Ticket.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        (ticket_text(row.title, row.description), {field: getattr(row, field) for field in FIELDS})
+        for row in rows
+        if all(getattr(row, field) for field in FIELDS)
+    ]
+
+
+def retrain():
+    from backend.app.core.database import SessionLocal
+
+    with SessionLocal() as db:
+        examples = training_examples(db)
+    return knn_triage.train(examples)
+
+
+def _retrain_loop():
+    while True:
+        try:
+            retrain()
+        except Exception:
+            logger.exception("KNN TRIAGE RETRAIN FAILED")
+        time.sleep(KNN_TRIAGE_RETRAIN_SECONDS)
+
+
+_retrainer = None
+_retrainer_lock = threading.Lock()
+
+
+def start_retraining():
+    """Background thread: train now, then every KNN_TRIAGE_RETRAIN_SECONDS."""
+    global _retrainer
+    if not KNN_TRIAGE_ENABLED:
+        return
+    with _retrainer_lock:
+        if _retrainer is None:
+            _retrainer = threading.Thread(target=_retrain_loop, name="knn-triage-retrain", daemon=True)
+            _retrainer.start()
+
+
+def _sampled():
+    return random.random() < KNN_TRIAGE_AGREEMENT_SAMPLE_RATE
+
+
+@traced("knn_triage")
+def fast_triage(title: str, description: str):
+    """
+    kNN triage for a routine ticket, or None when the caller should run the
+    LLM. Sampled tickets get the LLM's answer (and count toward agreement).
+    """
+    if not KNN_TRIAGE_ENABLED:
+        return None
+    try:
+        prediction = knn_triage.predict(title, description)
+    except Exception:
+        logger.exception("KNN TRIAGE FAILED → using the LLM")
+        return None
+    if prediction is None:
+        return None
+
+    if _sampled():
+        llm_data = run_ai_triage(title, description)
+        if llm_data.get("source") != "fallback":
+            knn_triage.record_agreement(prediction, llm_data)
+            return llm_data
+
+    logger.info(f"KNN TRIAGE → {prediction['category']} / {prediction['risk']} ({prediction['confidence']})")
+    return prediction
+
+
+@traced("knn_triage")
+async def afast_triage(title: str, description: str):
+    if not KNN_TRIAGE_ENABLED:
+        return None
+    try:
+        prediction = await asyncio.to_thread(knn_triage.predict, title, description)
+    except Exception:
+        logger.exception("KNN TRIAGE FAILED → using the LLM")
+        return None
+    if prediction is None:
+        return None
+
+    if _sampled():
+        llm_data = await arun_ai_triage(title, description)
+        if llm_data.get("source") != "fallback":
+            knn_triage.record_agreement(prediction, llm_data)
+            return llm_data
+
+    return prediction
+
+
+def knn_triage_stats():
+    return knn_triage.snapshot()
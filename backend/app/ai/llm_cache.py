@@ -0,0 +1,301 @@
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+from langchain_core.messages import AIMessage
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+LLM_CACHE_DISK_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "50000"))
+
+
+def cache_key(llm, messages) -> str:
+    """Content address of an LLM call: model, temperature and exact messages."""
+    payload = {
+        "model": getattr(llm, "model_name", None) or getattr(llm, "model", None),
+        "temperature": getattr(llm, "temperature", None),
+        "messages": [[msg.type, msg.content] for msg in messages],
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """In-memory LRU tier in front of a SQLite tier with TTL and size limits."""
+
+    def __init__(self, path, ttl_seconds, memory_entries, disk_entries):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes_since_evict = 0
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "expired": 0,
+            "rejected": 0,
+        }
+
+    def _db(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key, content, created_at):
+        self._memory[key] = (content, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                content, created_at = entry
+                if now - created_at < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return content
+                del self._memory[key]
+
+            db = self._db()
+            row = db.execute(
+                "SELECT content, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            content, created_at = row
+            if now - created_at >= self.ttl_seconds:
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                db.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            db.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            db.commit()
+            self._remember(key, content, created_at)
+            self.stats["disk_hits"] += 1
+            return content
+
+    def set(self, key, content):
+        now = time.time()
+        with self._lock:
+            self._remember(key, content, now)
+
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, content, now, now),
+            )
+            db.commit()
+            self.stats["writes"] += 1
+
+            # Evict in batches rather than counting rows on every write
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 100:
+                self._writes_since_evict = 0
+                self._evict(db, now)
+
+    def reject(self):
+        """A response the caller's check refused; not stored."""
+        with self._lock:
+            self.stats["rejected"] += 1
+
+    def _evict(self, db, now):
+        expired = db.execute(
+            "DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl_seconds,)
+        ).rowcount
+        self.stats["expired"] += max(expired, 0)
+
+        (count,) = db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.disk_entries
+        if overflow > 0:
+            db.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.stats["evictions"] += overflow
+        db.commit()
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
+
+
+llm_cache = LLMResponseCache(
+    path=LLM_CACHE_PATH,
+    ttl_seconds=LLM_CACHE_TTL_SECONDS,
+    memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+    disk_entries=LLM_CACHE_DISK_ENTRIES,
+)
+
+
+def _store(key, content, cacheable):
+    # Unusable output (a triage reply that does not parse) is not stored:
+    # at temperature 0 every repeat of the prompt would be served it until
+    # the TTL runs out, with no chance of a better answer
+    if cacheable is not None and not cacheable(content):
+        llm_cache.reject()
+        return
+
+    try:
+        llm_cache.set(key, content)
+    except sqlite3.Error:
+        logger.exception("LLM CACHE WRITE FAILED")
+
+
+def cached_invoke(llm, messages, cacheable=None):
+    """
+    Drop-in replacement for llm.invoke(messages) backed by the response cache.
+    `cacheable(content)` returning False keeps a response out of the cache.
+    """
+    if not LLM_CACHE_ENABLED:
+        return llm.invoke(messages)
+
+    key = cache_key(llm, messages)
+
+    try:
+        content = llm_cache.get(key)
+    except sqlite3.Error:
+        logger.exception("LLM CACHE READ FAILED")
+        content = None
+
+    if content is not None:
+        return AIMessage(content=content)
+
+    response = llm.invoke(messages)
+    _store(key, response.content, cacheable)
+    return response
+
+
+def cached_stream(llm, messages, cacheable=None):
+    """Yield response text chunks; a cache hit is yielded as one chunk."""
+    key = cache_key(llm, messages) if LLM_CACHE_ENABLED else None
+
+    if key is not None:
+        try:
+            content = llm_cache.get(key)
+        except sqlite3.Error:
+            logger.exception("LLM CACHE READ FAILED")
+            content = None
+
+        if content is not None:
+            yield content
+            return
+
+    parts = []
+    for chunk in llm.stream(messages):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+
+    if key is not None:
+        _store(key, "".join(parts), cacheable)
+
+
+async def _aget(key):
+    try:
+        return await asyncio.to_thread(llm_cache.get, key)
+    except sqlite3.Error:
+        logger.exception("LLM CACHE READ FAILED")
+        return None
+
+
+async def _aset(key, content, cacheable):
+    if cacheable is not None and not cacheable(content):
+        llm_cache.reject()
+        return
+
+    try:
+        await asyncio.to_thread(llm_cache.set, key, content)
+    except sqlite3.Error:
+        logger.exception("LLM CACHE WRITE FAILED")
+
+
+async def acached_invoke(llm, messages, cacheable=None):
+    """Async cached_invoke: SQLite work runs off the event loop."""
+    if not LLM_CACHE_ENABLED:
+        return await llm.ainvoke(messages)
+
+    key = cache_key(llm, messages)
+
+    content = await _aget(key)
+    if content is not None:
+        return AIMessage(content=content)
+
+    response = await llm.ainvoke(messages)
+    await _aset(key, response.content, cacheable)
+    return response
+
+
+async def acached_stream(llm, messages, cacheable=None):
+    key = cache_key(llm, messages) if LLM_CACHE_ENABLED else None
+
+    if key is not None:
+        content = await _aget(key)
+        if content is not None:
+            yield content
+            return
+
+    parts = []
+    async for chunk in llm.astream(messages):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+
+    if key is not None:
+        await _aset(key, "".join(parts), cacheable)
+
+
+def cache_stats():
+    return llm_cache.snapshot()
@@ -0,0 +1,496 @@
+import os
+import time
+import random
+import asyncio
+import threading
+import logging
+
+from dotenv import load_dotenv
+
+from backend.app.ai.llm_cache import cached_invoke, cached_stream, acached_invoke, acached_stream
+from backend.app.ai.telemetry import LLMCall, observe_stream, aobserve_stream
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# groq | fake (local stub with injectable latency and errors)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower()
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+
+# One budget per process, shared by worker threads, sync routes and async callers
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+# e.g. "triage=16,auto_reply=8,draft=8"; purposes not listed share the global cap
+LLM_PURPOSE_CONCURRENCY = os.getenv("LLM_PURPOSE_CONCURRENCY", "triage=16,auto_reply=8,draft=8,summary=4")
+
+# Total budget for one logical call, across queueing and retries
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "30"))
+# Cap for a single HTTP attempt
+LLM_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "15"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.25"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "4"))
+
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "64"))
+
+# Async callers wait for a slot by polling between these sleeps
+ASYNC_SLOT_POLL_MIN_SECONDS = 0.001
+ASYNC_SLOT_POLL_MAX_SECONDS = 0.05
+
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "200"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_OUTPUT_TOKEN_MS = float(os.getenv("FAKE_LLM_OUTPUT_TOKEN_MS", "0"))
+FAKE_LLM_INPUT_TOKEN_MS = float(os.getenv("FAKE_LLM_INPUT_TOKEN_MS", "0"))
+
+
+class LLMUnavailable(Exception):
+    """The provider is degraded (circuit open, saturated or out of budget)."""
+
+
+def _parse_limits(spec):
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            purpose, value = item.split("=", 1)
+            limits[purpose.strip()] = int(value)
+    return limits
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls; after
+    `reset_seconds` lets one trial call through (half-open) and closes again
+    if it succeeds.
+    """
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release_trial(self):
+        # A half-open trial that never reached the provider
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    logger.warning("LLM CIRCUIT OPEN → failing fast to fallbacks")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class _GuardedLLM:
+    """
+    What the response cache sees as "the LLM": cache misses go through the
+    manager's semaphores, deadline, retries and circuit breaker.
+    """
+
+    def __init__(self, manager, purpose, client, deadline, call):
+        self.manager = manager
+        self.purpose = purpose
+        self.client = client
+        self.deadline = deadline
+        self.call = call
+        self.model_name = getattr(client, "model_name", None)
+        self.temperature = getattr(client, "temperature", None)
+
+    def invoke(self, messages):
+        return self.manager._call(self.purpose, self.client, messages, self.deadline, self.call)
+
+    def stream(self, messages):
+        return self.manager._stream(self.purpose, self.client, messages, self.deadline, self.call)
+
+    def ainvoke(self, messages):
+        return self.manager._acall(self.purpose, self.client, messages, self.deadline, self.call)
+
+    def astream(self, messages):
+        return self.manager._astream(self.purpose, self.client, messages, self.deadline, self.call)
+
+
+class LLMClientManager:
+    """
+    Single owner of LLM clients: one pooled HTTP client shared by every
+    model instance, global and per-purpose concurrency caps, per-call
+    deadlines, jittered retries and a circuit breaker.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+        self._http_client = None
+        self._http_async_client = None
+
+        self._global_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+        self._purpose_slots = {
+            purpose: threading.BoundedSemaphore(limit)
+            for purpose, limit in _parse_limits(LLM_PURPOSE_CONCURRENCY).items()
+        }
+
+        self.breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "failures": 0,
+            "rejected_open_circuit": 0,
+            "rejected_saturated": 0,
+            "in_flight": 0,
+        }
+
+    def _count(self, key, delta=1):
+        with self._stats_lock:
+            self.stats[key] += delta
+
+    def _build_client(self, temperature):
+        if LLM_PROVIDER == "fake":
+            from backend.app.ai.fake_llm import FakeLLM
+            return FakeLLM(
+                latency_ms=FAKE_LLM_LATENCY_MS,
+                output_token_ms=FAKE_LLM_OUTPUT_TOKEN_MS,
+                input_token_ms=FAKE_LLM_INPUT_TOKEN_MS,
+                error_rate=FAKE_LLM_ERROR_RATE,
+                temperature=temperature
+            )
+
+        import httpx
+        from langchain_groq import ChatGroq
+
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS
+                )
+            )
+            self._http_async_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS
+                )
+            )
+
+        return ChatGroq(
+            model=LLM_MODEL,
+            groq_api_key=os.getenv("GROQ_API_KEY"),
+            temperature=temperature,
+            timeout=LLM_ATTEMPT_TIMEOUT_SECONDS,
+            # Retries are handled here, with the deadline in mind
+            max_retries=0,
+            http_client=self._http_client,
+            http_async_client=self._http_async_client
+        )
+
+    def client(self, temperature):
+        """Shared model instance for a temperature, built on first use."""
+        if temperature not in self._clients:
+            with self._clients_lock:
+                if temperature not in self._clients:
+                    self._clients[temperature] = self._build_client(temperature)
+        return self._clients[temperature]
+
+    def _acquire(self, semaphore, deadline):
+        if semaphore is None:
+            return True
+        return semaphore.acquire(timeout=max(deadline - time.monotonic(), 0))
+
+    def _slots(self, purpose, deadline):
+        """Acquire purpose then global slot; returns the semaphores to release."""
+        held = []
+        for semaphore in (self._purpose_slots.get(purpose), self._global_slots):
+            if not self._acquire(semaphore, deadline):
+                for acquired in held:
+                    acquired.release()
+                self._count("rejected_saturated")
+                self.breaker.release_trial()
+                raise LLMUnavailable(f"LLM saturated ({purpose})")
+            if semaphore is not None:
+                held.append(semaphore)
+        return held
+
+    def _backoff(self, attempt, deadline):
+        # Full jitter, never sleeping past the deadline
+        delay = random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+        remaining = deadline - time.monotonic()
+        if delay >= remaining:
+            return False
+        time.sleep(delay)
+        return True
+
+    async def _aacquire(self, semaphore, deadline):
+        """
+        Take a slot of the same thread semaphore the sync path uses, so both
+        share one budget. Polls with a short, growing sleep: no event-loop
+        blocking and no thread parked per waiter.
+        """
+        if semaphore is None:
+            return True
+        delay = ASYNC_SLOT_POLL_MIN_SECONDS
+        while not semaphore.acquire(blocking=False):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, ASYNC_SLOT_POLL_MAX_SECONDS)
+        return True
+
+    async def _aslots(self, purpose, deadline):
+        held = []
+        try:
+            for semaphore in (self._purpose_slots.get(purpose), self._global_slots):
+                if not await self._aacquire(semaphore, deadline):
+                    for acquired in held:
+                        acquired.release()
+                    self._count("rejected_saturated")
+                    self.breaker.release_trial()
+                    raise LLMUnavailable(f"LLM saturated ({purpose})")
+                if semaphore is not None:
+                    held.append(semaphore)
+        except asyncio.CancelledError:
+            # Cancelled while queueing: don't leak the slots already taken
+            for acquired in held:
+                acquired.release()
+            raise
+        return held
+
+    async def _abackoff(self, attempt, deadline):
+        delay = random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+        if delay >= deadline - time.monotonic():
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            self._count("rejected_open_circuit")
+            raise LLMUnavailable("LLM circuit open")
+
+    def _attempts(self, call):
+        self._count("calls")
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            if attempt:
+                self._count("retries")
+            self._count("attempts")
+            call.attempts += 1
+            yield attempt
+
+    def _call(self, purpose, client, messages, deadline, call):
+        # Fail fast before queueing for a slot
+        self._check_breaker()
+        held = self._slots(purpose, deadline)
+        self._count("in_flight")
+        try:
+            last_error = None
+            for attempt in self._attempts(call):
+                timeout = min(LLM_ATTEMPT_TIMEOUT_SECONDS, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                try:
+                    response = client.invoke(messages, timeout=timeout)
+                    self.breaker.record_success()
+                    return response
+                except Exception as exc:
+                    last_error = exc
+                    logger.warning(f"LLM CALL FAILED → purpose={purpose} attempt={attempt}: {exc!r}")
+                    if not self._backoff(attempt, deadline):
+                        break
+
+            self._count("failures")
+            self.breaker.record_failure()
+            raise LLMUnavailable(f"LLM call failed ({purpose})") from last_error
+        finally:
+            self._count("in_flight", -1)
+            self.breaker.release_trial()
+            for semaphore in held:
+                semaphore.release()
+
+    def _stream(self, purpose, client, messages, deadline, call):
+        self._check_breaker()
+        held = self._slots(purpose, deadline)
+        self._count("in_flight")
+        try:
+            last_error = None
+            for attempt in self._attempts(call):
+                timeout = min(LLM_ATTEMPT_TIMEOUT_SECONDS, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                started = False
+                try:
+                    for chunk in client.stream(messages, timeout=timeout):
+                        started = True
+                        # Providers that report usage do so on the last chunk
+                        call.record_usage(chunk)
+                        yield chunk
+                    self.breaker.record_success()
+                    return
+                except Exception as exc:
+                    # Text already sent to the caller cannot be retried
+                    if started:
+                        self.breaker.record_failure()
+                        raise
+                    last_error = exc
+                    logger.warning(f"LLM STREAM FAILED → purpose={purpose} attempt={attempt}: {exc!r}")
+                    if not self._backoff(attempt, deadline):
+                        break
+
+            self._count("failures")
+            self.breaker.record_failure()
+            raise LLMUnavailable(f"LLM stream failed ({purpose})") from last_error
+        finally:
+            self._count("in_flight", -1)
+            self.breaker.release_trial()
+            for semaphore in held:
+                semaphore.release()
+
+    async def _acall(self, purpose, client, messages, deadline, call):
+        self._check_breaker()
+        held = await self._aslots(purpose, deadline)
+        self._count("in_flight")
+        try:
+            last_error = None
+            for attempt in self._attempts(call):
+                timeout = min(LLM_ATTEMPT_TIMEOUT_SECONDS, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                try:
+                    # wait_for backs up clients that ignore the timeout kwarg
+                    response = await asyncio.wait_for(
+                        client.ainvoke(messages, timeout=timeout), timeout
+                    )
+                    self.breaker.record_success()
+                    return response
+                except Exception as exc:
+                    last_error = exc
+                    logger.warning(f"LLM CALL FAILED → purpose={purpose} attempt={attempt}: {exc!r}")
+                    if not await self._abackoff(attempt, deadline):
+                        break
+
+            self._count("failures")
+            self.breaker.record_failure()
+            raise LLMUnavailable(f"LLM call failed ({purpose})") from last_error
+        finally:
+            self._count("in_flight", -1)
+            self.breaker.release_trial()
+            for semaphore in held:
+                semaphore.release()
+
+    async def _astream(self, purpose, client, messages, deadline, call):
+        self._check_breaker()
+        held = await self._aslots(purpose, deadline)
+        self._count("in_flight")
+        try:
+            last_error = None
+            for attempt in self._attempts(call):
+                timeout = min(LLM_ATTEMPT_TIMEOUT_SECONDS, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                started = False
+                try:
+                    async for chunk in client.astream(messages, timeout=timeout):
+                        started = True
+                        call.record_usage(chunk)
+                        yield chunk
+                    self.breaker.record_success()
+                    return
+                except Exception as exc:
+                    if started:
+                        self.breaker.record_failure()
+                        raise
+                    last_error = exc
+                    logger.warning(f"LLM STREAM FAILED → purpose={purpose} attempt={attempt}: {exc!r}")
+                    if not await self._abackoff(attempt, deadline):
+                        break
+
+            self._count("failures")
+            self.breaker.record_failure()
+            raise LLMUnavailable(f"LLM stream failed ({purpose})") from last_error
+        finally:
+            self._count("in_flight", -1)
+            self.breaker.release_trial()
+            for semaphore in held:
+                semaphore.release()
+
+    def _guarded(self, purpose, messages, temperature, deadline_seconds):
+        deadline = time.monotonic() + (deadline_seconds or LLM_DEADLINE_SECONDS)
+        # Telemetry record for the whole call, see ai/telemetry.py
+        call = LLMCall(purpose, messages)
+        return _GuardedLLM(self, purpose, self.client(temperature), deadline, call)
+
+    def invoke(self, purpose, messages, temperature=0, deadline_seconds=None, cacheable=None):
+        """
+        Cached, guarded llm.invoke. Raises LLMUnavailable when degraded.
+        Responses `cacheable(content)` rejects are returned but not cached.
+        """
+        llm = self._guarded(purpose, messages, temperature, deadline_seconds)
+        with llm.call:
+            response = cached_invoke(llm, messages, cacheable)
+            llm.call.record_response(response)
+        return response
+
+    def stream(self, purpose, messages, temperature=0, deadline_seconds=None, cacheable=None):
+        """Cached, guarded iterator of response text chunks."""
+        llm = self._guarded(purpose, messages, temperature, deadline_seconds)
+        return observe_stream(llm.call, cached_stream(llm, messages, cacheable))
+
+    async def ainvoke(self, purpose, messages, temperature=0, deadline_seconds=None, cacheable=None):
+        """Async invoke(): waits on the event loop instead of a thread."""
+        llm = self._guarded(purpose, messages, temperature, deadline_seconds)
+        with llm.call:
+            response = await acached_invoke(llm, messages, cacheable)
+            llm.call.record_response(response)
+        return response
+
+    def astream(self, purpose, messages, temperature=0, deadline_seconds=None, cacheable=None):
+        """Async iterator of response text chunks."""
+        llm = self._guarded(purpose, messages, temperature, deadline_seconds)
+        return aobserve_stream(llm.call, acached_stream(llm, messages, cacheable))
+
+    def snapshot(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["provider"] = LLM_PROVIDER
+        stats["circuit"] = {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "times_opened": self.breaker.times_opened,
+        }
+        return stats
+
+
+llm_manager = LLMClientManager()
+
+
+def llm_stats():
+    return llm_manager.snapshot()
@@ -1,14 +1,24 @@
-from backend.app.ai.vector_store import model, index, texts
-
-def retrieve_context(query: str, k: int = 3):
-    query_embedding = model.encode([query])
-    distances, indices = index.search(query_embedding, k)
+from backend.app.ai.embedding_service import embedding_service
+from backend.app.core.metrics import RAG_RETRIEVE_SECONDS
+from backend.app.core.tracing import traced
 
+def _format_context(distances, indices, kb):
     results = []
-    for i, distance in zip(indices[0], distances[0]):
-        if distance < 1.2:  # threshold tuning
-            results.append(texts[i])
+    for i, distance in zip(indices, distances):
+        if i >= 0 and distance < 1.2:  # threshold tuning
+            results.append(kb.texts[int(i)])
 
     return "\n\n".join(results)
 
 
+@traced("retrieve")
+def retrieve_context(query: str, k: int = 3):
+    # Batched with concurrent callers: one encode + one search per batch
+    with RAG_RETRIEVE_SECONDS.time():
+        return _format_context(*embedding_service.search(query, k))
+
+
+@traced("retrieve")
+async def aretrieve_context(query: str, k: int = 3):
+    with RAG_RETRIEVE_SECONDS.time():
+        return _format_context(*await embedding_service.asearch(query, k))
@@ -0,0 +1,24 @@
+"""
+Incrementally re-index knowledge_base/faqs.txt.
+
+    python -m backend.app.ai.reindex_kb          # changed chunks only
+    python -m backend.app.ai.reindex_kb --full   # re-embed and retrain
+
+Running app workers pick up the new index within KB_RELOAD_CHECK_SECONDS.
+"""
+import sys
+
+from backend.app.ai.vector_store import knowledge_base
+
+
+def main():
+    result = knowledge_base.reindex(full="--full" in sys.argv)
+
+    print(
+        f"KB index v{result['version']}: +{result['added']} / -{result['removed']} chunks, "
+        f"{result['total']} total in a {result['index_type']} index ({result['seconds']}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,13 @@
-import os
-from langchain_groq import ChatGroq
 from langchain_core.messages import SystemMessage, HumanMessage
-from dotenv import load_dotenv
-from backend.app.ai.rag import retrieve_context
+from backend.app.ai.rag import retrieve_context, aretrieve_context
+from backend.app.ai.llm_client import llm_manager
+from backend.app.ai.conversation_summary import history_text
+from backend.app.ai.telemetry import ticket_scope
+from backend.app.core.tracing import traced
 
-load_dotenv()
-
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    groq_api_key=os.getenv("GROQ_API_KEY"),
-    temperature=0.3
-)
-
-def generate_auto_reply(title: str, description: str, ai_metadata: dict):
-    context = retrieve_context(description)
+REPLY_TEMPERATURE = 0.3
 
+def build_auto_reply_messages(title: str, description: str, ai_metadata: dict, context: str):
     system_prompt = f"""
 You are a senior AI customer support agent.
 
@@ -61,20 +54,35 @@ Ticket Description: {description}
 Write the final customer reply.
 """
 
-    response = llm.invoke([
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(content=user_prompt)
-    ])
+    ]
+
+
+@traced("auto_reply")
+def generate_auto_reply(title: str, description: str, ai_metadata: dict):
+    context = retrieve_context(description)
+    prompt = build_auto_reply_messages(title, description, ai_metadata, context)
+    response = llm_manager.invoke("auto_reply", prompt, temperature=REPLY_TEMPERATURE)
+    return response.content
 
+
+@traced("auto_reply")
+async def agenerate_auto_reply(title: str, description: str, ai_metadata: dict):
+    context = await aretrieve_context(description)
+    prompt = build_auto_reply_messages(title, description, ai_metadata, context)
+    response = await llm_manager.ainvoke("auto_reply", prompt, temperature=REPLY_TEMPERATURE)
     return response.content
 
 
-def generate_agent_draft(ticket, messages, ai_metadata: dict):
-    context = retrieve_context(ticket.description)
+def build_agent_draft_messages(ticket, messages, ai_metadata: dict, context=None, summary=None):
+    """`messages`: the thread after `summary` (the whole thread when None)."""
+    if context is None:
+        context = retrieve_context(ticket.description)
 
-    conversation_text = "\n".join(
-        [f"{msg.sender_role}: {msg.message}" for msg in messages]
-    )
+    # Summary + newest messages, capped at DRAFT_HISTORY_TOKEN_BUDGET
+    conversation_text = history_text(summary, messages)
 
     system_prompt = f"""
 You are a senior customer support strategist assisting a HUMAN AGENT.
@@ -131,15 +139,51 @@ Knowledge Base Context:
 Ticket Title:
 {ticket.title}
 
-Full Conversation History:
+Conversation History:
 {conversation_text}
 
 Generate the best strategic draft reply for the AGENT.
 """
 
-    response = llm.invoke([
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(content=user_prompt)
-    ])
+    ]
+
 
+@traced("draft")
+def generate_agent_draft(ticket, messages, ai_metadata: dict, summary=None):
+    prompt = build_agent_draft_messages(ticket, messages, ai_metadata, summary=summary)
+    with ticket_scope(ticket.id):
+        response = llm_manager.invoke("draft", prompt, temperature=REPLY_TEMPERATURE)
     return response.content
+
+
+def stream_agent_draft(ticket, messages, ai_metadata: dict, summary=None):
+    """
+    Builds the prompt now (while the DB objects are live) and returns an
+    iterator of text chunks as the LLM produces them.
+    """
+    prompt = build_agent_draft_messages(ticket, messages, ai_metadata, summary=summary)
+    # The call (and its ticket) is recorded when the stream is created
+    with ticket_scope(ticket.id):
+        return llm_manager.stream("draft", prompt, temperature=REPLY_TEMPERATURE)
+
+
+@traced("draft")
+async def agenerate_agent_draft(ticket, messages, ai_metadata: dict, summary=None):
+    context = await aretrieve_context(ticket.description)
+    prompt = build_agent_draft_messages(ticket, messages, ai_metadata, context, summary)
+    with ticket_scope(ticket.id):
+        response = await llm_manager.ainvoke("draft", prompt, temperature=REPLY_TEMPERATURE)
+    return response.content
+
+
+async def astream_agent_draft(ticket, messages, ai_metadata: dict, summary=None):
+    """Async iterator of draft text chunks; retrieval is awaited first."""
+    context = await aretrieve_context(ticket.description)
+    prompt = build_agent_draft_messages(ticket, messages, ai_metadata, context, summary)
+    with ticket_scope(ticket.id):
+        chunks = llm_manager.astream("draft", prompt, temperature=REPLY_TEMPERATURE)
+    async for text in chunks:
+        yield text
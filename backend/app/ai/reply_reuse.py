@@ -0,0 +1,246 @@
+import os
+import hashlib
+import threading
+import logging
+from collections import deque
+
+import faiss
+import numpy as np
+
+from backend.app.ai.vector_store import model
+from backend.app.core.lazy import Lazy
+from backend.app.core.metrics import FAISS_SEARCH_SECONDS
+from backend.app.core.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+REPLY_REUSE_ENABLED = os.getenv("REPLY_REUSE_ENABLED", "true").lower() == "true"
+# Cosine similarity a new ticket needs to reuse a prior reply
+REPLY_REUSE_THRESHOLD = float(os.getenv("REPLY_REUSE_THRESHOLD", "0.92"))
+REPLY_REUSE_MAX_ENTRIES = int(os.getenv("REPLY_REUSE_MAX_ENTRIES", "5000"))
+
+# Upper edges of the similarity histogram buckets
+SIMILARITY_BUCKETS = [0.5, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0]
+
+
+class ReplyReuseIndex:
+    """Per-category cosine index over previously sent LOW-risk AI replies."""
+
+    def __init__(self, threshold, max_entries):
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        self._indexes = {}
+        self._replies = {}  # entry id -> reply
+        self._order = deque()  # (entry id, category, key), oldest first
+        self._keys = set()  # content keys of indexed entries
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "saved_llm_calls": 0,
+            "entries": 0,
+            "evictions": 0,
+            "similarity_histogram": {str(edge): 0 for edge in SIMILARITY_BUCKETS},
+        }
+
+    def _embed(self, texts):
+        embeddings = np.asarray(model.get().encode(texts), dtype="float32")
+        faiss.normalize_L2(embeddings)
+        return embeddings
+
+    def _record_similarity(self, similarity):
+        for edge in SIMILARITY_BUCKETS:
+            if similarity <= edge:
+                self.stats["similarity_histogram"][str(edge)] += 1
+                return
+        self.stats["similarity_histogram"][str(SIMILARITY_BUCKETS[-1])] += 1
+
+    def _evict(self, count):
+        # Caller holds the lock; one remove_ids per category, since each
+        # compacts the whole flat index
+        stale = {}
+        for _ in range(count):
+            entry_id, category, key = self._order.popleft()
+            del self._replies[entry_id]
+            self._keys.discard(key)
+            stale.setdefault(category, []).append(entry_id)
+
+        for category, ids in stale.items():
+            self._indexes[category].remove_ids(np.asarray(ids, dtype="int64"))
+        self.stats["evictions"] += count
+
+    @staticmethod
+    def _key(description, category, reply):
+        return hashlib.sha256(f"{category}\0{description}\0{reply}".encode("utf-8")).hexdigest()
+
+    def add_many(self, entries):
+        """
+        entries: iterable of (description, category, reply), oldest first.
+        At max_entries the oldest replies make room for the new ones. Entries
+        already indexed are skipped: the warm-up from the database and a reply
+        remembered as it is sent can name the same one.
+        """
+        if self.max_entries <= 0:
+            return
+        entries = [e for e in entries if e[0] and e[2]][-self.max_entries:]
+
+        keyed = {}
+        with self._lock:
+            for entry in entries:
+                key = self._key(*entry)
+                if key not in self._keys:
+                    keyed[key] = entry
+        if not keyed:
+            return
+
+        embeddings = self._embed([description for description, _, _ in keyed.values()])
+
+        with self._lock:
+            # Re-checked: another thread may have added some while embedding
+            fresh = [
+                (key, embedding, entry)
+                for (key, entry), embedding in zip(keyed.items(), embeddings)
+                if key not in self._keys
+            ]
+            overflow = len(self._order) + len(fresh) - self.max_entries
+            if overflow > 0:
+                self._evict(overflow)
+
+            for key, embedding, (_, category, reply) in fresh:
+                index = self._indexes.get(category)
+                if index is None:
+                    index = faiss.IndexIDMap2(faiss.IndexFlatIP(embeddings.shape[1]))
+                    self._indexes[category] = index
+
+                entry_id = self._next_id
+                self._next_id += 1
+                index.add_with_ids(embedding.reshape(1, -1), np.asarray([entry_id], dtype="int64"))
+                self._replies[entry_id] = reply
+                self._order.append((entry_id, category, key))
+                self._keys.add(key)
+
+            self.stats["entries"] = len(self._order)
+
+    def add(self, description, category, reply):
+        self.add_many([(description, category, reply)])
+
+    def find(self, description, category):
+        embedding = self._embed([description])
+
+        with self._lock:
+            self.stats["lookups"] += 1
+
+            index = self._indexes.get(category)
+            if index is None or index.ntotal == 0:
+                return None
+
+            with FAISS_SEARCH_SECONDS.labels("reply_reuse").time():
+                similarities, ids = index.search(embedding, 1)
+            similarity = float(similarities[0][0])
+            self._record_similarity(similarity)
+
+            if similarity < self.threshold:
+                return None
+
+            self.stats["hits"] += 1
+            self.stats["saved_llm_calls"] += 1
+            return self._replies[int(ids[0][0])]
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["similarity_histogram"] = dict(self.stats["similarity_histogram"])
+        stats["threshold"] = self.threshold
+        stats["hit_rate"] = (
+            round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        )
+        return stats
+
+
+reply_index = ReplyReuseIndex(
+    threshold=REPLY_REUSE_THRESHOLD,
+    max_entries=REPLY_REUSE_MAX_ENTRIES,
+)
+
+
+@traced("reply_reuse")
+def find_reusable_reply(description: str, ai_data: dict):
+    """Return a prior auto-reply for a near-duplicate LOW-risk ticket, if any."""
+    if not REPLY_REUSE_ENABLED or ai_data["risk"] != "LOW":
+        return None
+
+    _warm_index.get()
+
+    reply = reply_index.find(description, ai_data["category"])
+    if reply is not None:
+        logger.info(f"REPLY REUSE HIT → category={ai_data['category']}")
+    return reply
+
+
+def remember_replies(entries):
+    """
+    entries: (description, ai_data, reply) of freshly generated replies.
+    Call once they are committed, so a rolled-back reply is never reused.
+    """
+    if not REPLY_REUSE_ENABLED:
+        return
+    # Past replies first, so they stay older than this one for eviction
+    _warm_index.get()
+    reply_index.add_many([
+        (description, ai_data["category"], reply)
+        for description, ai_data, reply in entries
+        if ai_data["risk"] == "LOW"
+    ])
+
+
+def remember_reply(description: str, ai_data: dict, reply: str):
+    remember_replies([(description, ai_data, reply)])
+
+
+def warm_from_db(db):
+    """Index the most recent AI replies sent on LOW-risk tickets."""
+    if not REPLY_REUSE_ENABLED:
+        return
+
+    from backend.app.tickets.models import Ticket, TicketAIMetadata, TicketMessage
+
+    rows = (
+        db.query(Ticket.description, TicketAIMetadata.category, TicketMessage.message)
+        .join(TicketAIMetadata, TicketAIMetadata.ticket_id == Ticket.id)
+        .join(TicketMessage, TicketMessage.ticket_id == Ticket.id)
+        .filter(TicketMessage.sender_role == "AI", TicketAIMetadata.risk == "LOW")
+        .order_by(TicketMessage.id.desc())
+        .limit(REPLY_REUSE_MAX_ENTRIES)
+        .all()
+    )
+
+    # Newest first from the query; added oldest first so they are evicted first
+    reply_index.add_many([tuple(row) for row in reversed(rows)])
+    logger.info(f"REPLY REUSE → indexed {len(rows)} prior AI replies")
+
+
+def _warm_from_database():
+    from backend.app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        warm_from_db(db)
+    finally:
+        db.close()
+    return True
+
+
+# Past replies are indexed on the first lookup (or by the startup warm-up)
+_warm_index = Lazy(_warm_from_database)
+
+
+def warm_up():
+    if REPLY_REUSE_ENABLED:
+        _warm_index.get()
+
+
+def reuse_stats():
+    return reply_index.snapshot()
@@ -0,0 +1,331 @@
+"""
+Per-call LLM telemetry. Every llm_manager call is recorded with its
+purpose, latency (cache lookup, queueing and retries included), token
+usage, prompt size, cache status and retries; the triage code adds parse
+failures and fallbacks. Totals and histograms are kept per purpose, and
+per ticket for calls made inside ticket_scope().
+"""
+import os
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+LLM_TELEMETRY_ENABLED = os.getenv("LLM_TELEMETRY_ENABLED", "true").lower() == "true"
+# Tickets with per-ticket totals kept in memory, least recently used evicted
+LLM_TELEMETRY_MAX_TICKETS = int(os.getenv("LLM_TELEMETRY_MAX_TICKETS", "10000"))
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+TOKEN_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+_current_ticket = contextvars.ContextVar("llm_telemetry_ticket", default=None)
+
+
+@contextmanager
+def ticket_scope(ticket_id):
+    """Attribute LLM calls made inside the block to `ticket_id`."""
+    token = _current_ticket.set(ticket_id)
+    try:
+        yield
+    finally:
+        _current_ticket.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class Histogram:
+    """Fixed buckets; percentiles are the upper bound of their bucket."""
+
+    def __init__(self, bounds, unit=""):
+        self.bounds = bounds
+        self.unit = unit
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.bounds) if value < bound), len(self.bounds))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank, seen = p * self.count, 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return round(self.max, 1)
+
+    def snapshot(self):
+        buckets = {f"<{bound}{self.unit}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets[f">={self.bounds[-1]}{self.unit}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 1) if self.count else 0.0,
+            "max": round(self.max, 1),
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+class LLMCall:
+    """
+    One logical llm_manager call. The manager counts attempts on it and
+    the response fills in usage; leaving the `with` block records it.
+    No attempt and no error means the response cache answered.
+    """
+
+    __slots__ = (
+        "purpose", "ticket_id", "started", "prompt_tokens",
+        "attempts", "input_tokens", "output_tokens", "output_chars", "error",
+    )
+
+    def __init__(self, purpose, messages):
+        self.purpose = purpose
+        self.ticket_id = _current_ticket.get()
+        self.started = time.perf_counter()
+        self.prompt_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        self.attempts = 0
+        self.input_tokens = None
+        self.output_tokens = None
+        self.output_chars = 0
+        self.error = None
+
+    def record_usage(self, message):
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            self.input_tokens = usage.get("input_tokens")
+            self.output_tokens = usage.get("output_tokens")
+
+    def record_response(self, response):
+        self.output_chars += len(response.content or "")
+        self.record_usage(response)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        telemetry.finish(self)
+        return False
+
+
+def observe_stream(call, chunks):
+    """Pass text chunks through, recording the call when the stream ends."""
+    with call:
+        for text in chunks:
+            call.output_chars += len(text)
+            yield text
+
+
+async def aobserve_stream(call, chunks):
+    with call:
+        async for text in chunks:
+            call.output_chars += len(text)
+            yield text
+
+
+def _purpose_stats():
+    return {
+        "calls": 0,
+        "cache_hits": 0,
+        "errors": 0,
+        "retries": 0,
+        "parse_failures": 0,
+        "fallbacks": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "estimated_usage": 0,
+        "latency_ms": Histogram(LATENCY_BUCKETS_MS, "ms"),
+        "prompt_tokens": Histogram(TOKEN_BUCKETS),
+        "output_tokens_histogram": Histogram(TOKEN_BUCKETS),
+    }
+
+
+def _ticket_stats():
+    return {
+        "calls": 0,
+        "cache_hits": 0,
+        "errors": 0,
+        "retries": 0,
+        "parse_failures": 0,
+        "fallbacks": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "latency_ms": 0.0,
+        "purposes": {},
+    }
+
+
+class LLMTelemetry:
+    def __init__(self, max_tickets):
+        self.max_tickets = max_tickets
+        self._lock = threading.Lock()
+        self.purposes = {}
+        self.tickets = OrderedDict()
+        self.fallback_reasons = {}
+
+    def _ticket(self, ticket_id):
+        """Per-ticket totals (caller holds the lock); None when unattributed."""
+        if ticket_id is None:
+            return None
+        stats = self.tickets.get(ticket_id)
+        if stats is None:
+            stats = self.tickets[ticket_id] = _ticket_stats()
+            if len(self.tickets) > self.max_tickets:
+                self.tickets.popitem(last=False)
+        else:
+            self.tickets.move_to_end(ticket_id)
+        return stats
+
+    def finish(self, call):
+        if not LLM_TELEMETRY_ENABLED:
+            return
+        latency_ms = (time.perf_counter() - call.started) * 1000
+        cache_hit = call.attempts == 0 and call.error is None
+        retries = max(call.attempts - 1, 0)
+
+        # Tokens of calls the provider answered; cache hits and failures add none
+        input_tokens = output_tokens = 0
+        estimated = False
+        if call.attempts and call.error is None:
+            input_tokens, output_tokens = call.input_tokens, call.output_tokens
+            if input_tokens is None or output_tokens is None:
+                # Streams and some providers report no usage
+                estimated = True
+                input_tokens = call.prompt_tokens if input_tokens is None else input_tokens
+                if output_tokens is None:
+                    output_tokens = call.output_chars // 4 + 1
+
+        with self._lock:
+            stats = self.purposes.get(call.purpose)
+            if stats is None:
+                stats = self.purposes[call.purpose] = _purpose_stats()
+            stats["calls"] += 1
+            stats["cache_hits"] += cache_hit
+            stats["errors"] += call.error is not None
+            stats["retries"] += retries
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+            stats["estimated_usage"] += estimated
+            stats["latency_ms"].observe(latency_ms)
+            stats["prompt_tokens"].observe(call.prompt_tokens)
+            if call.attempts and call.error is None:
+                stats["output_tokens_histogram"].observe(output_tokens)
+
+            ticket = self._ticket(call.ticket_id)
+            if ticket is not None:
+                ticket["calls"] += 1
+                ticket["cache_hits"] += cache_hit
+                ticket["errors"] += call.error is not None
+                ticket["retries"] += retries
+                ticket["input_tokens"] += input_tokens
+                ticket["output_tokens"] += output_tokens
+                ticket["latency_ms"] += latency_ms
+                ticket["purposes"][call.purpose] = ticket["purposes"].get(call.purpose, 0) + 1
+
+    def record_parse_failure(self, purpose, count=1):
+        if not LLM_TELEMETRY_ENABLED:
+            return
+        with self._lock:
+            stats = self.purposes.get(purpose)
+            if stats is None:
+                stats = self.purposes[purpose] = _purpose_stats()
+            stats["parse_failures"] += count
+            ticket = self._ticket(_current_ticket.get())
+            if ticket is not None:
+                ticket["parse_failures"] += count
+
+    def record_fallback(self, reason):
+        """fallback_response() fired (always a triage result)."""
+        if not LLM_TELEMETRY_ENABLED:
+            return
+        with self._lock:
+            stats = self.purposes.get("triage")
+            if stats is None:
+                stats = self.purposes["triage"] = _purpose_stats()
+            stats["fallbacks"] += 1
+            self.fallback_reasons[reason] = self.fallback_reasons.get(reason, 0) + 1
+            ticket = self._ticket(_current_ticket.get())
+            if ticket is not None:
+                ticket["fallbacks"] += 1
+
+    @staticmethod
+    def _purpose_snapshot(stats):
+        calls = stats["calls"]
+        answered = calls - stats["cache_hits"] - stats["errors"]
+        return {
+            **{key: value for key, value in stats.items() if not isinstance(value, Histogram)},
+            "cache_hit_rate": round(stats["cache_hits"] / calls, 4) if calls else 0.0,
+            "error_rate": round(stats["errors"] / calls, 4) if calls else 0.0,
+            "avg_input_tokens": round(stats["input_tokens"] / answered, 1) if answered else 0.0,
+            "avg_output_tokens": round(stats["output_tokens"] / answered, 1) if answered else 0.0,
+            "latency_ms": stats["latency_ms"].snapshot(),
+            "prompt_tokens": stats["prompt_tokens"].snapshot(),
+            "output_tokens_histogram": stats["output_tokens_histogram"].snapshot(),
+        }
+
+    @staticmethod
+    def _ticket_snapshot(ticket_id, stats):
+        return {
+            "ticket_id": ticket_id,
+            **stats,
+            "latency_ms": round(stats["latency_ms"], 1),
+            "purposes": dict(stats["purposes"]),
+            "total_tokens": stats["input_tokens"] + stats["output_tokens"],
+        }
+
+    def snapshot(self, top=10):
+        with self._lock:
+            purposes = {
+                purpose: self._purpose_snapshot(stats) for purpose, stats in self.purposes.items()
+            }
+            heaviest = sorted(
+                self.tickets.items(),
+                key=lambda item: item[1]["input_tokens"] + item[1]["output_tokens"],
+                reverse=True
+            )[:top]
+            top_tickets = [self._ticket_snapshot(ticket_id, stats) for ticket_id, stats in heaviest]
+            fallback_reasons = dict(self.fallback_reasons)
+            tracked = len(self.tickets)
+
+        totals = {
+            key: sum(stats[key] for stats in purposes.values())
+            for key in ("calls", "cache_hits", "errors", "retries", "parse_failures",
+                        "fallbacks", "input_tokens", "output_tokens")
+        }
+        return {
+            "enabled": LLM_TELEMETRY_ENABLED,
+            "totals": totals,
+            "purposes": purposes,
+            "fallback_reasons": fallback_reasons,
+            "tracked_tickets": tracked,
+            "top_tickets": top_tickets,
+        }
+
+    def ticket_snapshot(self, ticket_id):
+        with self._lock:
+            stats = self.tickets.get(ticket_id)
+            return self._ticket_snapshot(ticket_id, stats) if stats is not None else None
+
+
+telemetry = LLMTelemetry(max_tickets=LLM_TELEMETRY_MAX_TICKETS)
+
+
+def llm_telemetry_stats(top=10):
+    return telemetry.snapshot(top)
+
+
+def llm_ticket_telemetry(ticket_id):
+    return telemetry.ticket_snapshot(ticket_id)
@@ -1,25 +1,18 @@
-import os
 import json
-from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, SystemMessage
-from dotenv import load_dotenv
-load_dotenv()
+from backend.app.ai.llm_client import llm_manager, LLMUnavailable
+from backend.app.ai.telemetry import telemetry
+from backend.app.core.tracing import traced
 import re
 import logging
 logger = logging.getLogger(__name__)
 
 
-# Initialize LLM
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",  # fast + good reasoning
-    groq_api_key=os.getenv("GROQ_API_KEY"),
-    temperature=0
-)
+# Deterministic classification (and cacheable on repeats)
+TRIAGE_TEMPERATURE = 0
 
 
-def run_ai_triage(title: str, description: str):
-
-    system_prompt = """
+TRIAGE_SYSTEM_PROMPT = """
 You are an enterprise AI support ticket triage engine.
 
 Analyze the support ticket and return STRICT valid JSON only.
@@ -64,41 +57,118 @@ Return ONLY JSON.
 Do not explain.
 """
 
+_CHOICES = {
+    "category": {"BILLING", "TECHNICAL", "ACCOUNT", "GENERAL"},
+    "priority": {"LOW", "MEDIUM", "HIGH", "URGENT"},
+    "sentiment": {"POSITIVE", "NEUTRAL", "NEGATIVE"},
+    "risk": {"LOW", "MEDIUM", "HIGH"},
+}
+
+
+def extract_json(content: str):
+    """First {...} block of an LLM response as a dict, or None."""
+    # Safe JSON extraction
+    match = re.search(r"\{.*\}", content.strip(), re.DOTALL)
+
+    if not match:
+        return None
+
+    try:
+        return json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+
+
+def validate_entry(entry):
+    """A well-formed triage dict (normalized), or None."""
+    if not isinstance(entry, dict):
+        return None
+
+    result = {}
+    for field, choices in _CHOICES.items():
+        value = entry.get(field)
+        if not isinstance(value, str) or value.strip().upper() not in choices:
+            return None
+        result[field] = value.strip().upper()
+
+    try:
+        result["confidence"] = min(max(float(entry.get("confidence")), 0.0), 1.0)
+    except (TypeError, ValueError):
+        return None
+
+    summary = entry.get("ai_summary")
+    if not isinstance(summary, str):
+        return None
+    result["ai_summary"] = summary
+    return result
+
+
+def usable_response(content: str) -> bool:
+    """Whether a triage response parses to a valid result (worth caching)."""
+    return validate_entry(extract_json(content)) is not None
+
+
+def triage_messages(title: str, description: str):
     user_prompt = f"""
 Title: {title}
 Description: {description}
 """
 
-    response = llm.invoke([
-        SystemMessage(content=system_prompt),
+    return [
+        SystemMessage(content=TRIAGE_SYSTEM_PROMPT),
         HumanMessage(content=user_prompt)
-    ])
+    ]
 
-    content = response.content.strip()
 
-    # Safe JSON extraction
-    match = re.search(r"\{.*\}", content, re.DOTALL)
+def parse_triage(response):
+    parsed = extract_json(response.content)
 
-    if not match:
-        return fallback_response()
+    if parsed is None:
+        telemetry.record_parse_failure("triage")
+        return fallback_response("parse_failure")
 
-    json_text = match.group()
+    logger.info(f"AI TRIAGE RESULT → {parsed}")
+    return parsed
 
+
+@traced("triage")
+def run_ai_triage(title: str, description: str):
     try:
-        parsed = json.loads(json_text)
-        logger.info(f"AI TRIAGE RESULT → {parsed}")
+        response = llm_manager.invoke(
+            "triage", triage_messages(title, description),
+            temperature=TRIAGE_TEMPERATURE, cacheable=usable_response
+        )
+    except LLMUnavailable:
+        # Fallback confidence routes the ticket to an agent
+        logger.warning("AI TRIAGE SKIPPED → LLM unavailable, using fallback")
+        return fallback_response("unavailable")
 
-        return parsed
-    except json.JSONDecodeError:
-        return fallback_response()
+    return parse_triage(response)
+
+
+@traced("triage")
+async def arun_ai_triage(title: str, description: str):
+    try:
+        response = await llm_manager.ainvoke(
+            "triage", triage_messages(title, description),
+            temperature=TRIAGE_TEMPERATURE, cacheable=usable_response
+        )
+    except LLMUnavailable:
+        logger.warning("AI TRIAGE SKIPPED → LLM unavailable, using fallback")
+        return fallback_response("unavailable")
+
+    return parse_triage(response)
 
 
-def fallback_response():
+def fallback_response(reason="error"):
+    """Neutral triage that routes the ticket to an agent; `reason` is counted."""
+    telemetry.record_fallback(reason)
     return {
         "category": "GENERAL",
         "priority": "MEDIUM",
         "sentiment": "NEUTRAL",
         "risk": "LOW",
         "confidence": 0.5,
-        "ai_summary": "AI parsing failed."
+        "ai_summary": "AI parsing failed.",
+        "source": "fallback"
     }
\ No newline at end of file
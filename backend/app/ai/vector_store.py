@@ -1,13 +1,46 @@
 import faiss
 import os
+import json
+import time
+import hashlib
+import threading
+import logging
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
+from backend.app.core.lazy import Lazy
+from backend.app.ai.index_factory import (
+    KB_INDEX_TYPE,
+    build_index,
+    buildable_type,
+    apply_search_params,
+    supports_remove
+)
+
+logger = logging.getLogger(__name__)
+
+# Sources: the FAQ text, and the index (with its texts) it originally shipped with
 KB_PATH = "backend/app/knowledge_base/faqs.txt"
-INDEX_PATH = "backend/app/knowledge_base/faiss.index"
+LEGACY_INDEX_PATH = "backend/app/knowledge_base/faiss.index"
 TEXTS_PATH = "backend/app/knowledge_base/texts.npy"
+# Where earlier versions wrote the manifest, next to the sources
+LEGACY_MANIFEST_PATH = "backend/app/knowledge_base/manifest.json"
+
+# Generated snapshots live outside the source tree, so running the app
+# never dirties the checkout
+KB_DATA_DIR = os.getenv("KB_DATA_DIR", ".cache/knowledge_base")
+INDEX_PATH = os.path.join(KB_DATA_DIR, "faiss.index")
+MANIFEST_PATH = os.path.join(KB_DATA_DIR, "manifest.json")
+
+# How often running workers look for an index rebuilt by another process
+KB_RELOAD_CHECK_SECONDS = float(os.getenv("KB_RELOAD_CHECK_SECONDS", "5"))
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+def _load_model():
+    # Imported here: sentence_transformers pulls in torch, which is slow
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer("all-MiniLM-L6-v2")
+
+# Loaded on first use so importing this module stays cheap
+model = Lazy(_load_model)
 
 def load_kb():
     with open(KB_PATH, "r", encoding="utf-8") as f:
@@ -15,15 +48,287 @@ def load_kb():
     chunks = [chunk.strip() for chunk in content.split("\n\n") if chunk.strip()]
     return chunks
 
-if os.path.exists(INDEX_PATH) and os.path.exists(TEXTS_PATH):
-    index = faiss.read_index(INDEX_PATH)
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class KnowledgeBaseSnapshot:
+    """Immutable pairing of an ID-mapped FAISS index with its chunk texts."""
+
+    def __init__(self, index, chunks, next_id, version, index_type):
+        self.index = index
+        # chunk hash -> {"id": ..., "text": ...}
+        self.chunks = chunks
+        self.texts = {chunk["id"]: chunk["text"] for chunk in chunks.values()}
+        self.next_id = next_id
+        self.version = version
+        # Type actually built (build_index falls back on too little data)
+        self.index_type = index_type
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _save(snapshot):
+    os.makedirs(KB_DATA_DIR, exist_ok=True)
+    _write_atomic(INDEX_PATH, lambda path: faiss.write_index(snapshot.index, path))
+
+    manifest = {
+        "version": snapshot.version,
+        "next_id": snapshot.next_id,
+        "index_type": snapshot.index_type,
+        "chunks": [
+            {"id": chunk["id"], "hash": key, "text": chunk["text"]}
+            for key, chunk in snapshot.chunks.items()
+        ],
+    }
+
+    def write_manifest(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # Manifest last: it is what other workers watch for changes
+    _write_atomic(MANIFEST_PATH, write_manifest)
+
+
+def _read_manifest(path=MANIFEST_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_from_disk(index_path=INDEX_PATH, manifest_path=MANIFEST_PATH):
+    manifest = _read_manifest(manifest_path)
+    index = apply_search_params(faiss.read_index(index_path))
+    chunks = {
+        chunk["hash"]: {"id": chunk["id"], "text": chunk["text"]}
+        for chunk in manifest["chunks"]
+    }
+    # Caught mid-write by another process; the next check retries
+    if index.ntotal != len(chunks):
+        raise RuntimeError("KB index and manifest are out of sync")
+    return KnowledgeBaseSnapshot(
+        index,
+        chunks,
+        manifest["next_id"],
+        manifest["version"],
+        manifest.get("index_type", "flat")
+    )
+
+
+def _migrate_legacy():
+    """Wrap an index written before the manifest existed, without re-embedding."""
+    legacy = faiss.read_index(LEGACY_INDEX_PATH)
     texts = np.load(TEXTS_PATH, allow_pickle=True).tolist()
-else:
-    texts = load_kb()
-    embeddings = model.encode(texts)
 
-    index = faiss.IndexFlatL2(len(embeddings[0]))
-    index.add(np.array(embeddings))
+    index = faiss.IndexIDMap2(faiss.IndexFlatL2(legacy.d))
+    ids = np.arange(legacy.ntotal, dtype="int64")
+    index.add_with_ids(legacy.reconstruct_n(0, legacy.ntotal), ids)
+
+    chunks = {chunk_hash(text): {"id": i, "text": text} for i, text in enumerate(texts)}
+    return KnowledgeBaseSnapshot(index, chunks, legacy.ntotal, 0, "flat")
+
+
+def _embed(texts):
+    return np.asarray(model.get().encode(texts), dtype="float32")
+
+
+def _next_version(previous):
+    """
+    Wall-clock based, so two processes reindexing from the same base never
+    publish the same version (hot reload only swaps on a new version).
+    """
+    return max(previous + 1, time.time_ns() // 1000)
+
+
+def _empty_index(dimension=None):
+    dimension = dimension or model.get().get_sentence_embedding_dimension()
+    return faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+
+
+def _build_full(wanted, next_id, version):
+    keys = list(wanted)
+    if not keys:
+        # Empty faqs.txt: nothing to embed or train, searches find nothing
+        logger.warning("KB INDEX → knowledge base is empty")
+        return KnowledgeBaseSnapshot(_empty_index(), {}, next_id, _next_version(version), "flat")
+    embeddings = _embed([wanted[key] for key in keys])
+    ids = np.arange(next_id, next_id + len(keys), dtype="int64")
+
+    index, built_as = build_index(embeddings, ids)
+    logger.info(f"KB INDEX → built {built_as} index over {len(keys)} chunks")
+
+    chunks = {key: {"id": chunk_id, "text": wanted[key]} for key, chunk_id in zip(keys, ids.tolist())}
+    return KnowledgeBaseSnapshot(index, chunks, next_id + len(keys), _next_version(version), built_as)
+
+
+def _build_incremental(current, full=False):
+    """
+    New snapshot for the chunks now in faqs.txt. Only added or changed chunks
+    are embedded; chunks no longer present are removed by ID. The live index
+    is never mutated, so in-flight searches keep using `current`.
+
+    A full rebuild (which also retrains IVF/PQ) happens on request, on first
+    build, or when the stored index is not the type KB_INDEX_TYPE now yields
+    for this many chunks (config change, or a fallback index that has grown
+    enough to upgrade).
+    """
+    wanted = {chunk_hash(text): text for text in load_kb()}
+
+    if current is None or full or current.index_type != buildable_type(
+        KB_INDEX_TYPE, len(wanted), current.index.d
+    ):
+        next_id = current.next_id if current else 0
+        version = current.version if current else 0
+        snapshot = _build_full(wanted, next_id, version)
+        removed = len(current.chunks) if current else 0
+        return snapshot, len(wanted), removed
+
+    chunks = dict(current.chunks)
+    next_id = current.next_id
+    index_type = current.index_type
+
+    removed = [key for key in chunks if key not in wanted]
+    added = [key for key in wanted if key not in chunks]
+
+    if not removed and not added:
+        return current, 0, 0
+
+    if removed and not supports_remove(current.index):
+        # Rebuild from stored vectors of the surviving chunks (no re-embedding)
+        for key in removed:
+            del chunks[key]
+        kept_ids = np.array([chunk["id"] for chunk in chunks.values()], dtype="int64")
+        kept = np.vstack([current.index.reconstruct(int(i)) for i in kept_ids]) if len(kept_ids) else None
+        index, index_type = build_index(kept, kept_ids) if kept is not None else (None, "flat")
+    else:
+        index = faiss.clone_index(current.index)
+        apply_search_params(index)
+        if removed:
+            index.remove_ids(np.array([chunks[key]["id"] for key in removed], dtype="int64"))
+            for key in removed:
+                del chunks[key]
+
+    if added:
+        embeddings = _embed([wanted[key] for key in added])
+        ids = np.arange(next_id, next_id + len(added), dtype="int64")
+
+        if index is None:
+            index, index_type = build_index(embeddings, ids)
+        else:
+            index.add_with_ids(embeddings, ids)
+
+        for key, chunk_id in zip(added, ids.tolist()):
+            chunks[key] = {"id": chunk_id, "text": wanted[key]}
+        next_id += len(added)
+
+    if index is None:
+        index, index_type = _empty_index(current.index.d), "flat"
+
+    snapshot = KnowledgeBaseSnapshot(index, chunks, next_id, _next_version(current.version), index_type)
+    return snapshot, len(added), len(removed)
+
+
+class KnowledgeBaseStore:
+    """
+    Holds the current snapshot. Readers take a reference and search it;
+    reindexing builds a new snapshot and swaps the reference atomically.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._load_lock = threading.Lock()
+        self._reindex_lock = threading.Lock()
+        self._manifest_mtime = None
+        self._next_reload_check = 0.0
+
+    @property
+    def loaded(self):
+        return self._snapshot is not None
+
+    def _load(self):
+        if os.path.exists(MANIFEST_PATH) and os.path.exists(INDEX_PATH):
+            snapshot = _load_from_disk()
+        elif os.path.exists(LEGACY_MANIFEST_PATH) and os.path.exists(LEGACY_INDEX_PATH):
+            # Snapshot an earlier version wrote into the source tree; saved
+            # to KB_DATA_DIR below
+            snapshot = _load_from_disk(LEGACY_INDEX_PATH, LEGACY_MANIFEST_PATH)
+        elif os.path.exists(LEGACY_INDEX_PATH) and os.path.exists(TEXTS_PATH):
+            snapshot = _migrate_legacy()
+        else:
+            snapshot = None
+
+        # Pick up edits to faqs.txt made while the app was down
+        new_snapshot, added, removed = _build_incremental(snapshot)
+        if new_snapshot is not snapshot or not os.path.exists(MANIFEST_PATH):
+            _save(new_snapshot)
+            logger.info(f"KB INDEX → +{added} / -{removed} chunks on load")
+
+        self._swap(new_snapshot)
+
+    def _swap(self, snapshot):
+        self._snapshot = snapshot
+        if os.path.exists(MANIFEST_PATH):
+            self._manifest_mtime = os.path.getmtime(MANIFEST_PATH)
+        self._next_reload_check = time.monotonic() + KB_RELOAD_CHECK_SECONDS
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        # Only one thread checks; the rest keep searching the current snapshot
+        if not self._load_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_reload_check = now + KB_RELOAD_CHECK_SECONDS
+            if not os.path.exists(MANIFEST_PATH):
+                return
+            if os.path.getmtime(MANIFEST_PATH) == self._manifest_mtime:
+                return
+
+            snapshot = _load_from_disk()
+            if snapshot.version != self._snapshot.version:
+                logger.info(f"KB INDEX → hot reloaded version {snapshot.version}")
+                self._swap(snapshot)
+            else:
+                self._manifest_mtime = os.path.getmtime(MANIFEST_PATH)
+        except Exception:
+            logger.exception("KB INDEX RELOAD FAILED")
+        finally:
+            self._load_lock.release()
+
+    def get(self):
+        if self._snapshot is None:
+            with self._load_lock:
+                if self._snapshot is None:
+                    self._load()
+        else:
+            self._maybe_reload()
+        return self._snapshot
+
+    def reindex(self, full=False):
+        """Re-embed only changed chunks of faqs.txt and swap the live index."""
+        with self._reindex_lock:
+            current = self.get()
+            start = time.perf_counter()
+            snapshot, added, removed = _build_incremental(current, full=full)
+
+            if snapshot is not current:
+                _save(snapshot)
+                self._swap(snapshot)
+
+        result = {
+            "version": snapshot.version,
+            "added": added,
+            "removed": removed,
+            "total": snapshot.index.ntotal,
+            "index_type": snapshot.index_type,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        logger.info(f"KB REINDEX → {result}")
+        return result
+
 
-    faiss.write_index(index, INDEX_PATH)
-    np.save(TEXTS_PATH, np.array(texts))
+knowledge_base = KnowledgeBaseStore()
@@ -0,0 +1,65 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.users.models import User
+from backend.app.users.schemas import UserCreate, TokenResponse
+from backend.app.core.security import hash_password, verify_password, create_access_token
+from backend.app.core.deps import get_async_db
+from backend.app.auth.dependencies import get_current_user_async, require_role_async
+
+# Same endpoints as auth/routes.py; bcrypt runs in a worker thread
+router = APIRouter(prefix="/auth", tags=["Auth"])
+
+@router.post("/register")
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_user = await db.scalar(select(User).where(User.email == user.email))
+    if existing_user:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    new_user = User(
+        email=user.email,
+        password_hash=await asyncio.to_thread(hash_password, user.password),
+        role="USER"
+    )
+    db.add(new_user)
+    await db.commit()
+
+    return {"message": "User registered successfully"}
+
+@router.post("/login", response_model=TokenResponse)
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_user = await db.scalar(select(User).where(User.email == form_data.username))
+
+    if not db_user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    if not await asyncio.to_thread(verify_password, form_data.password, db_user.password_hash):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    token = create_access_token(
+        data={"user_id": db_user.id, "role": db_user.role}
+    )
+
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "role": db_user.role
+    }
+
+@router.get("/me")
+async def get_profile(user=Depends(get_current_user_async)):
+    return {
+        "email": user.email,
+        "role": user.role
+    }
+
+@router.get("/agent-only")
+async def agent_only(user=Depends(require_role_async("AGENT"))):
+    return {"message": "Agent access granted"}
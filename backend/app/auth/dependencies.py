@@ -1,32 +1,52 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.app.core.deps import get_db, get_async_db
 from backend.app.core.database import SessionLocal
 from backend.app.users.models import User
+from backend.app.auth.user_cache import user_cache, USER_CACHE_ENABLED
 from backend.app.core.security import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    db: Session = SessionLocal()
+def _user_id_from_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("user_id")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
 
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
+    user_id = payload.get("user_id")
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return user_id
 
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    # Shares the request's session; most requests are served from the cache
+    user_id = _user_id_from_token(token)
 
-        return user
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    finally:
-        db.close()
+    if USER_CACHE_ENABLED:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return user_cache.set(user) if USER_CACHE_ENABLED else user
+
+def load_current_user(token: str):
+    """
+    get_current_user with its own short-lived session, for streaming
+    endpoints that should not hold a pooled connection for their lifetime.
+    Blocking: call through run_in_threadpool.
+    """
+    with SessionLocal() as db:
+        return get_current_user(token, db)
 
 def require_role(required_role: str):
     def role_checker(user: User = Depends(get_current_user)):
@@ -37,3 +57,33 @@ def require_role(required_role: str):
             )
         return user
     return role_checker
+
+
+# ---- Async counterparts (API_MODE=async) ----
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = _user_id_from_token(token)
+
+    if USER_CACHE_ENABLED:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return user_cache.set(user) if USER_CACHE_ENABLED else user
+
+def require_role_async(required_role: str):
+    async def role_checker(user: User = Depends(get_current_user_async)):
+        if user.role != required_role:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized"
+            )
+        return user
+    return role_checker
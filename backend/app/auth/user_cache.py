@@ -0,0 +1,115 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.app.users.models import User
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+# Bounds how long another worker process can serve a changed role
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+
+class CachedUser:
+    """
+    Read-only snapshot of the fields routes use from the current user. Safe
+    to share between requests and threads, unlike a session-bound User.
+    """
+
+    __slots__ = ("id", "email", "role")
+
+    def __init__(self, id, email, role):
+        self.id = id
+        self.email = email
+        self.role = role
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.email, user.role)
+
+
+class UserCache:
+    """LRU of CachedUser by user_id with a TTL, invalidated on User writes."""
+
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return entry[0]
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, user):
+        cached = CachedUser.from_user(user)
+        with self._lock:
+            self._entries[cached.id] = (cached, time.monotonic())
+            self._entries.move_to_end(cached.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+user_cache = UserCache(
+    ttl_seconds=USER_CACHE_TTL_SECONDS,
+    max_entries=USER_CACHE_MAX_ENTRIES,
+)
+
+
+# ORM-level writes only; bulk query.update() bypasses these and relies on the TTL.
+# Invalidated once the transaction commits: dropping the entry at flush time
+# lets a concurrent request re-cache the old row before the change is visible.
+@event.listens_for(Session, "after_flush")
+def _collect_user_writes(session, flush_context):
+    changed = [
+        obj.id for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User)
+    ]
+    if changed:
+        session.info.setdefault("changed_user_ids", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_writes(session):
+    session.info.pop("changed_user_ids", None)
+
+
+def user_cache_stats():
+    return user_cache.snapshot()
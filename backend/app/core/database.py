@@ -1,14 +1,278 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Enum, create_engine, exc, inspect, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 import os
+import time
+import threading
+import logging
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from backend.app.core.lazy import Lazy
+from backend.app.core.metrics import instrument_engine
+
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# Per worker process: total connections = workers x (size + overflow)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_SLOW_WAIT_MS = float(os.getenv("DB_POOL_SLOW_WAIT_MS", "100"))
+
+# Upper bounds (ms) of the checkout wait histogram
+WAIT_BUCKETS_MS = (1, 10, 100, 1000)
+
+
+class PoolStats:
+    """Checkout waits, overflow connections and timeouts of one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.slow_waits = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.wait_histogram = {f"<{b}ms": 0 for b in WAIT_BUCKETS_MS}
+        self.wait_histogram[f">={WAIT_BUCKETS_MS[-1]}ms"] = 0
+        self.pool = None
+
+    def record(self, wait_ms, overflowed):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.overflow_events += overflowed
+            bucket = next((f"<{b}ms" for b in WAIT_BUCKETS_MS if wait_ms < b), f">={WAIT_BUCKETS_MS[-1]}ms")
+            self.wait_histogram[bucket] += 1
+            if wait_ms >= DB_POOL_SLOW_WAIT_MS:
+                self.slow_waits += 1
+
+        if wait_ms >= DB_POOL_SLOW_WAIT_MS:
+            logger.warning(f"DB POOL SLOW CHECKOUT → waited {wait_ms:.0f} ms")
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+        logger.warning("DB POOL EXHAUSTED → checkout timed out")
+
+    def snapshot(self):
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "slow_waits": self.slow_waits,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "wait_histogram": dict(self.wait_histogram),
+            }
+        if self.pool is not None:
+            stats.update(
+                size=self.pool.size(),
+                checked_out=self.pool.checkedout(),
+                idle=self.pool.checkedin(),
+                overflow=max(self.pool.overflow(), 0),
+            )
+        return stats
+
+
+pool_stats = {"sync": PoolStats(), "async": PoolStats()}
+
+
+class _InstrumentedPool:
+    """
+    Times every checkout through the public Pool.connect(): the wait for a
+    free connection, plus opening or pre-pinging it.
+    """
+
+    stats_name = None
+
+    def connect(self):
+        stats = pool_stats[self.stats_name]
+        stats.pool = self
+        overflow_before = self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            stats.record_timeout()
+            raise
+        overflow = self.overflow()
+        stats.record(
+            (time.perf_counter() - started) * 1000,
+            overflow > overflow_before and overflow > 0
+        )
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    stats_name = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    stats_name = "async"
+
+
+def pool_options(url, poolclass):
+    # SQLite (local dev) keeps SQLAlchemy's default pooling
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL, InstrumentedQueuePool))
+instrument_engine(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+
+# Any constant shared by all workers of the app
+SCHEMA_LOCK_KEY = 0x53495131
+
+
+@contextmanager
+def schema_lock():
+    """
+    Every worker process runs the startup schema changes. On PostgreSQL they
+    take turns under an advisory lock, so the workers after the first find
+    nothing left to do instead of racing on the same DDL.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+
+
+def add_missing_columns():
+    """
+    create_all never alters existing tables: add columns declared since (they
+    must be nullable or have a server default). Returns "table.column" names.
+    """
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                    added.append(f"{table.name}.{column.name}")
+                    logger.info(f"SCHEMA → added column {table.name}.{column.name}")
+    return added
+
+
+def add_missing_enum_values():
+    """
+    PostgreSQL native ENUM types are created once with the values known at
+    the time: add the members declared since (e.g. TicketStatus.TRIAGING).
+    Returns "type.value" names.
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+
+    enum_types = {}
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, Enum) and column.type.native_enum and column.type.name:
+                enum_types[column.type.name] = column.type.enums
+
+    added = []
+    # ADD VALUE cannot be used in the transaction that adds it: autocommit
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name, values in enum_types.items():
+            existing = set(conn.scalars(
+                text(
+                    "SELECT e.enumlabel FROM pg_enum e "
+                    "JOIN pg_type t ON t.oid = e.enumtypid WHERE t.typname = :name"
+                ),
+                {"name": name}
+            ))
+            if not existing:
+                # Type not created yet (create_all will) or not ours
+                continue
+            for value in values:
+                if value not in existing:
+                    conn.execute(text(f"ALTER TYPE {name} ADD VALUE IF NOT EXISTS '{value}'"))
+                    added.append(f"{name}.{value}")
+                    logger.info(f"SCHEMA → added enum value {name}.{value}")
+    return added
+
+
+def create_missing_indexes():
+    """create_all skips existing tables; add indexes declared on them since."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+# ---- Async engine (API_MODE=async) ----
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+
+
+def _create_async_engine():
+    # Imported lazily so sync deployments don't need an async driver installed
+    from sqlalchemy.ext.asyncio import create_async_engine
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool)
+    )
+    # Statements run on the wrapped sync engine, so its events see them
+    instrument_engine(async_engine.sync_engine, "async")
+    return async_engine
+
+
+def _create_async_sessionmaker():
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    return async_sessionmaker(
+        bind=async_engine.get(),
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+async_engine = Lazy(_create_async_engine)
+AsyncSessionLocal = Lazy(_create_async_sessionmaker)
+
+
+def db_pool_stats():
+    if DATABASE_URL.startswith("sqlite"):
+        return {"instrumented": False, "reason": "SQLite uses the default pool"}
+    return {"instrumented": True, **{name: stats.snapshot() for name, stats in pool_stats.items()}}
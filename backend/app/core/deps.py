@@ -1,4 +1,4 @@
-from backend.app.core.database import SessionLocal
+from backend.app.core.database import SessionLocal, AsyncSessionLocal
 from sqlalchemy.orm import Session
 
 def get_db():
@@ -7,3 +7,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal.get()() as db:
+        yield db
@@ -0,0 +1,214 @@
+import os
+import json
+import queue
+import asyncio
+import threading
+import logging
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# memory: one process | postgres: LISTEN/NOTIFY fan-out across API workers
+EVENT_BROKER = os.getenv("EVENT_BROKER", "memory").lower()
+EVENT_SUBSCRIBER_BUFFER = int(os.getenv("EVENT_SUBSCRIBER_BUFFER", "100"))
+
+PG_CHANNEL = "supportiq_events"
+
+
+class Subscription:
+    """
+    One SSE client. Events may be published from any thread; they are
+    handed to the subscriber's event loop and buffered in an asyncio.Queue.
+    A slow client loses its oldest events rather than blocking publishers.
+    """
+
+    def __init__(self, broker, channels, loop):
+        self.broker = broker
+        self.channels = channels
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=EVENT_SUBSCRIBER_BUFFER)
+        self.dropped = 0
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Loop already closed; the subscriber is going away
+            pass
+
+    async def get(self, timeout=None):
+        """Next event, or None after `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Channel -> subscriptions, for a single API process."""
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self.stats = {"published": 0, "delivered": 0}
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels, asyncio.get_running_loop())
+        with self._lock:
+            for channel in channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def dispatch(self, channels, event):
+        with self._lock:
+            targets = set()
+            for channel in channels:
+                targets |= self._subscriptions.get(channel, set())
+            self.stats["delivered"] += len(targets)
+
+        for subscription in targets:
+            subscription.deliver(event)
+
+    def publish(self, channels, event):
+        self.stats["published"] += 1
+        self.dispatch(channels, event)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "broker": "memory",
+                "channels": len(self._subscriptions),
+                "subscriptions": len({s for subs in self._subscriptions.values() for s in subs}),
+                **self.stats,
+            }
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Publishes through NOTIFY so every API worker (including this one) gets
+    the event from its LISTEN connection and dispatches it to local
+    subscribers. Both connections live on background threads, so publishing
+    from the event loop never blocks on the database.
+    """
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+        self._outbox = queue.Queue()
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._start_lock:
+            if not self._started:
+                threading.Thread(target=self._listen, name="events-listen", daemon=True).start()
+                threading.Thread(target=self._notify, name="events-notify", daemon=True).start()
+                self._started = True
+
+    def subscribe(self, channels):
+        self._ensure_started()
+        return super().subscribe(channels)
+
+    def publish(self, channels, event):
+        self._ensure_started()
+        self.stats["published"] += 1
+        self._outbox.put(json.dumps({"channels": list(channels), "event": event}))
+
+    def _connect(self):
+        # Pooled, but AUTOCOMMIT through SQLAlchemy: the isolation level is
+        # reset when the connection is checked back in, so ORM sessions that
+        # get it later still run in a transaction
+        return self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+    def _notify(self):
+        from sqlalchemy import text
+
+        while True:
+            payload = self._outbox.get()
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        text("SELECT pg_notify(:channel, :payload)"),
+                        {"channel": PG_CHANNEL, "payload": payload}
+                    )
+            except Exception:
+                logger.exception("EVENT NOTIFY FAILED")
+
+    def _listen(self):
+        import select
+        import time
+
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                conn.exec_driver_sql(f"LISTEN {PG_CHANNEL}")
+                pg = conn.connection.driver_connection
+                logger.info("EVENT BROKER → listening for cross-worker events")
+
+                while True:
+                    if select.select([pg], [], [], 30) == ([], [], []):
+                        continue
+                    pg.poll()
+                    while pg.notifies:
+                        message = json.loads(pg.notifies.pop(0).payload)
+                        self.dispatch(message["channels"], message["event"])
+            except Exception:
+                logger.exception("EVENT LISTENER FAILED → reconnecting")
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    try:
+                        # Stop listening before the connection goes back to the pool
+                        conn.exec_driver_sql("UNLISTEN *")
+                    except Exception:
+                        conn.invalidate()
+                    conn.close()
+
+    def snapshot(self):
+        return {**super().snapshot(), "broker": "postgres"}
+
+
+def _create_broker():
+    if EVENT_BROKER == "postgres":
+        from backend.app.core.database import engine
+        return PostgresBroker(engine)
+    return InProcessBroker()
+
+
+broker = _create_broker()
+
+
+def publish(channels, event: dict):
+    broker.publish(channels, event)
+
+
+def subscribe(channels):
+    """Subscription on the running event loop; call .close() when done."""
+    return broker.subscribe(channels)
+
+
+def event_stats():
+    return broker.snapshot()
@@ -0,0 +1,23 @@
+import threading
+
+
+class Lazy:
+    """Thread-safe value built by `factory` on first `get()`."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._value = self._factory()
+                    self._loaded = True
+        return self._value
@@ -0,0 +1,140 @@
+"""
+Prometheus metrics, served at /metrics.
+
+With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory before starting: each worker then writes its samples
+there and /metrics (whichever worker answers) aggregates all of them.
+Clear the directory on every deploy.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+SEARCH_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to the response (first byte for streaming responses)",
+    ["method", "route"],
+    buckets=HTTP_BUCKETS
+)
+# livesum: workers that exited drop out of the total
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests being handled", ["method"],
+    multiprocess_mode="livesum"
+)
+
+DB_QUERIES = Counter(
+    "db_queries_total", "SQL statements executed", ["engine", "operation"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ["engine", "operation"],
+    buckets=DB_BUCKETS
+)
+DB_QUERY_ERRORS = Counter(
+    "db_query_errors_total", "SQL statements that raised", ["engine", "operation"]
+)
+
+FAISS_SEARCH_SECONDS = Histogram(
+    "faiss_search_duration_seconds", "FAISS index.search time (one batch of queries)", ["index"],
+    buckets=SEARCH_BUCKETS
+)
+RAG_RETRIEVE_SECONDS = Histogram(
+    "rag_retrieve_duration_seconds",
+    "retrieve_context end to end: batching wait, embedding, search",
+    buckets=HTTP_BUCKETS
+)
+
+TICKET_DECISIONS = Counter(
+    "ticket_decisions_total", "Decision engine outcomes", ["outcome", "source", "path"]
+)
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in _OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine, name):
+    """Count and time every statement `engine` runs (a sync Engine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_started"].pop()
+        operation = _operation(statement)
+        DB_QUERIES.labels(name, operation).inc()
+        DB_QUERY_SECONDS.labels(name, operation).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_started"):
+            conn.info["metrics_query_started"].pop()
+        DB_QUERY_ERRORS.labels(name, _operation(exception_context.statement or "")).inc()
+
+
+def record_decision(status, source, path):
+    """`status`: the final TicketStatus after triage (and any auto-reply)."""
+    TICKET_DECISIONS.labels(getattr(status, "value", status), source or "llm", path).inc()
+
+
+async def metrics_middleware(request, call_next):
+    if request.url.path == "/metrics":
+        return await call_next(request)
+
+    method = request.method
+    in_flight = HTTP_IN_FLIGHT.labels(method)
+    in_flight.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        in_flight.dec()
+        # Route template, so /tickets/{ticket_id} is one series
+        route = request.scope.get("route")
+        route = getattr(route, "path", "unmatched")
+        HTTP_REQUESTS.labels(method, route, str(status)).inc()
+        HTTP_REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - started)
+
+
+def render():
+    """(body, content type) for a scrape; all workers' samples in multiprocess mode."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_exited():
+    """Drop this worker's live gauges from the multiprocess totals."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,35 @@
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# A mutable holder, so statements run in threadpool copies of the request
+# context still count towards the request
+_counter: ContextVar = ContextVar("db_query_counter", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def start_counting():
+    counter = [0]
+    _counter.set(counter)
+    return counter
+
+
+def query_count():
+    """Statements executed so far in the current request (0 outside one)."""
+    counter = _counter.get()
+    return counter[0] if counter is not None else 0
+
+
+async def query_count_middleware(request, call_next):
+    """Adds X-DB-Queries: statements the request sent to the database."""
+    counter = start_counting()
+    response = await call_next(request)
+    response.headers["X-DB-Queries"] = str(counter[0])
+    return response
@@ -0,0 +1,68 @@
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Off by default (fast startup): models, index and LLM clients load on first use
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true"
+# Attempts before giving up; what failed then loads on first use instead
+WARMUP_ATTEMPTS = int(os.getenv("WARMUP_ATTEMPTS", "3"))
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+readiness = {
+    "schema": False,
+    "workers": False,
+    "warmed_up": False,
+    "warm_up_error": None,
+}
+timings = {}
+
+
+def warm_up():
+    """Load everything the first ticket would otherwise pay for."""
+    from backend.app.ai import triage, reply_generator, reply_reuse
+    from backend.app.ai.llm_client import llm_manager
+    from backend.app.ai.vector_store import model, knowledge_base
+    from backend.app.ai.rag import retrieve_context
+
+    start = time.perf_counter()
+
+    model.get()
+    knowledge_base.get()
+    retrieve_context("warm up")
+    llm_manager.client(triage.TRIAGE_TEMPERATURE)
+    llm_manager.client(reply_generator.REPLY_TEMPERATURE)
+    reply_reuse.warm_up()
+
+    timings["warm_up_seconds"] = round(time.perf_counter() - start, 3)
+    readiness["warmed_up"] = True
+    logger.info(f"WARM UP → done in {timings['warm_up_seconds']}s")
+
+
+def start_warm_up():
+    def run():
+        for attempt in range(1, WARMUP_ATTEMPTS + 1):
+            try:
+                warm_up()
+                return
+            except Exception as exc:
+                error = repr(exc)
+                logger.exception(f"WARM UP FAILED → attempt {attempt}/{WARMUP_ATTEMPTS}")
+                if attempt < WARMUP_ATTEMPTS:
+                    time.sleep(WARMUP_RETRY_SECONDS * attempt)
+
+        # Go ready anyway, with the reason in /ready: a cold start beats a
+        # pod that never takes traffic
+        readiness["warm_up_error"] = error
+        logger.warning("WARM UP → giving up, components load on first use")
+
+    threading.Thread(target=run, name="warm-up", daemon=True).start()
+
+
+def is_ready():
+    if not (readiness["schema"] and readiness["workers"]):
+        return False
+    warm_up_done = readiness["warmed_up"] or readiness["warm_up_error"] is not None
+    return warm_up_done or not WARMUP_ON_STARTUP
@@ -0,0 +1,316 @@
+"""
+Stage-level tracing. A trace is one HTTP request (tracing_middleware) or
+one pipeline job (process_ticket); spans inside it time the stages:
+triage, retrieval, the auto-reply and draft calls, summary folds and DB
+commits. Requests answer with a Server-Timing header (per-stage totals);
+sampled and slow traces are kept in memory for /ops/traces and appended
+as JSON lines to TRACE_LOG_PATH.
+
+With TRACING_ENABLED=false, @traced returns the function unchanged and no
+trace is ever opened, so span() is one context-variable lookup.
+"""
+import os
+import json
+import time
+import random
+import inspect
+import logging
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+# Share of traces kept (memory + log); every request still gets Server-Timing
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+# Traces at least this slow are kept whether sampled or not (0 = off)
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "1000"))
+# JSON lines file for kept traces; unset keeps them in memory only
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH")
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "500"))
+# Later spans of a bigger trace (bulk imports) are not recorded
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "1000"))
+
+_trace = contextvars.ContextVar("trace", default=None)
+_parent = contextvars.ContextVar("trace_parent_span", default=None)
+
+_NOOP = nullcontext()
+
+
+class Trace:
+    """
+    Spans are [name, parent span, start ms, duration ms, error] lists,
+    appended when they start. list.append is atomic, so threadpool copies
+    of the request context add to the same trace.
+    """
+
+    __slots__ = ("name", "trace_id", "started", "wall_started", "attributes", "spans")
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.trace_id = os.urandom(8).hex()
+        self.started = time.perf_counter()
+        self.wall_started = time.time()
+        self.attributes = attributes
+        self.spans = []
+
+    def elapsed_ms(self, now=None):
+        return ((now or time.perf_counter()) - self.started) * 1000
+
+    def add_span(self, name, started, ended, error=None):
+        """A span timed elsewhere (perf_counter values), under the current span."""
+        self.spans.append([
+            name, _parent.get(), self.elapsed_ms(started), (ended - started) * 1000, error
+        ])
+
+    def stage_totals(self):
+        """{name: (total ms, count)} of finished spans, in order of first start."""
+        totals = {}
+        for name, _, _, duration, _ in list(self.spans):
+            if duration is not None:
+                total, count = totals.get(name, (0.0, 0))
+                totals[name] = (total + duration, count + 1)
+        return totals
+
+    def server_timing(self, duration_ms):
+        entries = [
+            f'{name};dur={total:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+            for name, (total, count) in self.stage_totals().items()
+        ]
+        entries.append(f"total;dur={duration_ms:.1f}")
+        return ", ".join(entries)
+
+    def record(self, duration_ms, kept):
+        spans = list(self.spans)
+        index = {id(span): i for i, span in enumerate(spans)}
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start": round(self.wall_started, 6),
+            "duration_ms": round(duration_ms, 2),
+            "kept": kept,
+            "truncated": len(spans) >= TRACE_MAX_SPANS,
+            "attributes": self.attributes,
+            "spans": [
+                {
+                    "id": i,
+                    "name": name,
+                    "parent": index.get(id(parent)),
+                    "start_ms": round(start, 2),
+                    "duration_ms": round(duration, 2) if duration is not None else None,
+                    **({"error": error} if error else {}),
+                }
+                for i, (name, parent, start, duration, error) in enumerate(spans)
+            ],
+        }
+
+
+class _Span:
+    __slots__ = ("trace", "span", "started", "token")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.started = time.perf_counter()
+        self.span = [name, _parent.get(), trace.elapsed_ms(self.started), None, None]
+
+    def __enter__(self):
+        self.trace.spans.append(self.span)
+        self.token = _parent.set(self.span)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span[3] = (time.perf_counter() - self.started) * 1000
+        if exc_type is not None:
+            self.span[4] = exc_type.__name__
+        _parent.reset(self.token)
+        return False
+
+
+def span(name):
+    """Times the block as a stage of the current trace; no-op outside one."""
+    trace = _trace.get()
+    if trace is None or len(trace.spans) >= TRACE_MAX_SPANS:
+        return _NOOP
+    return _Span(trace, name)
+
+
+def traced(name):
+    """Decorator: every call of the (sync or async) function is a span."""
+
+    def decorate(func):
+        if not TRACING_ENABLED:
+            return func
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _trace.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Outside a trace: skip the context manager altogether
+            if _trace.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def annotate(**attributes):
+    """Attach attributes (ticket id, outcome, ...) to the current trace."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+# ---- Kept traces ----
+
+class TraceLog:
+    def __init__(self, path, buffer_size):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self.recent = deque(maxlen=buffer_size)
+        self.counts = {"traces": 0, "kept_sampled": 0, "kept_slow": 0, "write_errors": 0}
+
+    def finish(self, trace, duration_ms):
+        slow = TRACE_SLOW_MS > 0 and duration_ms >= TRACE_SLOW_MS
+        sampled = random.random() < TRACE_SAMPLE_RATE
+        with self._lock:
+            self.counts["traces"] += 1
+        if not (sampled or slow):
+            return
+
+        record = trace.record(duration_ms, "slow" if slow else "sampled")
+        line = json.dumps(record, default=str) if self.path else None
+        with self._lock:
+            self.counts["kept_slow" if slow else "kept_sampled"] += 1
+            self.recent.append(record)
+            if line is not None:
+                self._write(line)
+
+    def _write(self, line):
+        # Caller holds the lock
+        try:
+            if self._file is None:
+                self._file = open(self.path, "a", buffering=1, encoding="utf-8")
+            self._file.write(line + "\n")
+        except OSError:
+            self.counts["write_errors"] += 1
+            if self.counts["write_errors"] == 1:
+                logger.exception(f"TRACE LOG → cannot write to {self.path}")
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+            kept = len(self.recent)
+        return {
+            "enabled": TRACING_ENABLED,
+            "sample_rate": TRACE_SAMPLE_RATE,
+            "slow_ms": TRACE_SLOW_MS,
+            "log_path": self.path,
+            "buffered": kept,
+            **counts,
+        }
+
+    def traces(self, limit=50, ticket_id=None):
+        """Newest kept traces first; `ticket_id` links a request to its pipeline job."""
+        with self._lock:
+            records = list(self.recent)
+        records.reverse()
+        if ticket_id is not None:
+            records = [r for r in records if r["attributes"].get("ticket_id") == ticket_id]
+        return records[:limit]
+
+
+trace_log = TraceLog(TRACE_LOG_PATH, TRACE_BUFFER_SIZE)
+
+
+@contextmanager
+def start_trace(name, **attributes):
+    """A trace outside any request (pipeline jobs); yields None when disabled."""
+    if not TRACING_ENABLED:
+        yield None
+        return
+
+    trace = Trace(name, **attributes)
+    token = _trace.set(trace)
+    try:
+        yield trace
+    except BaseException as exc:
+        trace.attributes["error"] = type(exc).__name__
+        raise
+    finally:
+        _trace.reset(token)
+        trace_log.finish(trace, trace.elapsed_ms())
+
+
+async def tracing_middleware(request, call_next):
+    """Opens the request's trace; adds Server-Timing (stages done by the first byte)."""
+    if not TRACING_ENABLED or request.url.path == "/metrics":
+        return await call_next(request)
+
+    trace = Trace(f"{request.method} {request.url.path}")
+    token = _trace.set(trace)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        _trace.reset(token)
+        duration_ms = trace.elapsed_ms()
+        route = request.scope.get("route")
+        if route is not None:
+            trace.name = f"{request.method} {route.path}"
+        ticket_id = request.path_params.get("ticket_id")
+        if ticket_id is not None and "ticket_id" not in trace.attributes:
+            trace.attributes["ticket_id"] = int(ticket_id) if str(ticket_id).isdigit() else ticket_id
+        trace.attributes["status"] = status
+        trace_log.finish(trace, duration_ms)
+
+    response.headers["Server-Timing"] = trace.server_timing(duration_ms)
+    return response
+
+
+# ---- DB commits ----
+
+@event.listens_for(Session, "before_commit")
+def _commit_started(session):
+    if _trace.get() is not None:
+        session.info["trace_commit_started"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_finished(session):
+    started = session.info.pop("trace_commit_started", None)
+    trace = _trace.get()
+    if started is not None and trace is not None and len(trace.spans) < TRACE_MAX_SPANS:
+        trace.add_span("db_commit", started, time.perf_counter())
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _commit_failed(session, previous_transaction):
+    started = session.info.pop("trace_commit_started", None)
+    trace = _trace.get()
+    if started is not None and trace is not None:
+        trace.add_span("db_commit", started, time.perf_counter(), error="rollback")
+
+
+def tracing_stats():
+    return trace_log.snapshot()
+
+
+def recent_traces(limit=50, ticket_id=None):
+    return trace_log.traces(limit, ticket_id)
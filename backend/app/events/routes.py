@@ -0,0 +1,49 @@
+import os
+import json
+import logging
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from backend.app.auth.dependencies import oauth2_scheme, load_current_user
+from backend.app.core.events import subscribe
+from backend.app.tickets.events import AGENTS_CHANNEL, user_channel
+
+logger = logging.getLogger(__name__)
+
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+@router.get("/stream")
+async def stream_ticket_events(request: Request, token: str = Depends(oauth2_scheme)):
+    """
+    Server-Sent Events: the caller's ticket updates (USER) or the whole
+    agent queue (AGENT). Events carry ids only; clients refetch what changed.
+    """
+    # A stream can stay open for hours; don't pin a connection to it
+    user = await run_in_threadpool(load_current_user, token)
+    channels = [AGENTS_CHANNEL] if user.role == "AGENT" else [user_channel(user.id)]
+    subscription = subscribe(channels)
+
+    async def event_stream():
+        try:
+            yield "event: ready\ndata: {}\n\n"
+            while not await request.is_disconnected():
+                ticket_event = await subscription.get(timeout=EVENTS_HEARTBEAT_SECONDS)
+                if ticket_event is None:
+                    # Keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {ticket_event['type']}\ndata: {json.dumps(ticket_event)}\n\n"
+        finally:
+            subscription.close()
+            logger.info(f"EVENT STREAM CLOSED → user {user.id}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
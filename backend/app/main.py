@@ -1,22 +1,100 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from backend.app.core.database import Base, engine
+from fastapi.responses import JSONResponse, Response
+from backend.app.core.database import (
+    Base,
+    SessionLocal,
+    engine,
+    async_engine,
+    add_missing_columns,
+    add_missing_enum_values,
+    create_missing_indexes,
+    schema_lock
+)
 from backend.app.users.models import User
-from backend.app.auth.routes import router as auth_router
 from backend.app.tickets.models import Ticket,TicketAIMetadata
-from backend.app.tickets.routes import router as ticket_router
+from backend.app.tickets.pipeline import start_workers
+from backend.app.ai.knn_triage import start_retraining as start_knn_retraining
+from backend.app.tickets.urgency import backfill_urgency_scores
+from backend.app.ops.routes import router as ops_router
+from backend.app.events.routes import router as events_router
+from backend.app.tickets.bulk_routes import router as bulk_router
+from backend.app.tickets import events as ticket_events  # registers publish hooks
+from backend.app.core import startup
+from backend.app.core.query_counter import query_count_middleware
+from backend.app.core import metrics
+from backend.app.core import tracing
 import logging
 from backend.app.core import logging_config
 
 logger = logging.getLogger(__name__)
 
+# sync: threadpool routes on Session | async: AsyncSession + async LLM calls
+API_MODE = os.getenv("API_MODE", "sync").lower()
 
-app = FastAPI(title="SupportIQ Backend")
+if API_MODE == "async":
+    from backend.app.auth.async_routes import router as auth_router
+    from backend.app.tickets.async_routes import router as ticket_router
+else:
+    from backend.app.auth.routes import router as auth_router
+    from backend.app.tickets.routes import router as ticket_router
 
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with schema_lock():
+        Base.metadata.create_all(bind=engine)
+        added_columns = add_missing_columns()
+        add_missing_enum_values()
+        create_missing_indexes()
+
+        # Only the worker that added the column backfills it
+        if "tickets.urgency_score" in added_columns:
+            with SessionLocal() as db:
+                logger.info(f"SCHEMA → scored {backfill_urgency_scores(db)} queued tickets")
+
+    startup.readiness["schema"] = True
+
+    start_workers()
+    startup.readiness["workers"] = True
+
+    # Trains in the background; tickets use the LLM until the index is ready
+    start_knn_retraining()
+
+    if startup.WARMUP_ON_STARTUP:
+        startup.start_warm_up()
+
+    yield
+
+    if async_engine.loaded:
+        await async_engine.get().dispose()
+
+    metrics.mark_worker_exited()
+
+
+app = FastAPI(title="SupportIQ Backend", lifespan=lifespan)
+app.middleware("http")(query_count_middleware)
+app.middleware("http")(metrics.metrics_middleware)
+app.middleware("http")(tracing.tracing_middleware)
 
 app.include_router(auth_router)
 app.include_router(ticket_router)
+app.include_router(bulk_router)
+app.include_router(ops_router)
+app.include_router(events_router)
 
 @app.get("/")
 def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    # Unauthenticated, like the health checks: keep it off the public ingress
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/ready")
+def readiness_check():
+    body = {"ready": startup.is_ready(), **startup.readiness}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
@@ -0,0 +1,107 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from backend.app.auth.dependencies import require_role
+from backend.app.ai.llm_cache import cache_stats
+from backend.app.ai.llm_client import llm_stats
+from backend.app.ai.telemetry import llm_telemetry_stats, llm_ticket_telemetry
+from backend.app.ai.batch_triage import batch_triage_stats
+from backend.app.ai.conversation_summary import conversation_summary_stats
+from backend.app.ai.knn_triage import knn_triage_stats, retrain as retrain_knn_triage
+from backend.app.ai.reply_reuse import reuse_stats
+from backend.app.ai.vector_store import knowledge_base
+from backend.app.auth.user_cache import user_cache_stats
+from backend.app.core.database import db_pool_stats
+from backend.app.core.events import event_stats
+from backend.app.core.tracing import tracing_stats, recent_traces
+
+router = APIRouter(prefix="/ops", tags=["Ops"])
+
+
+@router.get("/llm")
+def get_llm_client_stats(user=Depends(require_role("AGENT"))):
+    return llm_stats()
+
+
+@router.get("/llm-telemetry")
+def get_llm_telemetry(
+    top: int = Query(10, ge=0, le=100),
+    user=Depends(require_role("AGENT"))
+):
+    return llm_telemetry_stats(top)
+
+
+@router.get("/llm-telemetry/tickets/{ticket_id}")
+def get_ticket_llm_telemetry(ticket_id: int, user=Depends(require_role("AGENT"))):
+    stats = llm_ticket_telemetry(ticket_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No LLM calls recorded for this ticket")
+    return stats
+
+
+@router.get("/tracing")
+def get_tracing_stats(user=Depends(require_role("AGENT"))):
+    return tracing_stats()
+
+
+@router.get("/traces")
+def export_traces(
+    limit: int = Query(50, ge=1, le=1000),
+    ticket_id: Optional[int] = None,
+    user=Depends(require_role("AGENT"))
+):
+    # JSON lines, newest first: the same records as the TRACE_LOG_PATH file
+    body = "".join(json.dumps(record, default=str) + "\n" for record in recent_traces(limit, ticket_id))
+    return Response(content=body, media_type="application/x-ndjson")
+
+
+@router.get("/llm-cache")
+def get_llm_cache_stats(user=Depends(require_role("AGENT"))):
+    return cache_stats()
+
+
+@router.get("/triage-batching")
+def get_triage_batching_stats(user=Depends(require_role("AGENT"))):
+    return batch_triage_stats()
+
+
+@router.get("/knn-triage")
+def get_knn_triage_stats(user=Depends(require_role("AGENT"))):
+    return knn_triage_stats()
+
+
+@router.post("/knn-triage/retrain")
+def retrain_knn_triage_index(user=Depends(require_role("AGENT"))):
+    return retrain_knn_triage()
+
+
+@router.get("/conversation-summaries")
+def get_conversation_summary_stats(user=Depends(require_role("AGENT"))):
+    return conversation_summary_stats()
+
+
+@router.get("/reply-reuse")
+def get_reply_reuse_stats(user=Depends(require_role("AGENT"))):
+    return reuse_stats()
+
+
+@router.get("/user-cache")
+def get_user_cache_stats(user=Depends(require_role("AGENT"))):
+    return user_cache_stats()
+
+
+@router.get("/db-pool")
+def get_db_pool_stats(user=Depends(require_role("AGENT"))):
+    return db_pool_stats()
+
+
+@router.get("/events")
+def get_event_broker_stats(user=Depends(require_role("AGENT"))):
+    return event_stats()
+
+
+@router.post("/kb/reindex")
+def reindex_knowledge_base(full: bool = False, user=Depends(require_role("AGENT"))):
+    return knowledge_base.reindex(full=full)
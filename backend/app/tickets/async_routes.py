@@ -0,0 +1,340 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.deps import get_async_db
+from backend.app.auth.dependencies import get_current_user_async
+from backend.app.users.models import User
+
+from backend.app.tickets.models import (
+    Ticket,
+    TicketCategory,
+    TicketStatus,
+    TicketMessage
+)
+
+from backend.app.tickets.schemas import (
+    TicketCreate,
+    TicketResponse,
+    TicketReply,
+    TicketMessageResponse
+)
+
+from backend.app.ai.reply_generator import (
+    agenerate_agent_draft,
+    astream_agent_draft
+)
+from backend.app.ai.llm_client import LLMUnavailable
+from backend.app.ai.conversation_summary import aload_history, arefresh_history
+from backend.app.tickets.pipeline import enqueue_ticket
+from backend.app.core.tracing import annotate
+from backend.app.tickets.urgency import score_ticket
+from backend.app.tickets.conditional import (
+    thread_state_statement,
+    thread_validators,
+    not_modified
+)
+from backend.app.tickets.pagination import (
+    keyset_page,
+    urgency_page,
+    split_page,
+    encode_urgency_cursor,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE
+)
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Mirror of tickets/routes.py on AsyncSession + async LLM calls (API_MODE=async).
+# Relationships are never lazy-loaded here: anything serialized is eager-loaded.
+router = APIRouter(prefix="/tickets", tags=["Tickets"])
+
+
+async def _get_ticket(ticket_id: int, db: AsyncSession, *options):
+    ticket = await db.get(Ticket, ticket_id, options=options)
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return ticket
+
+
+@router.post("/", response_model=TicketResponse)
+async def create_ticket(
+    ticket: TicketCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+
+    # 1️⃣ Persist ticket immediately, AI runs in the background
+    new_ticket = Ticket(
+        title=ticket.title,
+        description=ticket.description,
+        category=TicketCategory.GENERAL,
+        status=TicketStatus.TRIAGING,
+        created_by=current_user.id,
+        ai_metadata=None
+    )
+    db.add(new_ticket)
+    await db.flush()
+
+    # 2️⃣ Save USER message
+    db.add(TicketMessage(
+        ticket_id=new_ticket.id,
+        sender_id=current_user.id,
+        sender_role="USER",
+        message=ticket.description
+    ))
+
+    await db.commit()
+    await db.refresh(new_ticket, ["created_at", "updated_at"])
+
+    # 3️⃣ Hand off triage + decision engine + auto-reply to AI workers
+    enqueue_ticket(new_ticket.id)
+    annotate(ticket_id=new_ticket.id)
+    logger.info(f"TICKET {new_ticket.id} QUEUED_FOR_TRIAGE")
+
+    return new_ticket
+
+
+@router.get("/my", response_model=list[TicketResponse])
+async def get_my_tickets(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    query = (
+        select(Ticket)
+        .options(joinedload(Ticket.ai_metadata))
+        .where(Ticket.created_by == current_user.id)
+    )
+    result = await db.scalars(keyset_page(query, Ticket, cursor, limit, descending=True))
+
+    return split_page(result.all(), limit, response)
+
+
+@router.get("/agent/pending", response_model=list[TicketResponse])
+async def get_pending_tickets_for_agent(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+
+    if current_user.role != "AGENT":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    query = (
+        select(Ticket)
+        .options(joinedload(Ticket.ai_metadata))
+        .where(Ticket.status == TicketStatus.PENDING_AGENT)
+    )
+    result = await db.scalars(urgency_page(query, Ticket, cursor, limit))
+
+    return split_page(result.all(), limit, response, encode=encode_urgency_cursor)
+
+
+async def _load_draft_inputs(ticket_id: int, db: AsyncSession):
+    ticket = await db.scalar(
+        select(Ticket)
+        .options(joinedload(Ticket.ai_metadata))
+        .where(Ticket.id == ticket_id)
+    )
+
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    if not ticket.ai_metadata:
+        raise HTTPException(status_code=400, detail="AI metadata missing")
+
+    ai_metadata = {
+        "risk": ticket.ai_metadata.risk,
+        "sentiment": ticket.ai_metadata.sentiment,
+        "confidence": ticket.ai_metadata.confidence,
+        "ai_summary": ticket.ai_metadata.ai_summary
+    }
+
+    # Only messages after the stored summary; the caller folds when due
+    summary, messages = await aload_history(db, ticket_id)
+
+    return ticket, messages, ai_metadata, summary
+
+
+@router.post("/{ticket_id}/generate-draft")
+async def generate_draft_for_agent(
+    ticket_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+
+    if current_user.role != "AGENT":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    ticket, messages, ai_metadata, summary = await _load_draft_inputs(ticket_id, db)
+
+    # Release the connection before the (long) LLM wait
+    await db.close()
+
+    summary, messages = await arefresh_history(ticket_id, summary, messages)
+
+    try:
+        draft = await agenerate_agent_draft(
+            ticket=ticket,
+            messages=messages,
+            ai_metadata=ai_metadata,
+            summary=summary
+        )
+    except LLMUnavailable:
+        raise HTTPException(status_code=503, detail="AI assistant temporarily unavailable")
+
+    logger.info(f"AI DRAFT GENERATED → Ticket {ticket_id}")
+
+    return {"draft": draft}
+
+
+@router.post("/{ticket_id}/generate-draft/stream")
+async def stream_draft_for_agent(
+    ticket_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+
+    if current_user.role != "AGENT":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    ticket, messages, ai_metadata, summary = await _load_draft_inputs(ticket_id, db)
+    await db.close()
+
+    summary, messages = await arefresh_history(ticket_id, summary, messages)
+
+    chunks = astream_agent_draft(
+        ticket=ticket,
+        messages=messages,
+        ai_metadata=ai_metadata,
+        summary=summary
+    )
+
+    async def event_stream():
+        try:
+            async for chunk in chunks:
+                yield f"data: {json.dumps({'token': chunk})}\n\n"
+        except Exception:
+            logger.exception(f"AI DRAFT STREAM FAILED → Ticket {ticket_id}")
+            yield "event: error\ndata: {}\n\n"
+            return
+
+        logger.info(f"AI DRAFT STREAMED → Ticket {ticket_id}")
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/{ticket_id}/reply")
+async def reply_to_ticket(
+    ticket_id: int,
+    reply: TicketReply,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+
+    ticket = await _get_ticket(ticket_id, db, joinedload(Ticket.ai_metadata))
+
+    if current_user.role == "USER":
+
+        if ticket.created_by != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+
+        sender_role = "USER"
+
+        # Background triage decides the route for tickets still TRIAGING
+        if ticket.status != TicketStatus.TRIAGING:
+            ticket.status = TicketStatus.PENDING_AGENT
+
+    elif current_user.role == "AGENT":
+
+        sender_role = "AGENT"
+
+        # Same guard: the worker only picks up tickets still TRIAGING
+        if ticket.status != TicketStatus.TRIAGING:
+            ticket.status = TicketStatus.WAITING_FOR_USER
+
+    else:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    db.add(TicketMessage(
+        ticket_id=ticket_id,
+        sender_id=current_user.id,
+        sender_role=sender_role,
+        message=reply.message
+    ))
+
+    if sender_role == "USER" and ticket.ai_metadata is not None:
+        score_ticket(ticket)
+
+    await db.commit()
+
+    return {"message": "Reply added successfully"}
+
+
+@router.get("/{ticket_id}/messages", response_model=list[TicketMessageResponse])
+async def get_ticket_messages(
+    ticket_id: int,
+    request: Request,
+    response: Response,
+    since: Optional[int] = Query(None, description="only messages with a larger id"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+
+    ticket = await _get_ticket(ticket_id, db)
+
+    if current_user.role == "USER" and ticket.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    validators = thread_validators(ticket_id, (await db.execute(thread_state_statement(ticket_id))).one())
+    cached = not_modified(request, validators)
+    if cached is not None:
+        return cached
+    response.headers.update(validators)
+
+    statement = select(TicketMessage).where(TicketMessage.ticket_id == ticket_id)
+    if since is not None:
+        statement = statement.where(TicketMessage.id > since)
+
+    result = await db.scalars(
+        statement.order_by(TicketMessage.created_at.asc(), TicketMessage.id.asc())
+    )
+    return result.all()
+
+
+@router.post("/{ticket_id}/close")
+async def close_ticket(
+    ticket_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+
+    ticket = await _get_ticket(ticket_id, db)
+
+    if current_user.role == "USER":
+        if ticket.created_by != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+
+    elif current_user.role != "AGENT":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    ticket.status = TicketStatus.CLOSED
+    await db.commit()
+
+    return {"message": "Ticket closed successfully"}
@@ -0,0 +1,405 @@
+"""
+Bulk ticket ingestion (backlog migrations, email exports).
+
+Records arrive as JSONL and are triaged concurrently as they are read;
+finished records are written in batches of Ticket + TicketMessage +
+TicketAIMetadata bulk inserts, one transaction per batch. Every record
+gets a result line, and each committed batch a progress line, so a client
+can follow (and resume) a long import.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+
+from backend.app.core.database import SessionLocal
+from backend.app.core.events import publish
+from backend.app.core.metrics import record_decision
+from backend.app.users.models import User
+from backend.app.tickets.models import (
+    Ticket,
+    TicketAIMetadata,
+    TicketMessage,
+    TicketStatus
+)
+from backend.app.tickets.schemas import BulkTicketRecord
+from backend.app.tickets.events import AGENTS_CHANNEL
+from backend.app.tickets.pipeline import decide_status, usable_triage
+from backend.app.tickets.urgency import urgency_score
+from backend.app.ai.triage import arun_ai_triage, fallback_response
+from backend.app.ai.combined_triage import AI_COMBINED_TRIAGE, run_ai_triage_with_reply
+from backend.app.ai.batch_triage import AI_BATCHED_TRIAGE, BatchPlanner, arun_ai_triage_batch
+from backend.app.ai.knn_triage import afast_triage
+from backend.app.ai.reply_generator import agenerate_auto_reply
+from backend.app.ai.reply_reuse import find_reusable_reply, remember_replies
+from backend.app.ai.llm_client import LLMUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Triage calls in flight; also caps how far reading runs ahead of triage
+BULK_TRIAGE_CONCURRENCY = int(os.getenv("BULK_TRIAGE_CONCURRENCY", "16"))
+# Triaged records per insert transaction
+BULK_INSERT_BATCH = int(os.getenv("BULK_INSERT_BATCH", "500"))
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", str(1024 * 1024)))
+
+METADATA_FIELDS = ("category", "priority", "sentiment", "risk", "confidence", "ai_summary")
+
+
+@dataclass
+class TriagedRecord:
+    line: int
+    record: BulkTicketRecord
+    ai_data: dict
+    status: TicketStatus
+    reply: Optional[str] = None
+    # A reply written for this record, not reused: indexed once committed
+    new_reply: bool = False
+
+
+def result_line(payload: dict) -> str:
+    return json.dumps(payload, default=str) + "\n"
+
+
+async def read_lines(chunks):
+    """(line number, bytes) for each non-blank line of a chunked body."""
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > BULK_MAX_LINE_BYTES:
+            raise ValueError(f"line {line_no + len(lines) + 1} exceeds {BULK_MAX_LINE_BYTES} bytes")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+def parse_record(raw: bytes) -> BulkTicketRecord:
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"invalid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    try:
+        return BulkTicketRecord(**data)
+    except ValidationError as e:
+        errors = "; ".join(
+            f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+        )
+        raise ValueError(errors)
+
+
+async def triage_record(line: int, record: BulkTicketRecord, ai_data=None) -> TriagedRecord:
+    """
+    Same decision engine as the AI workers, without touching the database.
+    `ai_data` is passed in when the record was triaged as part of a batch.
+    """
+    candidate_reply = None
+    if ai_data is None:
+        ai_data = await afast_triage(record.title, record.description)
+    if ai_data is None:
+        try:
+            if AI_COMBINED_TRIAGE:
+                ai_data, candidate_reply = await asyncio.to_thread(
+                    run_ai_triage_with_reply, record.title, record.description
+                )
+            else:
+                ai_data = await arun_ai_triage(record.title, record.description)
+        except Exception:
+            logger.exception(f"BULK TRIAGE FAILED → line {line}")
+            ai_data = fallback_response()
+
+    # The workers' checks: one malformed triage must not fail the whole insert batch
+    ai_data = usable_triage(ai_data)
+
+    status = decide_status(ai_data)
+    reply, new_reply = None, False
+
+    if status == TicketStatus.AUTO_RESOLVED:
+        try:
+            if candidate_reply:
+                reply, new_reply = candidate_reply, True
+            else:
+                reply = await asyncio.to_thread(find_reusable_reply, record.description, ai_data)
+
+            if reply is None:
+                reply = await agenerate_auto_reply(record.title, record.description, ai_data)
+                new_reply = True
+        except LLMUnavailable:
+            logger.warning(f"BULK AUTO REPLY SKIPPED → line {line}, LLM unavailable")
+            status = TicketStatus.PENDING_AGENT
+        except Exception:
+            logger.exception(f"BULK AUTO REPLY FAILED → line {line}")
+            status = TicketStatus.PENDING_AGENT
+
+    if status != TicketStatus.AUTO_RESOLVED:
+        reply, new_reply = None, False
+    return TriagedRecord(line, record, ai_data, status, reply, new_reply)
+
+
+def insert_batch(batch, default_owner_id: int):
+    """
+    Write one batch of triaged records in a single transaction and return
+    their result lines. Records naming an unknown user are rejected
+    individually; a database error fails the whole batch.
+    """
+    with SessionLocal() as db:
+        emails = {item.record.email for item in batch if item.record.email}
+        owners = dict(db.execute(
+            select(User.email, User.id).where(User.email.in_(emails))
+        ).all()) if emails else {}
+
+        results, accepted = [], []
+        for item in batch:
+            owner_id = owners.get(item.record.email) if item.record.email else default_owner_id
+            if owner_id is None:
+                results.append({"line": item.line, "ok": False, "error": f"unknown user {item.record.email}"})
+            else:
+                accepted.append((item, owner_id))
+
+        if not accepted:
+            return results
+
+        now = datetime.utcnow()
+        try:
+            # 1️⃣ Tickets, ids returned in parameter order
+            ticket_ids = db.scalars(
+                insert(Ticket).returning(Ticket.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "title": item.record.title,
+                        "description": item.record.description,
+                        "category": item.ai_data["category"],
+                        "priority": item.ai_data["priority"],
+                        "status": item.status,
+                        "created_by": owner_id,
+                        "created_at": item.record.created_at or now,
+                        "updated_at": now,
+                        "urgency_score": urgency_score(
+                            item.ai_data["priority"],
+                            item.ai_data["sentiment"],
+                            item.ai_data["confidence"]
+                        ),
+                    }
+                    for item, owner_id in accepted
+                ]
+            ).all()
+
+            # 2️⃣ Opening USER message and, for auto-resolved tickets, the AI reply
+            messages, metadata = [], []
+            for (item, owner_id), ticket_id in zip(accepted, ticket_ids):
+                created_at = item.record.created_at or now
+                messages.append({
+                    "ticket_id": ticket_id,
+                    "sender_id": owner_id,
+                    "sender_role": "USER",
+                    "message": item.record.description,
+                    "created_at": created_at,
+                })
+                if item.reply:
+                    messages.append({
+                        "ticket_id": ticket_id,
+                        "sender_id": None,
+                        "sender_role": "AI",
+                        "message": item.reply,
+                        "created_at": max(created_at, now),
+                    })
+                metadata.append({
+                    "ticket_id": ticket_id,
+                    **{field: item.ai_data[field] for field in METADATA_FIELDS},
+                    "source": item.ai_data.get("source", "llm"),
+                })
+
+            db.execute(insert(TicketMessage), messages)
+            # 3️⃣ AI metadata
+            db.execute(insert(TicketAIMetadata), metadata)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"BULK INSERT FAILED → {len(accepted)} records")
+            return results + [
+                {"line": item.line, "ok": False, "error": f"insert failed: {type(e).__name__}"}
+                for item, _ in accepted
+            ]
+
+    for (item, _), ticket_id in zip(accepted, ticket_ids):
+        record_decision(item.status, item.ai_data.get("source"), "bulk")
+        results.append({
+            "line": item.line,
+            "ok": True,
+            "ticket_id": ticket_id,
+            "status": item.status.value,
+        })
+
+    try:
+        remember_replies([
+            (item.record.description, item.ai_data, item.reply)
+            for item, _ in accepted if item.new_reply
+        ])
+    except Exception:
+        logger.exception(f"REPLY REUSE → could not index {len(accepted)} bulk replies")
+
+    # Bulk inserts bypass the per-row session hooks; one event per batch
+    # is enough for open dashboards to refetch their queue
+    publish([AGENTS_CHANNEL], {
+        "type": "ticket.bulk",
+        "count": len(accepted),
+        "at": now.isoformat(),
+    })
+    return results
+
+
+async def ingest(chunks, default_owner_id: int, allow_owner_override: bool):
+    """
+    Async generator of NDJSON lines for a JSONL request body.
+
+    Reading pauses while BULK_TRIAGE_CONCURRENCY triage calls are in
+    flight, so memory stays bounded however large the upload is.
+    """
+    started = time.perf_counter()
+    counts = {"received": 0, "inserted": 0, "failed": 0}
+    slots = asyncio.Semaphore(BULK_TRIAGE_CONCURRENCY)
+    triaged, tasks = [], set()
+    # Result lines of records whose triage raised, sent with the next output
+    failures = []
+    # Batched triage: records are packed into prompt-budget-sized batches
+    planner = BatchPlanner() if AI_BATCHED_TRIAGE else None
+
+    async def triage_batch(items):
+        # Routine tickets answered by the kNN fast path leave the batch
+        ai_batch = await asyncio.gather(*(
+            afast_triage(record.title, record.description) for _, record in items
+        ))
+        pending = [i for i, ai_data in enumerate(ai_batch) if ai_data is None]
+        if pending:
+            llm_batch = await arun_ai_triage_batch(
+                [(items[i][1].title, items[i][1].description) for i in pending]
+            )
+            for i, ai_data in zip(pending, llm_batch):
+                ai_batch[i] = ai_data
+        return ai_batch
+
+    async def work(items):
+        try:
+            ai_batch = [None] * len(items)
+            if len(items) > 1:
+                try:
+                    ai_batch = await triage_batch(items)
+                except Exception:
+                    # Each record is then triaged on its own
+                    logger.exception(
+                        f"BULK BATCH TRIAGE FAILED → lines {items[0][0]}-{items[-1][0]}"
+                    )
+
+            results = await asyncio.gather(*(
+                triage_record(line, record, ai_data)
+                for (line, record), ai_data in zip(items, ai_batch)
+            ), return_exceptions=True)
+            for (line, _), result in zip(items, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"BULK TRIAGE FAILED → line {line}", exc_info=result)
+                    failures.append({
+                        "line": line, "ok": False, "error": f"triage failed: {type(result).__name__}"
+                    })
+                else:
+                    triaged.append(result)
+        finally:
+            slots.release()
+
+    async def submit(items):
+        # One slot per triage call, batched or not
+        await slots.acquire()
+        task = asyncio.create_task(work(items))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    def progress():
+        elapsed = time.perf_counter() - started
+        return result_line({"progress": {
+            **counts,
+            "elapsed_seconds": round(elapsed, 3),
+            "per_second": round(counts["inserted"] / elapsed, 1) if elapsed else 0.0,
+        }})
+
+    def failed_lines():
+        lines = [result_line(failure) for failure in failures]
+        counts["failed"] += len(failures)
+        failures.clear()
+        return lines
+
+    async def flush():
+        batch = triaged[:BULK_INSERT_BATCH]
+        del triaged[:BULK_INSERT_BATCH]
+        lines = []
+        for result in await run_in_threadpool(insert_batch, batch, default_owner_id):
+            counts["inserted" if result["ok"] else "failed"] += 1
+            lines.append(result_line(result))
+        lines.append(progress())
+        return lines
+
+    try:
+        try:
+            async for line, raw in read_lines(chunks):
+                counts["received"] += 1
+                try:
+                    record = parse_record(raw)
+                    if record.email and not allow_owner_override:
+                        raise ValueError("only agents may set email")
+                except ValueError as e:
+                    counts["failed"] += 1
+                    yield result_line({"line": line, "ok": False, "error": str(e)})
+                    continue
+
+                if planner is None:
+                    await submit([(line, record)])
+                else:
+                    closed = planner.add((line, record), record.title, record.description)
+                    if closed:
+                        await submit(closed)
+
+                for out in failed_lines():
+                    yield out
+                if len(triaged) >= BULK_INSERT_BATCH:
+                    for out in await flush():
+                        yield out
+        except ValueError as e:
+            # Unreadable body: stop reading, but keep what was already triaged
+            yield result_line({"error": str(e)})
+
+        if planner is not None:
+            rest = planner.drain()
+            if rest:
+                await submit(rest)
+        if tasks:
+            # work() reports its records' failures itself; this is a backstop
+            for result in await asyncio.gather(*tasks, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error("BULK TRIAGE TASK FAILED", exc_info=result)
+        for out in failed_lines():
+            yield out
+        while triaged:
+            for out in await flush():
+                yield out
+    finally:
+        # Client went away mid-upload: stop triaging what will never be written
+        for task in list(tasks):
+            task.cancel()
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"BULK INGEST → {counts['inserted']} inserted, {counts['failed']} failed "
+        f"in {elapsed:.1f}s"
+    )
+    yield result_line({"summary": {**counts, "elapsed_seconds": round(elapsed, 3)}})
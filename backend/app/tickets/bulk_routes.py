@@ -0,0 +1,46 @@
+import anyio
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from backend.app.auth.dependencies import oauth2_scheme, load_current_user
+from backend.app.tickets.bulk import ingest
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Shared by both API modes: ingestion is async end to end either way
+router = APIRouter(prefix="/tickets", tags=["Tickets"])
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    A streamed response produced while the request body is still being
+    read. Starlette's disconnect listener would swallow the upload's body
+    messages, so it is left idle: reading the body raises ClientDisconnect
+    if the client goes away mid-upload, and sending fails after that.
+    """
+
+    async def listen_for_disconnect(self, receive):
+        await anyio.sleep_forever()
+
+
+@router.post("/bulk")
+async def bulk_create_tickets(request: Request, token: str = Depends(oauth2_scheme)):
+    """
+    JSONL body, one {"title", "description"} object per line (agents may add
+    "email" to import for an existing user, anyone may add "created_at").
+
+    Streams NDJSON back: one result per record ({"line", "ok", "ticket_id",
+    "status"} or {"line", "ok": false, "error"}), a {"progress"} line per
+    committed batch and a final {"summary"}.
+    """
+    # An import can run for minutes; don't pin a connection to it
+    user = await run_in_threadpool(load_current_user, token)
+    logger.info(f"BULK INGEST STARTED → user {user.id}")
+
+    return UploadStreamingResponse(
+        ingest(request.stream(), user.id, allow_owner_override=user.role == "AGENT"),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
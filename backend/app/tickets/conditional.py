@@ -0,0 +1,52 @@
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from sqlalchemy import select, func
+
+from backend.app.tickets.models import TicketMessage
+
+
+def thread_state_statement(ticket_id: int):
+    """(last message id, message count, last created_at) — one index-only aggregate."""
+    return select(
+        func.max(TicketMessage.id),
+        func.count(TicketMessage.id),
+        func.max(TicketMessage.created_at)
+    ).where(TicketMessage.ticket_id == ticket_id)
+
+
+def thread_validators(ticket_id: int, state):
+    """ETag and Last-Modified of a thread. Messages are append-only, so the
+    last id and the count identify its contents."""
+    last_id, count, last_created = state
+    headers = {
+        "ETag": f'W/"t{ticket_id}-{last_id or 0}-{count}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if last_created is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_created.replace(tzinfo=timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def not_modified(request: Request, headers: dict):
+    """304 response if the client's validators still match, else None."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        if headers["ETag"] in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+        return None
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if parsedate_to_datetime(headers["Last-Modified"]) <= since:
+            return Response(status_code=304, headers=headers)
+
+    return None
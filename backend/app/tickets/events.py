@@ -0,0 +1,67 @@
+"""
+Publishes ticket status changes and new messages once their transaction
+commits. Hooked on every Session (sync, async and the AI workers), so no
+route has to remember to publish.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from backend.app.core.events import publish
+from backend.app.tickets.models import Ticket, TicketMessage
+
+AGENTS_CHANNEL = "agents"
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def _status_value(status):
+    return getattr(status, "value", status)
+
+
+def _ticket_owner(session, ticket_id):
+    # Routes and workers that add a message almost always hold the ticket
+    ticket = session.identity_map.get(session.identity_key(Ticket, ticket_id))
+    if ticket is not None:
+        return ticket.created_by
+    return session.connection().scalar(select(Ticket.created_by).where(Ticket.id == ticket_id))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session, flush_context):
+    pending = session.info.setdefault("ticket_events", [])
+    now = datetime.utcnow().isoformat()
+
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Ticket):
+            history = inspect(obj).attrs.status.history
+            if obj in session.new or history.has_changes():
+                pending.append((obj.created_by, {
+                    "type": "ticket.status",
+                    "ticket_id": obj.id,
+                    "status": _status_value(obj.status),
+                    "at": now,
+                }))
+
+        elif isinstance(obj, TicketMessage) and obj in session.new:
+            pending.append((_ticket_owner(session, obj.ticket_id), {
+                "type": "ticket.message",
+                "ticket_id": obj.ticket_id,
+                "message_id": obj.id,
+                "sender_role": obj.sender_role,
+                "at": now,
+            }))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session):
+    for owner_id, ticket_event in session.info.pop("ticket_events", []):
+        publish([user_channel(owner_id), AGENTS_CHANNEL], ticket_event)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session):
+    session.info.pop("ticket_events", None)
@@ -1,15 +1,17 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 
 from backend.app.core.database import Base
+from backend.app.tickets import urgency
 
 
 # ---- Enums ----
 
 class TicketStatus(str, enum.Enum):
     OPEN = "OPEN"
+    TRIAGING = "TRIAGING"
     AUTO_RESOLVED = "AUTO_RESOLVED"
     PENDING_AGENT = "PENDING_AGENT"
     WAITING_FOR_USER = "WAITING_FOR_USER"
@@ -35,6 +37,11 @@ class TicketCategory(str, enum.Enum):
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    # Keyset pagination: equality column first, then the (created_at, id) sort key
+    __table_args__ = (
+        Index("ix_tickets_status_created_at", "status", "created_at", "id"),
+        Index("ix_tickets_created_by_created_at", "created_by", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -51,6 +58,9 @@ class Ticket(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Agent-queue rank, see tickets/urgency.py
+    urgency_score = Column(Float, nullable=False, default=0.0, server_default="0")
+
     # ✅ relationship
     ai_metadata = relationship(
         "TicketAIMetadata",
@@ -59,6 +69,23 @@ class Ticket(Base):
         cascade="all, delete"
     )
 
+    @property
+    def escalation_reason(self):
+        meta = self.ai_metadata
+        if meta is None:
+            return None
+        return urgency.escalation_reason(self.priority, meta.sentiment, meta.risk)
+
+
+# Agent queue: most urgent first, oldest first within a score
+Index(
+    "ix_tickets_status_urgency",
+    Ticket.status,
+    Ticket.urgency_score.desc(),
+    Ticket.created_at,
+    Ticket.id
+)
+
 
 class TicketAIMetadata(Base):
     __tablename__ = "ticket_ai_metadata"
@@ -72,6 +99,8 @@ class TicketAIMetadata(Base):
     confidence = Column(Float)
     risk = Column(String)
     ai_summary = Column(String)
+    # llm / knn / fallback; NULL on rows written before this was recorded
+    source = Column(String, nullable=True)
 
     ticket = relationship("Ticket", back_populates="ai_metadata")
 
@@ -80,6 +109,9 @@ from sqlalchemy.orm import relationship
 
 class TicketMessage(Base):
     __tablename__ = "ticket_messages"
+    __table_args__ = (
+        Index("ix_ticket_messages_ticket_id_created_at", "ticket_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False)
@@ -92,3 +124,17 @@ class TicketMessage(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     ticket = relationship("Ticket", backref="messages")
+
+
+class TicketConversationSummary(Base):
+    """Rolling summary of a ticket's older messages, for agent drafts."""
+    __tablename__ = "ticket_conversation_summaries"
+
+    ticket_id = Column(Integer, ForeignKey("tickets.id"), primary_key=True)
+
+    summary = Column(Text, nullable=False)
+    # Last message folded in; messages after it are sent verbatim
+    last_message_id = Column(Integer, nullable=False)
+    folded_messages = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,101 @@
+import json
+import base64
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_, or_, and_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Clients read the cursor for the following page from this response header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode(cursor: str, size: int):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != size:
+            raise ValueError(cursor)
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_cursor(ticket) -> str:
+    return _encode([ticket.created_at.isoformat(), ticket.id])
+
+
+def decode_cursor(cursor: str):
+    created_at, ticket_id = _decode(cursor, 2)
+    try:
+        return datetime.fromisoformat(created_at), int(ticket_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_urgency_cursor(ticket) -> str:
+    return _encode([ticket.urgency_score, ticket.created_at.isoformat(), ticket.id])
+
+
+def decode_urgency_cursor(cursor: str):
+    score, created_at, ticket_id = _decode(cursor, 3)
+    try:
+        return float(score), datetime.fromisoformat(created_at), int(ticket_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(query, model, cursor, limit, descending=False):
+    """
+    Orders by (created_at, id) and continues strictly after `cursor`, so each
+    page is an index range scan however deep the client has paged.
+    Fetches one extra row to know whether another page exists.
+    """
+    key = tuple_(model.created_at, model.id)
+
+    if cursor:
+        position = decode_cursor(cursor)
+        query = query.filter(key < position if descending else key > position)
+
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+
+    return query.limit(limit + 1)
+
+
+def urgency_page(query, model, cursor, limit):
+    """
+    keyset_page for (urgency_score DESC, created_at, id). The score is not a
+    stable key: a ticket rescored while a client pages through the queue can
+    move across the cursor, so it is skipped (moved up past it) or served
+    again (moved down past it). Agents work the queue from the top, so a
+    restart from the first page picks up anything that moved.
+    """
+    if cursor:
+        score, created_at, ticket_id = decode_urgency_cursor(cursor)
+        query = query.filter(or_(
+            model.urgency_score < score,
+            and_(
+                model.urgency_score == score,
+                tuple_(model.created_at, model.id) > (created_at, ticket_id)
+            )
+        ))
+
+    return query.order_by(
+        model.urgency_score.desc(), model.created_at.asc(), model.id.asc()
+    ).limit(limit + 1)
+
+
+def split_page(rows, limit, response, encode=encode_cursor):
+    """Trims the look-ahead row and sets the next-page header."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode(rows[-1])
+    return rows
@@ -0,0 +1,312 @@
+import os
+import queue
+import itertools
+import threading
+import logging
+
+from backend.app.core.database import SessionLocal
+from backend.app.core.metrics import record_decision
+from backend.app.core.tracing import start_trace, annotate
+from backend.app.tickets.models import (
+    Ticket,
+    TicketAIMetadata,
+    TicketStatus,
+    TicketMessage
+)
+from backend.app.ai.triage import run_ai_triage, fallback_response, validate_entry
+from backend.app.ai.reply_generator import generate_auto_reply
+from backend.app.ai.llm_client import LLMUnavailable
+from backend.app.ai.combined_triage import (
+    AI_COMBINED_TRIAGE,
+    run_ai_triage_with_reply
+)
+from backend.app.ai.batch_triage import (
+    AI_BATCHED_TRIAGE,
+    TRIAGE_BATCH_MAX_SIZE,
+    run_ai_triage_many
+)
+from backend.app.ai.knn_triage import fast_triage
+from backend.app.ai.reply_reuse import find_reusable_reply, remember_reply
+from backend.app.ai.telemetry import ticket_scope
+from backend.app.tickets.urgency import score_ticket
+
+logger = logging.getLogger(__name__)
+
+# Number of background threads running triage + auto-reply
+AI_WORKER_COUNT = int(os.getenv("AI_WORKER_COUNT", "4"))
+
+# (kind, order, ticket id, ai_data). Tickets a batch has already triaged
+# (DECIDE) go ahead of new ones, so idle workers pick up their auto-replies
+_DECIDE, _TRIAGE = 0, 1
+_jobs = queue.PriorityQueue()
+_job_order = itertools.count()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def decide_status(ai_data: dict):
+    """Decision engine: auto-resolve only confident, low-risk tickets."""
+    if ai_data["confidence"] >= 0.70 and ai_data["risk"] == "LOW":
+        return TicketStatus.AUTO_RESOLVED
+    return TicketStatus.PENDING_AGENT
+
+
+def usable_triage(ai_data):
+    """
+    `ai_data` normalized (enum casing, float confidence), or the fallback
+    when it could not be stored or decided on.
+    """
+    result = validate_entry(ai_data)
+    if result is None:
+        logger.warning("TRIAGE UNUSABLE → using fallback")
+        return fallback_response("invalid_result")
+    result["source"] = ai_data.get("source", "llm")
+    return result
+
+
+def enqueue_ticket(ticket_id: int):
+    _jobs.put((_TRIAGE, next(_job_order), ticket_id, None))
+
+
+def _enqueue_decision(ticket_id: int, ai_data):
+    _jobs.put((_DECIDE, next(_job_order), ticket_id, ai_data))
+
+
+def process_ticket(ticket_id: int, ai_data: dict = None):
+    """Triage (unless `ai_data` came from a batch), decide, auto-reply."""
+    # LLM calls made for this ticket show up in its telemetry, stages in its trace
+    with ticket_scope(ticket_id), start_trace("process_ticket", ticket_id=ticket_id):
+        _process_ticket(ticket_id, ai_data)
+
+
+def _process_ticket(ticket_id: int, ai_data: dict = None):
+    db = SessionLocal()
+    try:
+        # Row lock so several app processes resuming the same backlog
+        # never triage one ticket twice. It is held across the LLM calls:
+        # FOR NO KEY UPDATE (key_share) still lets replies insert messages,
+        # whose foreign key only needs a KEY SHARE lock on the ticket
+        ticket = (
+            db.query(Ticket)
+            .filter(Ticket.id == ticket_id, Ticket.status == TicketStatus.TRIAGING)
+            .with_for_update(skip_locked=True, key_share=True)
+            .first()
+        )
+        if not ticket:
+            return
+
+        # 1️⃣ Run AI Triage: kNN fast path for routine tickets, else the LLM
+        # (optionally with a candidate reply in the same call)
+        candidate_reply = None
+        if ai_data is None:
+            ai_data = fast_triage(ticket.title, ticket.description)
+        if ai_data is None:
+            try:
+                if AI_COMBINED_TRIAGE:
+                    ai_data, candidate_reply = run_ai_triage_with_reply(
+                        ticket.title,
+                        ticket.description
+                    )
+                else:
+                    ai_data = run_ai_triage(ticket.title, ticket.description)
+            except Exception:
+                logger.exception(f"TRIAGE FAILED → Ticket {ticket_id}")
+                ai_data = fallback_response()
+
+        # Same checks as bulk and batched triage: a malformed result must
+        # not leave the ticket stuck in TRIAGING or store a bad enum value
+        ai_data = usable_triage(ai_data)
+
+        logger.info(
+            f"DECISION ENGINE → confidence={ai_data['confidence']} | risk={ai_data['risk']}"
+        )
+
+        ticket.category = ai_data["category"]
+        ticket.priority = ai_data["priority"]
+
+        # 2️⃣ Save AI metadata and the agent-queue rank derived from it
+        ticket.ai_metadata = TicketAIMetadata(
+            category=ai_data["category"],
+            priority=ai_data["priority"],
+            sentiment=ai_data["sentiment"],
+            risk=ai_data["risk"],
+            confidence=ai_data["confidence"],
+            ai_summary=ai_data["ai_summary"],
+            source=ai_data.get("source", "llm")
+        )
+        score_ticket(ticket)
+
+        # 3️⃣ Decision Engine
+        status = decide_status(ai_data)
+
+        # Indexed for reuse only once the ticket carrying it is committed
+        new_reply = None
+
+        if status == TicketStatus.AUTO_RESOLVED:
+            try:
+                if candidate_reply:
+                    # Combined mode already wrote the reply in the triage call
+                    ai_reply_text = new_reply = candidate_reply
+                else:
+                    # Near-duplicate of an earlier ticket → reuse its reply
+                    ai_reply_text = find_reusable_reply(ticket.description, ai_data)
+
+                if ai_reply_text is None:
+                    ai_reply_text = generate_auto_reply(
+                        ticket.title,
+                        ticket.description,
+                        ai_data
+                    )
+                    new_reply = ai_reply_text
+
+                db.add(TicketMessage(
+                    ticket_id=ticket.id,
+                    sender_id=None,
+                    sender_role="AI",
+                    message=ai_reply_text
+                ))
+            except LLMUnavailable:
+                logger.warning(f"AUTO REPLY SKIPPED → Ticket {ticket_id}, LLM unavailable")
+                status = TicketStatus.PENDING_AGENT
+            except Exception:
+                logger.exception(f"AUTO REPLY FAILED → Ticket {ticket_id}")
+                status = TicketStatus.PENDING_AGENT
+
+        ticket.status = status
+
+        if status == TicketStatus.AUTO_RESOLVED:
+            logger.info(f"TICKET {ticket.id} AUTO_RESOLVED")
+        else:
+            logger.info(f"TICKET {ticket.id} ROUTED_TO_AGENT")
+
+        db.commit()
+        record_decision(status, ai_data.get("source"), "worker")
+        annotate(status=status.value, source=ai_data.get("source", "llm"))
+
+        if new_reply is not None and status == TicketStatus.AUTO_RESOLVED:
+            try:
+                remember_reply(ticket.description, ai_data, new_reply)
+            except Exception:
+                logger.exception(f"REPLY REUSE → could not index reply of Ticket {ticket_id}")
+    except Exception:
+        db.rollback()
+        logger.exception(f"AI PIPELINE FAILED → Ticket {ticket_id}")
+        _route_to_agent(db, ticket_id)
+    finally:
+        db.close()
+
+
+def _route_to_agent(db, ticket_id: int):
+    """Leave a ticket whose processing failed with an agent, never in TRIAGING."""
+    try:
+        db.query(Ticket).filter(
+            Ticket.id == ticket_id, Ticket.status == TicketStatus.TRIAGING
+        ).update({Ticket.status: TicketStatus.PENDING_AGENT}, synchronize_session=False)
+        db.commit()
+        logger.warning(f"TICKET {ticket_id} ROUTED_TO_AGENT after pipeline failure")
+    except Exception:
+        db.rollback()
+        logger.exception(f"AI PIPELINE → could not route Ticket {ticket_id} to an agent")
+
+
+def process_tickets(ticket_ids):
+    """
+    A burst of queued tickets: one batched triage. Each ticket then goes back
+    on the queue to be decided (and auto-replied) by whichever worker is free.
+    """
+    with start_trace("process_tickets", ticket_ids=list(ticket_ids)):
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(Ticket.id, Ticket.title, Ticket.description)
+                .filter(Ticket.id.in_(ticket_ids), Ticket.status == TicketStatus.TRIAGING)
+                .order_by(Ticket.id.asc())
+                .all()
+            )
+        finally:
+            db.close()
+
+        results = [fast_triage(row.title, row.description) for row in rows]
+        pending = [i for i, result in enumerate(results) if result is None]
+        try:
+            batch = run_ai_triage_many([(rows[i].title, rows[i].description) for i in pending])
+            for i, result in zip(pending, batch):
+                results[i] = result
+        except Exception:
+            logger.exception(f"BATCH TRIAGE FAILED → {len(pending)} tickets, triaging one by one")
+
+    # process_ticket re-checks the status under its row lock; a ticket the
+    # batch could not triage (None) is triaged on its own there
+    for row, ai_data in zip(rows, results):
+        _enqueue_decision(row.id, ai_data)
+
+
+def _next_jobs():
+    """The next job, plus (with batched triage) whatever else is queued for triage."""
+    jobs = [_jobs.get()]
+    if AI_BATCHED_TRIAGE and jobs[0][0] == _TRIAGE:
+        while len(jobs) < TRIAGE_BATCH_MAX_SIZE:
+            try:
+                job = _jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job[0] == _DECIDE:
+                # Queued meanwhile: leave it to an idle worker, not behind this batch
+                _jobs.put(job)
+                _jobs.task_done()
+                break
+            jobs.append(job)
+    return jobs
+
+
+def _worker_loop():
+    while True:
+        jobs = _next_jobs()
+        try:
+            if len(jobs) > 1:
+                process_tickets([ticket_id for _, _, ticket_id, _ in jobs])
+            else:
+                _, _, ticket_id, ai_data = jobs[0]
+                process_ticket(ticket_id, ai_data=ai_data)
+        finally:
+            for _ in jobs:
+                _jobs.task_done()
+
+
+def resume_unfinished():
+    """Re-enqueue tickets left in TRIAGING by a previous run."""
+    db = SessionLocal()
+    try:
+        ticket_ids = [
+            row.id for row in
+            db.query(Ticket.id)
+            .filter(Ticket.status == TicketStatus.TRIAGING)
+            .order_by(Ticket.id.asc())
+            .all()
+        ]
+    finally:
+        db.close()
+
+    for ticket_id in ticket_ids:
+        enqueue_ticket(ticket_id)
+
+    if ticket_ids:
+        logger.info(f"AI PIPELINE → resumed {len(ticket_ids)} unfinished tickets")
+
+
+def start_workers(worker_count: int = AI_WORKER_COUNT):
+    with _workers_lock:
+        if _workers:
+            return
+
+        for i in range(worker_count):
+            worker = threading.Thread(
+                target=_worker_loop,
+                name=f"ai-worker-{i}",
+                daemon=True
+            )
+            worker.start()
+            _workers.append(worker)
+
+    logger.info(f"AI PIPELINE → started {worker_count} workers")
+    resume_unfinished()
@@ -1,4 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 
 from backend.app.core.deps import get_db
@@ -7,7 +12,7 @@ from backend.app.users.models import User
 
 from backend.app.tickets.models import (
     Ticket,
-    TicketAIMetadata,
+    TicketCategory,
     TicketStatus,
     TicketMessage
 )
@@ -15,13 +20,31 @@ from backend.app.tickets.models import (
 from backend.app.tickets.schemas import (
     TicketCreate,
     TicketResponse,
-    TicketReply
+    TicketReply,
+    TicketMessageResponse
 )
 
-from backend.app.ai.triage import run_ai_triage
 from backend.app.ai.reply_generator import (
-    generate_auto_reply,
-    generate_agent_draft
+    generate_agent_draft,
+    stream_agent_draft
+)
+from backend.app.ai.llm_client import LLMUnavailable
+from backend.app.ai.conversation_summary import load_history, refresh_history
+from backend.app.tickets.pipeline import enqueue_ticket
+from backend.app.core.tracing import annotate
+from backend.app.tickets.urgency import score_ticket
+from backend.app.tickets.conditional import (
+    thread_state_statement,
+    thread_validators,
+    not_modified
+)
+from backend.app.tickets.pagination import (
+    keyset_page,
+    urgency_page,
+    split_page,
+    encode_urgency_cursor,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE
 )
 
 import logging
@@ -37,29 +60,18 @@ def create_ticket(
     current_user: User = Depends(get_current_user)
 ):
 
-    # 1️⃣ Run AI Triage
-    ai_data = run_ai_triage(ticket.title, ticket.description)
-
-    # Log decision inputs
-    logger.info(
-        f"DECISION ENGINE → confidence={ai_data['confidence']} | risk={ai_data['risk']}"
-    )
-
-    # 2️⃣ Create Ticket
+    # 1️⃣ Persist ticket immediately, AI runs in the background
     new_ticket = Ticket(
         title=ticket.title,
         description=ticket.description,
-        category=ai_data["category"],
-        priority=ai_data["priority"],
-        status=TicketStatus.OPEN,
+        category=TicketCategory.GENERAL,
+        status=TicketStatus.TRIAGING,
         created_by=current_user.id
     )
-
     db.add(new_ticket)
-    db.commit()
-    db.refresh(new_ticket)
+    db.flush()
 
-    # 3️⃣ Save USER message
+    # 2️⃣ Save USER message
     user_message = TicketMessage(
         ticket_id=new_ticket.id,
         sender_id=current_user.id,
@@ -68,64 +80,41 @@ def create_ticket(
     )
     db.add(user_message)
 
-    # 4️⃣ Save AI metadata
-    ai_meta = TicketAIMetadata(
-        ticket_id=new_ticket.id,
-        category=ai_data["category"],
-        priority=ai_data["priority"],
-        sentiment=ai_data["sentiment"],
-        risk=ai_data["risk"],
-        confidence=ai_data["confidence"],
-        ai_summary=ai_data["ai_summary"]
-    )
-    db.add(ai_meta)
-
-    # 5️⃣ Decision Engine
-    if ai_data["confidence"] >= 0.70 and ai_data["risk"] == "LOW":
-
-        new_ticket.status = TicketStatus.AUTO_RESOLVED
-
-        logger.info(f"TICKET {new_ticket.id} AUTO_RESOLVED")
-
-        ai_reply_text = generate_auto_reply(
-            ticket.title,
-            ticket.description,
-            ai_data
-        )
-
-        ai_message = TicketMessage(
-            ticket_id=new_ticket.id,
-            sender_id=None,
-            sender_role="AI",
-            message=ai_reply_text
-        )
-        db.add(ai_message)
-
-    else:
-        new_ticket.status = TicketStatus.PENDING_AGENT
-        logger.info(f"TICKET {new_ticket.id} ROUTED_TO_AGENT")
-
     db.commit()
     db.refresh(new_ticket)
 
+    # 3️⃣ Hand off triage + decision engine + auto-reply to AI workers
+    enqueue_ticket(new_ticket.id)
+    annotate(ticket_id=new_ticket.id)
+    logger.info(f"TICKET {new_ticket.id} QUEUED_FOR_TRIAGE")
+
     return new_ticket
 
 
 @router.get("/my", response_model=list[TicketResponse])
 def get_my_tickets(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return (
+    # Newest first; X-Next-Cursor continues the listing
+    query = (
         db.query(Ticket)
         .options(joinedload(Ticket.ai_metadata))
         .filter(Ticket.created_by == current_user.id)
-        .all()
     )
+    tickets = keyset_page(query, Ticket, cursor, limit, descending=True).all()
+
+    return split_page(tickets, limit, response)
 
 
 @router.get("/agent/pending", response_model=list[TicketResponse])
 def get_pending_tickets_for_agent(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -133,14 +122,42 @@ def get_pending_tickets_for_agent(
     if current_user.role != "AGENT":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    tickets = (
+    # Most urgent first (scored at triage time), oldest first on ties
+    query = (
         db.query(Ticket)
         .options(joinedload(Ticket.ai_metadata))
         .filter(Ticket.status == TicketStatus.PENDING_AGENT)
-        .all()
     )
+    tickets = urgency_page(query, Ticket, cursor, limit).all()
+
+    return split_page(tickets, limit, response, encode=encode_urgency_cursor)
+
+
+def _load_draft_inputs(ticket_id: int, db: Session):
+    ticket = (
+        db.query(Ticket)
+        .options(joinedload(Ticket.ai_metadata))
+        .filter(Ticket.id == ticket_id)
+        .first()
+    )
+
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    if not ticket.ai_metadata:
+        raise HTTPException(status_code=400, detail="AI metadata missing")
 
-    return tickets
+    ai_metadata = {
+        "risk": ticket.ai_metadata.risk,
+        "sentiment": ticket.ai_metadata.sentiment,
+        "confidence": ticket.ai_metadata.confidence,
+        "ai_summary": ticket.ai_metadata.ai_summary
+    }
+
+    # Only messages after the stored summary; the caller folds when due
+    summary, messages = load_history(db, ticket_id)
+
+    return ticket, messages, ai_metadata, summary
 
 
 @router.post("/{ticket_id}/generate-draft")
@@ -153,40 +170,68 @@ def generate_draft_for_agent(
     if current_user.role != "AGENT":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    ticket = (
-        db.query(Ticket)
-        .options(joinedload(Ticket.ai_metadata))
-        .filter(Ticket.id == ticket_id)
-        .first()
-    )
+    ticket, messages, ai_metadata, summary = _load_draft_inputs(ticket_id, db)
 
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
+    # Release the connection before the (long) summary and draft LLM calls
+    db.close()
 
-    messages = (
-        db.query(TicketMessage)
-        .filter(TicketMessage.ticket_id == ticket_id)
-        .order_by(TicketMessage.created_at.asc())
-        .all()
-    )
+    summary, messages = refresh_history(ticket_id, summary, messages)
+
+    try:
+        draft = generate_agent_draft(
+            ticket=ticket,
+            messages=messages,
+            ai_metadata=ai_metadata,
+            summary=summary
+        )
+    except LLMUnavailable:
+        raise HTTPException(status_code=503, detail="AI assistant temporarily unavailable")
+
+    logger.info(f"AI DRAFT GENERATED → Ticket {ticket_id}")
+
+    return {"draft": draft}
 
-    if not ticket.ai_metadata:
-        raise HTTPException(status_code=400, detail="AI metadata missing")
 
-    draft = generate_agent_draft(
+@router.post("/{ticket_id}/generate-draft/stream")
+def stream_draft_for_agent(
+    ticket_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+
+    if current_user.role != "AGENT":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    ticket, messages, ai_metadata, summary = _load_draft_inputs(ticket_id, db)
+    db.close()
+
+    summary, messages = refresh_history(ticket_id, summary, messages)
+
+    # Prompt is built here; only LLM chunks are produced while streaming
+    chunks = stream_agent_draft(
         ticket=ticket,
         messages=messages,
-        ai_metadata={
-            "risk": ticket.ai_metadata.risk,
-            "sentiment": ticket.ai_metadata.sentiment,
-            "confidence": ticket.ai_metadata.confidence,
-            "ai_summary": ticket.ai_metadata.ai_summary
-        }
+        ai_metadata=ai_metadata,
+        summary=summary
     )
 
-    logger.info(f"AI DRAFT GENERATED → Ticket {ticket_id}")
-
-    return {"draft": draft}
+    def event_stream():
+        try:
+            for chunk in chunks:
+                yield f"data: {json.dumps({'token': chunk})}\n\n"
+        except Exception:
+            logger.exception(f"AI DRAFT STREAM FAILED → Ticket {ticket_id}")
+            yield "event: error\ndata: {}\n\n"
+            return
+
+        logger.info(f"AI DRAFT STREAMED → Ticket {ticket_id}")
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/{ticket_id}/reply")
@@ -207,12 +252,18 @@ def reply_to_ticket(
             raise HTTPException(status_code=403, detail="Not authorized")
 
         sender_role = "USER"
-        ticket.status = TicketStatus.PENDING_AGENT
+
+        # Background triage decides the route for tickets still TRIAGING
+        if ticket.status != TicketStatus.TRIAGING:
+            ticket.status = TicketStatus.PENDING_AGENT
 
     elif current_user.role == "AGENT":
 
         sender_role = "AGENT"
-        ticket.status = TicketStatus.WAITING_FOR_USER
+
+        # Same guard: the worker only picks up tickets still TRIAGING
+        if ticket.status != TicketStatus.TRIAGING:
+            ticket.status = TicketStatus.WAITING_FOR_USER
 
     else:
         raise HTTPException(status_code=403, detail="Not authorized")
@@ -225,15 +276,23 @@ def reply_to_ticket(
     )
 
     db.add(new_message)
+
+    # Keep the stored queue rank in step with the ticket's metadata
+    if sender_role == "USER" and ticket.ai_metadata is not None:
+        score_ticket(ticket)
+
     db.commit()
     db.refresh(ticket)
 
     return {"message": "Reply added successfully"}
 
 
-@router.get("/{ticket_id}/messages")
+@router.get("/{ticket_id}/messages", response_model=list[TicketMessageResponse])
 def get_ticket_messages(
     ticket_id: int,
+    request: Request,
+    response: Response,
+    since: Optional[int] = Query(None, description="only messages with a larger id"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -246,10 +305,20 @@ def get_ticket_messages(
     if current_user.role == "USER" and ticket.created_by != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
+    # Unchanged thread → 304 without loading any message rows
+    validators = thread_validators(ticket_id, db.execute(thread_state_statement(ticket_id)).one())
+    cached = not_modified(request, validators)
+    if cached is not None:
+        return cached
+    response.headers.update(validators)
+
+    query = db.query(TicketMessage).filter(TicketMessage.ticket_id == ticket_id)
+    if since is not None:
+        query = query.filter(TicketMessage.id > since)
+
     messages = (
-        db.query(TicketMessage)
-        .filter(TicketMessage.ticket_id == ticket_id)
-        .order_by(TicketMessage.created_at.asc())
+        query
+        .order_by(TicketMessage.created_at.asc(), TicketMessage.id.asc())
         .all()
     )
 
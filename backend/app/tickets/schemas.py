@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from backend.app.tickets.models import TicketCategory, TicketPriority, TicketStatus
 
@@ -27,6 +27,8 @@ class TicketResponse(BaseModel):
     priority: TicketPriority
     status: TicketStatus
     created_at: datetime
+    urgency_score: float = 0.0
+    escalation_reason: Optional[str] = None
     ai_metadata: Optional[TicketAIMetadataResponse]
     class Config:
         orm_mode = True
@@ -34,3 +36,23 @@ from pydantic import BaseModel
 
 class TicketReply(BaseModel):
     message: str
+
+class TicketMessageResponse(BaseModel):
+    id: int
+    ticket_id: int
+    sender_id: Optional[int]
+    sender_role: str
+    message: str
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class BulkTicketRecord(BaseModel):
+    """One line of a POST /tickets/bulk upload."""
+    title: str = Field(..., min_length=1, max_length=200)
+    description: str = Field(..., min_length=1)
+    # Agents importing on behalf of existing users; defaults to the uploader
+    email: Optional[str] = None
+    # Original submission time, kept so imported tickets sort correctly
+    created_at: Optional[datetime] = None
@@ -0,0 +1,63 @@
+"""
+Agent-queue ranking, the weights the dashboard used to sort by. Scores are
+computed when triage metadata is written and again on customer replies,
+stored on the ticket and served pre-sorted.
+"""
+from sqlalchemy.orm import joinedload
+
+HIGH_PRIORITY_WEIGHT = 5.0
+NEGATIVE_SENTIMENT_WEIGHT = 3.0  # scaled by the model's confidence
+
+
+def _normalize(value):
+    # Enum members, raw strings and LLM output in any case
+    return str(getattr(value, "value", value) or "").upper()
+
+
+def urgency_score(priority, sentiment, confidence) -> float:
+    score = HIGH_PRIORITY_WEIGHT if _normalize(priority) == "HIGH" else 0.0
+
+    if _normalize(sentiment) == "NEGATIVE":
+        score += NEGATIVE_SENTIMENT_WEIGHT * float(confidence or 0)
+
+    return round(score, 4)
+
+
+def escalation_reason(priority, sentiment, risk):
+    reasons = []
+    if _normalize(priority) == "HIGH":
+        reasons.append("high priority")
+    if _normalize(sentiment) == "NEGATIVE":
+        reasons.append("negative sentiment")
+    if _normalize(risk) == "HIGH":
+        reasons.append("risk detected")
+
+    if reasons:
+        return "Escalation: " + ", ".join(reasons)
+    return None
+
+
+def score_ticket(ticket) -> float:
+    """Recompute and store `ticket.urgency_score` from its AI metadata."""
+    meta = ticket.ai_metadata
+    if meta is None:
+        ticket.urgency_score = urgency_score(ticket.priority, None, 0)
+    else:
+        ticket.urgency_score = urgency_score(ticket.priority, meta.sentiment, meta.confidence)
+    return ticket.urgency_score
+
+
+def backfill_urgency_scores(db):
+    """Score tickets already queued when the column was added."""
+    from backend.app.tickets.models import Ticket, TicketStatus
+
+    tickets = (
+        db.query(Ticket)
+        .options(joinedload(Ticket.ai_metadata))
+        .filter(Ticket.status == TicketStatus.PENDING_AGENT)
+        .all()
+    )
+    for ticket in tickets:
+        score_ticket(ticket)
+    db.commit()
+    return len(tickets)
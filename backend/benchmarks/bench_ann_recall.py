@@ -0,0 +1,93 @@
+"""
+Recall-vs-latency of the ANN index types against the exact flat index.
+
+    python -m backend.benchmarks.bench_ann_recall --n 200000
+    python -m backend.benchmarks.bench_ann_recall --vectors kb_embeddings.npy
+
+Without --vectors, clustered synthetic 384-d vectors (MiniLM size) are used.
+Pick KB_INDEX_TYPE / KB_NPROBE / KB_EF_SEARCH from the printed table.
+"""
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+from backend.app.ai.index_factory import build_index, apply_search_params
+
+NPROBE_GRID = [1, 4, 16, 64, 128]
+EF_SEARCH_GRID = [16, 32, 64, 128, 256]
+
+
+def synthetic_vectors(n, d, clusters, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, d)).astype("float32")
+    assignment = rng.integers(0, clusters, n)
+    vectors = centers[assignment] + 0.3 * rng.standard_normal((n, d)).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def timed_search(index, queries, k):
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query.reshape(1, -1), k)
+    per_query = (time.perf_counter() - start) / len(queries)
+    _, found = index.search(queries, k)
+    return per_query, found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=100000)
+    parser.add_argument("--d", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--vectors", help=".npy matrix of real embeddings")
+    args = parser.parse_args()
+
+    if args.vectors:
+        data = np.load(args.vectors).astype("float32")
+    else:
+        data = synthetic_vectors(args.n + args.queries, args.d, args.clusters, seed=0)
+
+    base, queries = data[:-args.queries], data[-args.queries:]
+    ids = np.arange(len(base), dtype="int64")
+    print(f"{len(base)} vectors, {len(queries)} queries, k={args.k}\n")
+
+    exact, _ = build_index(base, ids, index_type="flat")
+    flat_latency, truth = timed_search(exact, queries, args.k)
+
+    print(f"{'index':<8} {'param':<14} {'build s':>8} {'ms/query':>9} {'speedup':>8} {'recall@k':>9}")
+    print(f"{'flat':<8} {'-':<14} {'-':>8} {flat_latency * 1000:9.3f} {1.0:8.1f} {1.0:9.3f}")
+
+    for index_type in ("ivf", "hnsw", "ivfpq"):
+        start = time.perf_counter()
+        index, built_as = build_index(base, ids, index_type=index_type, nlist=args.nlist)
+        build_seconds = time.perf_counter() - start
+
+        if built_as == "hnsw":
+            grid = [("efSearch", value, {"ef_search": value}) for value in EF_SEARCH_GRID]
+        else:
+            grid = [("nprobe", value, {"nprobe": value}) for value in NPROBE_GRID]
+
+        for name, value, params in grid:
+            apply_search_params(index, **params)
+            latency, found = timed_search(index, queries, args.k)
+            print(
+                f"{built_as:<8} {f'{name}={value}':<14} {build_seconds:8.1f} "
+                f"{latency * 1000:9.3f} {flat_latency / latency:8.1f} "
+                f"{recall_at_k(found, truth):9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
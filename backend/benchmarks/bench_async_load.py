@@ -0,0 +1,169 @@
+"""
+Sync (threadpool + Session) vs. async (AsyncSession + async LLM) API under
+concurrent agent-draft load. Each mode runs in its own uvicorn process
+against the stub LLM, with the response cache off and the LLM concurrency
+caps lifted, so the server's concurrency model is what is being measured.
+
+    python -m backend.benchmarks.bench_async_load --requests 400 --concurrency 100
+    python -m backend.benchmarks.bench_async_load --database-url postgresql://... --latency-ms 500
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+import httpx
+
+AGENT_EMAIL = "bench-agent@example.com"
+AGENT_PASSWORD = "bench-password"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(tickets):
+    """One agent plus `tickets` triaged tickets waiting for a draft."""
+    from backend.app.core.database import Base, engine, SessionLocal
+    from backend.app.core.security import hash_password
+    from backend.app.users.models import User
+    from backend.app.tickets.models import (
+        Ticket, TicketAIMetadata, TicketMessage, TicketCategory, TicketStatus
+    )
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        agent = db.query(User).filter(User.email == AGENT_EMAIL).first()
+        if agent is None:
+            agent = User(email=AGENT_EMAIL, password_hash=hash_password(AGENT_PASSWORD), role="AGENT")
+            db.add(agent)
+            db.flush()
+
+        ids = []
+        for i in range(tickets):
+            ticket = Ticket(
+                title=f"Refund status {i}",
+                description="I am waiting for a refund for a failed payment.",
+                category=TicketCategory.BILLING,
+                status=TicketStatus.PENDING_AGENT,
+                created_by=agent.id
+            )
+            db.add(ticket)
+            db.flush()
+            db.add(TicketAIMetadata(
+                ticket_id=ticket.id, category="BILLING", priority="MEDIUM",
+                sentiment="NEUTRAL", confidence=0.6, risk="MEDIUM",
+                ai_summary="Customer waiting for a refund."
+            ))
+            db.add(TicketMessage(
+                ticket_id=ticket.id, sender_id=agent.id, sender_role="USER",
+                message=ticket.description
+            ))
+            ids.append(ticket.id)
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def start_server(mode, port, env):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app",
+         "--port", str(port), "--log-level", "warning"],
+        env=dict(env, API_MODE=mode)
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                return proc
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+async def drive(base_url, ticket_ids, requests, concurrency):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        login = await client.post("/auth/login", data={"username": AGENT_EMAIL, "password": AGENT_PASSWORD})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        # Load the embedding model/index before timing
+        (await client.post(f"/tickets/{ticket_ids[0]}/generate-draft", headers=headers)).raise_for_status()
+
+        gate = asyncio.Semaphore(concurrency)
+        latencies, errors = [], 0
+
+        async def one(i):
+            nonlocal errors
+            async with gate:
+                start = time.perf_counter()
+                response = await client.post(
+                    f"/tickets/{ticket_ids[i % len(ticket_ids)]}/generate-draft", headers=headers
+                )
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return elapsed, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--tickets", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--database-url", default="sqlite:///./bench_async_load.db")
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.database_url,
+        LLM_PROVIDER="fake",
+        FAKE_LLM_LATENCY_MS=str(args.latency_ms),
+        LLM_CACHE_ENABLED="false",
+        LLM_MAX_CONCURRENCY=str(args.concurrency * 2),
+        LLM_PURPOSE_CONCURRENCY="",
+        WARMUP_ON_STARTUP="false",
+    )
+    os.environ.update(DATABASE_URL=args.database_url)
+    ticket_ids = seed(args.tickets)
+
+    for mode in args.modes.split(","):
+        port = _free_port()
+        proc = start_server(mode, port, env)
+        try:
+            elapsed, latencies, errors = asyncio.run(
+                drive(f"http://127.0.0.1:{port}", ticket_ids, args.requests, args.concurrency)
+            )
+        finally:
+            proc.terminate()
+            proc.wait()
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+        print(
+            f"{mode:>5}: {len(latencies) / elapsed:7.1f} req/s, "
+            f"p50 {statistics.median(latencies) * 1000 if latencies else 0:7.1f} ms, "
+            f"p95 {p95 * 1000:7.1f} ms, errors {errors}"
+        )
+
+
+if __name__ == "__main__":
+    main()
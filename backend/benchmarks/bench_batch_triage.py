@@ -0,0 +1,159 @@
+"""
+Per-ticket triage cost and latency: one call per ticket vs. batched
+prompts at a few token budgets, against the stub LLM. The stub charges a
+fixed round trip plus a per-output-token delay and reports estimated
+token usage, so a bigger batch means a slower call but fewer of them.
+
+    python -m backend.benchmarks.bench_batch_triage --tickets 400
+    python -m backend.benchmarks.bench_batch_triage --budgets 1000,4000,8000 --max-size 100
+
+Cost uses --input-price / --output-price (USD per million tokens).
+"""
+import os
+import time
+import asyncio
+import argparse
+import statistics
+
+
+def tickets(count):
+    samples = [
+        ("Refund not received", "I cancelled my plan last week and still have not received the refund."),
+        ("Cannot log in", "The password reset email never arrives and I am locked out of my account."),
+        ("App crashes on export", "Every time I export a report the app crashes with an error."),
+        ("Invoice question", "Can I get the invoice for March addressed to my company instead?"),
+        ("Feature request", "Is there a way to schedule reports to be sent every Monday?"),
+        ("Charged twice", "I was charged twice for the same order, this is unacceptable, fix it ASAP."),
+    ]
+    return [
+        (f"{title} #{i}", f"{description} Order reference {1000 + i}.")
+        for i, (title, description) in ((i, samples[i % len(samples)]) for i in range(count))
+    ]
+
+
+class Usage:
+    """Counts calls and tokens from the responses' usage_metadata."""
+
+    def __init__(self, manager):
+        self.calls = self.input_tokens = self.output_tokens = 0
+        original = manager.ainvoke
+
+        async def counted(*args, **kwargs):
+            response = await original(*args, **kwargs)
+            usage = getattr(response, "usage_metadata", None) or {}
+            self.calls += 1
+            self.input_tokens += usage.get("input_tokens", 0)
+            self.output_tokens += usage.get("output_tokens", 0)
+            return response
+
+        manager.ainvoke = counted
+
+    def reset(self):
+        self.calls = self.input_tokens = self.output_tokens = 0
+
+
+async def run_single(items, concurrency):
+    from backend.app.ai.triage import arun_ai_triage
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(title, description):
+        async with slots:
+            start = time.perf_counter()
+            await arun_ai_triage(title, description)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(*item) for item in items))
+    return latencies
+
+
+async def run_batched(items, concurrency, budget, max_size):
+    from backend.app.ai.batch_triage import BatchPlanner, arun_ai_triage_batch
+
+    planner = BatchPlanner(token_budget=budget, max_size=max_size)
+    batches = []
+    for item in items:
+        closed = planner.add(item, *item)
+        if closed:
+            batches.append(closed)
+    batches.append(planner.drain())
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(batch):
+        async with slots:
+            start = time.perf_counter()
+            await arun_ai_triage_batch(batch)
+            # Every ticket in the batch waits for the whole call
+            latencies.extend([time.perf_counter() - start] * len(batch))
+
+    await asyncio.gather(*(one(batch) for batch in batches))
+    return latencies
+
+
+def report(name, items, usage, latencies, wall, args):
+    n = len(items)
+    cost = (usage.input_tokens * args.input_price + usage.output_tokens * args.output_price) / 1e6
+    print(
+        f"{name:>14} {usage.calls:>6} {n / usage.calls:>6.1f} "
+        f"{usage.input_tokens / n:>9.0f} {usage.output_tokens / n:>9.0f} "
+        f"{cost / n * 1e6:>10.2f} "
+        f"{statistics.median(latencies) * 1000:>8.0f} {sorted(latencies)[int(n * 0.95) - 1] * 1000:>8.0f} "
+        f"{n / wall:>8.1f}"
+    )
+
+
+async def main_async(args):
+    from backend.app.ai.llm_client import llm_manager
+
+    usage = Usage(llm_manager)
+    items = tickets(args.tickets)
+
+    print(
+        f"{args.tickets} tickets, concurrency {args.concurrency}, stub LLM "
+        f"{args.latency_ms:.0f} ms + {args.output_token_ms:g} ms/output token"
+    )
+    print(
+        f"{'mode':>14} {'calls':>6} {'t/call':>6} {'in tok/t':>9} {'out tok/t':>9} "
+        f"{'$/1M tix':>10} {'p50 ms':>8} {'p95 ms':>8} {'tix/s':>8}"
+    )
+
+    start = time.perf_counter()
+    latencies = await run_single(items, args.concurrency)
+    report("single", items, usage, latencies, time.perf_counter() - start, args)
+
+    for budget in [int(b) for b in args.budgets.split(",")]:
+        usage.reset()
+        start = time.perf_counter()
+        latencies = await run_batched(items, args.concurrency, budget, args.max_size)
+        report(f"batch@{budget}", items, usage, latencies, time.perf_counter() - start, args)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickets", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--budgets", default="500,1000,2000,4000")
+    parser.add_argument("--max-size", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--output-token-ms", type=float, default=4)
+    parser.add_argument("--input-price", type=float, default=0.05)
+    parser.add_argument("--output-price", type=float, default=0.08)
+    args = parser.parse_args()
+
+    # Module-level settings are read at import time
+    os.environ.update(
+        LLM_PROVIDER="fake",
+        FAKE_LLM_LATENCY_MS=str(args.latency_ms),
+        FAKE_LLM_OUTPUT_TOKEN_MS=str(args.output_token_ms),
+        LLM_CACHE_ENABLED="false",
+        LLM_PURPOSE_CONCURRENCY="",
+        TRIAGE_BATCH_RETRY_SINGLE="true",
+    )
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Ticket ingestion throughput against the stub LLM: the bulk JSONL path
+(concurrent triage, batched inserts) vs. one POST /tickets/ per ticket
+drained by the AI workers. Both run in-process, with the response cache
+off so every ticket pays for its triage call.
+
+    python -m backend.benchmarks.bench_bulk_ingest --tickets 20000
+    python -m backend.benchmarks.bench_bulk_ingest --tickets 50000 --concurrency 128 --baseline 0
+
+Writes to a scratch database: the tables are dropped and recreated.
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+
+
+def records(count):
+    topics = ["refund", "password reset", "invoice", "login error", "plan upgrade", "export"]
+    for i in range(count):
+        topic = topics[i % len(topics)]
+        yield {
+            "title": f"Question about {topic} #{i}",
+            "description": f"Hi, I need help with my {topic}. Reference {i}.",
+        }
+
+
+async def body_chunks(count, chunk_records=200):
+    """The upload as an ASGI server would hand it over, a few KB at a time."""
+    chunk = []
+    for record in records(count):
+        chunk.append(json.dumps(record))
+        if len(chunk) == chunk_records:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk).encode()
+
+
+def reset_database(hash_password):
+    from backend.app.core.database import engine, SessionLocal
+    from backend.app.users.models import User
+    # Base through the ticket models, so their tables are registered on it
+    from backend.app.tickets.models import Base
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(email="bench-bulk@example.com", password_hash=hash_password("x"), role="USER")
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+async def run_bulk(count, owner_id):
+    from backend.app.tickets.bulk import ingest
+
+    summary, progress_lines = None, 0
+    async for line in ingest(body_chunks(count), owner_id, allow_owner_override=False):
+        payload = json.loads(line)
+        if "progress" in payload:
+            progress_lines += 1
+            print(f"  {payload['progress']['inserted']:,} inserted", end="\r")
+        elif "summary" in payload:
+            summary = payload["summary"]
+    print()
+    return summary
+
+
+def run_per_ticket(count, owner_id):
+    """What POST /tickets/ does per request, then the workers' triage."""
+    from backend.app.core.database import SessionLocal
+    from backend.app.tickets.models import Ticket, TicketMessage, TicketCategory, TicketStatus
+    from backend.app.tickets import pipeline
+
+    pipeline.start_workers()
+    start = time.perf_counter()
+    for record in records(count):
+        with SessionLocal() as db:
+            ticket = Ticket(
+                title=record["title"],
+                description=record["description"],
+                category=TicketCategory.GENERAL,
+                status=TicketStatus.TRIAGING,
+                created_by=owner_id
+            )
+            db.add(ticket)
+            db.flush()
+            db.add(TicketMessage(
+                ticket_id=ticket.id, sender_id=owner_id, sender_role="USER",
+                message=record["description"]
+            ))
+            db.commit()
+            pipeline.enqueue_ticket(ticket.id)
+    pipeline._jobs.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickets", type=int, default=20_000)
+    parser.add_argument("--baseline", type=int, default=1000, help="tickets for the per-ticket path (0 skips it)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--database-url", default="sqlite:///./bench_bulk.db")
+    args = parser.parse_args()
+
+    # Module-level settings are read at import time
+    os.environ.update(
+        DATABASE_URL=args.database_url,
+        LLM_PROVIDER="fake",
+        FAKE_LLM_LATENCY_MS=str(args.latency_ms),
+        LLM_CACHE_ENABLED="false",
+        LLM_MAX_CONCURRENCY=str(args.concurrency * 2),
+        LLM_PURPOSE_CONCURRENCY="",
+        BULK_TRIAGE_CONCURRENCY=str(args.concurrency),
+        BULK_INSERT_BATCH=str(args.batch),
+        AI_WORKER_COUNT=str(args.concurrency),
+    )
+    from backend.app.core.security import hash_password
+
+    print(f"stub LLM latency {args.latency_ms:.0f} ms, concurrency {args.concurrency}")
+
+    owner_id = reset_database(hash_password)
+    summary = asyncio.run(run_bulk(args.tickets, owner_id))
+    bulk_rate = summary["inserted"] / summary["elapsed_seconds"]
+    print(
+        f"bulk:       {summary['inserted']:,} tickets in {summary['elapsed_seconds']:.1f}s "
+        f"→ {bulk_rate:,.0f} tickets/s ({summary['failed']} failed)"
+    )
+
+    if args.baseline:
+        owner_id = reset_database(hash_password)
+        elapsed = run_per_ticket(args.baseline, owner_id)
+        print(
+            f"per-ticket: {args.baseline:,} tickets in {elapsed:.1f}s "
+            f"→ {args.baseline / elapsed:,.0f} tickets/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
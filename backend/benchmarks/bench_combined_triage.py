@@ -0,0 +1,71 @@
+"""
+Two-call path (triage, then auto-reply) vs. the single combined call,
+against a stub LLM with a fixed round-trip latency.
+
+    python -m backend.benchmarks.bench_combined_triage --tickets 50 --latency-ms 300
+"""
+import os
+import time
+import argparse
+
+# Measure stub LLM round trips, not cache hits; no database is touched
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from backend.app.ai import triage, reply_generator
+from backend.app.ai.llm_client import llm_manager
+from backend.app.ai.combined_triage import run_ai_triage_with_reply
+from backend.app.tickets.models import TicketStatus
+from backend.app.tickets.pipeline import decide_status
+
+TICKETS = [
+    ("Password reset", "How do I reset my password? The login page does not help."),
+    ("Refund status", "I am waiting for a refund for a failed payment."),
+    ("App crash", "The app crashes with an error every time I open settings."),
+    ("Fraud", "Someone hacked my account and I was charged twice, fix this immediately!"),
+    ("Question", "Do you offer a student plan?"),
+]
+
+
+def two_call(title, description):
+    ai_data = triage.run_ai_triage(title, description)
+    if decide_status(ai_data) == TicketStatus.AUTO_RESOLVED:
+        reply_generator.generate_auto_reply(title, description, ai_data)
+
+
+def combined(title, description):
+    ai_data, reply = run_ai_triage_with_reply(title, description)
+    if decide_status(ai_data) == TicketStatus.AUTO_RESOLVED and reply is None:
+        reply_generator.generate_auto_reply(title, description, ai_data)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickets", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    for temperature in (triage.TRIAGE_TEMPERATURE, reply_generator.REPLY_TEMPERATURE):
+        llm_manager.client(temperature).latency_ms = args.latency_ms
+
+    tickets = [TICKETS[i % len(TICKETS)] for i in range(args.tickets)]
+
+    # Load the embedding model/index before timing
+    run_ai_triage_with_reply(*TICKETS[0])
+
+    for name, handle in [("two-call", two_call), ("combined", combined)]:
+        calls_before = llm_manager.stats["attempts"]
+        start = time.perf_counter()
+        for title, description in tickets:
+            handle(title, description)
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"{name:>9}: {(llm_manager.stats['attempts'] - calls_before) / len(tickets):.2f} LLM calls/ticket, "
+            f"{elapsed / len(tickets) * 1000:7.1f} ms/ticket"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Agent-draft prompt size and latency on a long thread: the whole
+conversation in the prompt vs. the rolling summary + last K messages.
+The thread starts at --messages and grows by a customer/agent exchange
+before each draft, so the summary is caught up once and then folded
+incrementally. The stub LLM charges a round trip plus per-input-token
+and per-output-token delays, so a bigger prompt means a slower draft.
+
+    python -m backend.benchmarks.bench_conversation_summary --messages 200
+    python -m backend.benchmarks.bench_conversation_summary --recent 10 --budget 3000
+
+Writes to a scratch database: the tables are dropped and recreated.
+"""
+import os
+import time
+import random
+import argparse
+import statistics
+
+PHRASES = [
+    "I still cannot access the billing page after the last update",
+    "we checked the invoice for order {n} and the amount looks wrong",
+    "could you confirm whether the refund was issued to the original card",
+    "the export keeps failing with error {n} on the reports screen",
+    "I tried clearing the cache and logging in again but nothing changed",
+    "our team plan renews on the {n}th and we need this fixed before then",
+    "please escalate this, it has been going on for more than a week",
+    "thanks, I will try the steps you suggested and report back",
+]
+
+
+def message_text(rng):
+    return ". ".join(
+        rng.choice(PHRASES).format(n=rng.randint(2, 9999)) for _ in range(rng.randint(2, 5))
+    ).capitalize() + "."
+
+
+def reset_database(hash_password, messages):
+    from backend.app.core.database import Base, engine, SessionLocal
+    from backend.app.users.models import User
+    from backend.app.tickets.models import Ticket, TicketAIMetadata, TicketCategory, TicketStatus
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(email="bench-summary@example.com", password_hash=hash_password("x"), role="USER")
+        db.add(user)
+        db.flush()
+        ticket = Ticket(
+            title="Refund and export problems on team plan",
+            description="I was charged twice and the reports export is broken.",
+            category=TicketCategory.BILLING,
+            status=TicketStatus.PENDING_AGENT,
+            created_by=user.id
+        )
+        db.add(ticket)
+        db.flush()
+        db.add(TicketAIMetadata(
+            ticket_id=ticket.id, category="BILLING", priority="HIGH", sentiment="NEGATIVE",
+            confidence=0.9, risk="MEDIUM", ai_summary="Double charge and broken export", source="llm"
+        ))
+        db.commit()
+        add_messages(ticket.id, user.id, messages, random.Random(1))
+        return ticket.id, user.id
+
+
+def add_messages(ticket_id, user_id, count, rng):
+    from backend.app.core.database import SessionLocal
+    from backend.app.tickets.models import TicketMessage
+
+    with SessionLocal() as db:
+        for i in range(count):
+            role = "USER" if i % 2 == 0 else "AGENT"
+            db.add(TicketMessage(
+                ticket_id=ticket_id,
+                sender_id=user_id if role == "USER" else None,
+                sender_role=role,
+                message=message_text(rng)
+            ))
+        db.commit()
+
+
+class Usage:
+    """Input tokens and calls per purpose, from the responses' usage_metadata."""
+
+    def __init__(self, manager):
+        self.by_purpose = {}
+        original = manager.invoke
+
+        def counted(purpose, *args, **kwargs):
+            response = original(purpose, *args, **kwargs)
+            usage = getattr(response, "usage_metadata", None) or {}
+            calls, tokens = self.by_purpose.get(purpose, (0, 0))
+            self.by_purpose[purpose] = (calls + 1, tokens + usage.get("input_tokens", 0))
+            return response
+
+        manager.invoke = counted
+
+    def take(self, purpose):
+        return self.by_purpose.pop(purpose, (0, 0))
+
+
+def run(mode, args, usage, hash_password):
+    from backend.app.core.database import SessionLocal
+    from backend.app.ai import conversation_summary
+    from backend.app.ai.conversation_summary import load_history, refresh_history
+    from backend.app.ai.reply_generator import generate_agent_draft
+    from backend.app.tickets.models import Ticket
+
+    rolling = mode == "rolling"
+    # The pre-summary behaviour: every message, no cap
+    conversation_summary.CONVERSATION_SUMMARY_ENABLED = rolling
+    conversation_summary.DRAFT_HISTORY_TOKEN_BUDGET = args.budget if rolling else 0
+
+    ticket_id, user_id = reset_database(hash_password, args.messages)
+    rng = random.Random(2)
+    rows = []
+    for _ in range(args.drafts):
+        add_messages(ticket_id, user_id, 2, rng)
+
+        start = time.perf_counter()
+        with SessionLocal() as db:
+            ticket = db.get(Ticket, ticket_id)
+            meta = ticket.ai_metadata
+            ai_metadata = {
+                "risk": meta.risk, "sentiment": meta.sentiment,
+                "confidence": meta.confidence, "ai_summary": meta.ai_summary
+            }
+            summary, messages = load_history(db, ticket_id)
+            summary, messages = refresh_history(ticket_id, summary, messages)
+            generate_agent_draft(ticket, messages, ai_metadata, summary=summary)
+        elapsed = time.perf_counter() - start
+
+        _, draft_tokens = usage.take("draft")
+        summary_calls, summary_tokens = usage.take("summary")
+        rows.append((elapsed, draft_tokens, summary_calls, summary_tokens))
+    return rows
+
+
+def report(mode, rows):
+    latencies = [row[0] * 1000 for row in rows]
+    draft_tokens = [row[1] for row in rows]
+    summary_calls = sum(row[2] for row in rows)
+    total_tokens = sum(row[1] + row[3] for row in rows)
+    print(
+        f"{mode:>8} {draft_tokens[0]:>8,} {draft_tokens[-1]:>8,} {summary_calls:>6} "
+        f"{total_tokens / len(rows):>10,.0f} {latencies[0]:>8.0f} "
+        f"{statistics.median(latencies[1:] or latencies):>8.0f} {max(latencies):>8.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--drafts", type=int, default=20, help="drafts, each after 2 new messages")
+    parser.add_argument("--recent", type=int, default=6)
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--input-token-ms", type=float, default=0.1)
+    parser.add_argument("--output-token-ms", type=float, default=4)
+    parser.add_argument("--database-url", default="sqlite:///./bench_summary.db")
+    args = parser.parse_args()
+
+    # Module-level settings are read at import time
+    os.environ.update(
+        DATABASE_URL=args.database_url,
+        LLM_PROVIDER="fake",
+        FAKE_LLM_LATENCY_MS=str(args.latency_ms),
+        FAKE_LLM_INPUT_TOKEN_MS=str(args.input_token_ms),
+        FAKE_LLM_OUTPUT_TOKEN_MS=str(args.output_token_ms),
+        LLM_CACHE_ENABLED="false",
+        DRAFT_RECENT_MESSAGES=str(args.recent),
+    )
+    from backend.app.core.security import hash_password
+    from backend.app.ai.llm_client import llm_manager
+    from backend.app.ai.vector_store import model
+
+    usage = Usage(llm_manager)
+    model.get()
+
+    print(
+        f"{args.messages}-message thread, +2 messages per draft, {args.drafts} drafts; stub LLM "
+        f"{args.latency_ms:.0f} ms + {args.input_token_ms:g} ms/input token + "
+        f"{args.output_token_ms:g} ms/output token"
+    )
+    print(
+        f"{'history':>8} {'1st tok':>8} {'last tok':>8} {'sums':>6} {'in tok/dr':>10} "
+        f"{'1st ms':>8} {'p50 ms':>8} {'max ms':>8}"
+    )
+    for mode in ("full", "rolling"):
+        report(mode, run(mode, args, usage, hash_password))
+    print("(tok: draft prompt tokens; in tok/dr: draft + summary input tokens per draft)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+The HTTP side of one agent-dashboard render (pending queue + open
+conversation), the way the Streamlit app used to fetch it and the way it
+does now. Runs against a local uvicorn with seeded data.
+
+    python -m backend.benchmarks.bench_dashboard_fetch --renders 50
+
+before: bare requests.get per call (new TCP connection each), serial,
+        full thread every time
+after:  pooled keep-alive Session, queue and thread fetched concurrently,
+        conditional thread fetch (304 when unchanged)
+cached: as after, with the queue served from the TTL cache (no request)
+"""
+import os
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from backend.benchmarks.bench_async_load import (
+    AGENT_EMAIL,
+    AGENT_PASSWORD,
+    seed,
+    start_server,
+    _free_port
+)
+
+
+def render_before(base, headers, ticket_id):
+    requests.get(f"{base}/tickets/agent/pending", headers=headers, params={"limit": 50}).json()
+    requests.get(f"{base}/tickets/{ticket_id}/messages", headers=headers).json()
+
+
+def make_render_after(session, pool, etags, cached_queue):
+    def queue(base, headers):
+        if cached_queue:
+            return None
+        return session.get(f"{base}/tickets/agent/pending", headers=headers, params={"limit": 50}).json()
+
+    def thread(base, headers, ticket_id):
+        conditional = dict(headers)
+        if ticket_id in etags:
+            conditional["If-None-Match"] = etags[ticket_id]
+        r = session.get(f"{base}/tickets/{ticket_id}/messages", headers=conditional)
+        etags[ticket_id] = r.headers.get("ETag")
+
+    def render(base, headers, ticket_id):
+        futures = [pool.submit(queue, base, headers), pool.submit(thread, base, headers, ticket_id)]
+        for future in futures:
+            future.result()
+
+    return render
+
+
+def measure(render, base, headers, ticket_ids, renders):
+    timings = []
+    for i in range(renders):
+        start = time.perf_counter()
+        render(base, headers, ticket_ids[i % len(ticket_ids)])
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--renders", type=int, default=50)
+    parser.add_argument("--tickets", type=int, default=200)
+    parser.add_argument("--database-url", default="sqlite:///./bench_dashboard.db")
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.database_url,
+        LLM_PROVIDER="fake",
+        WARMUP_ON_STARTUP="false",
+    )
+    os.environ.update(DATABASE_URL=args.database_url)
+    # A handful of open conversations, revisited across renders
+    ticket_ids = seed(args.tickets)[:5]
+
+    port = _free_port()
+    proc = start_server("sync", port, env)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        token = requests.post(
+            f"{base}/auth/login", data={"username": AGENT_EMAIL, "password": AGENT_PASSWORD}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=4) as pool:
+            variants = [
+                ("before", render_before),
+                ("after", make_render_after(session, pool, {}, cached_queue=False)),
+                ("cached", make_render_after(session, pool, {}, cached_queue=True)),
+            ]
+            for name, render in variants:
+                render(base, headers, ticket_ids[0])  # first-use costs outside the timing
+                timings = measure(render, base, headers, ticket_ids, args.renders)
+                print(
+                    f"{name:>7}: median {statistics.median(timings):7.2f} ms, "
+                    f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:7.2f} ms per render"
+                )
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Retrieval throughput with and without the micro-batching embedding service.
+
+    python -m backend.benchmarks.bench_embedding_batching --threads 16 --queries 512
+"""
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.app.ai.vector_store import model, knowledge_base
+from backend.app.ai.embedding_service import embedding_service
+
+QUERIES = [
+    "How do I reset my password?",
+    "I was charged twice for my subscription",
+    "The app keeps crashing when I open it",
+    "Where can I download my invoice?",
+    "My refund has not arrived yet",
+    "I cannot log in to my account",
+]
+
+
+def unbatched_search(query, k=3):
+    return knowledge_base.get().index.search(model.get().encode([query]), k)
+
+
+def batched_search(query, k=3):
+    return embedding_service.search(query, k)
+
+
+def run(search, threads, total):
+    queries = [QUERIES[i % len(QUERIES)] + f" #{i}" for i in range(total)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(search, queries))
+    elapsed = time.perf_counter() - start
+    return total / elapsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=512)
+    args = parser.parse_args()
+
+    # Warm both paths so model initialisation is not measured
+    unbatched_search(QUERIES[0])
+    batched_search(QUERIES[0])
+
+    for name, search in [("unbatched", unbatched_search), ("batched", batched_search)]:
+        qps, elapsed = run(search, args.threads, args.queries)
+        print(f"{name:>10}: {qps:8.1f} queries/s  ({elapsed:.2f}s for {args.queries})")
+
+    stats = embedding_service.stats
+    if stats["batches"]:
+        print(
+            f"batches={stats['batches']} "
+            f"avg_batch={stats['requests'] / stats['batches']:.1f} "
+            f"max_batch={stats['max_batch']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+kNN fast-path triage: training time, prediction latency/throughput, and
+how coverage (tickets that skip the LLM) trades against agreement with
+the LLM's labels as the confidence threshold moves.
+
+History and evaluation tickets are generated from routine templates and
+labelled through run_ai_triage with the stub LLM, standing in for the
+LLM-labelled history the service trains on. Needs the real
+sentence-transformers model for meaningful agreement numbers.
+
+    python -m backend.benchmarks.bench_knn_triage --history 5000 --eval 1000
+"""
+import os
+import time
+import random
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+TEMPLATES = [
+    "I was charged {n} times for my {plan} subscription, please refund the extra payment",
+    "Where can I download the invoice for my {plan} plan for {month}?",
+    "My refund for order {n} has not arrived yet",
+    "I forgot my password and the reset link for my account does not work",
+    "Cannot log in to my account since {month}, it says invalid credentials",
+    "The app crashes with an error when I open the {feature} page",
+    "Export to {feature} is broken and shows error {n}",
+    "How do I change the {feature} settings on the {plan} plan?",
+    "Is there a way to add more users to my {plan} plan?",
+    "This is unacceptable, I was charged twice and need this fixed immediately",
+    "My account was hacked and someone changed my email, urgent",
+]
+FILLERS = {
+    "plan": ["basic", "pro", "team", "enterprise"],
+    "month": ["January", "March", "June", "October"],
+    "feature": ["dashboard", "CSV", "reports", "billing", "notifications"],
+}
+
+
+def synth(count, seed):
+    rng = random.Random(seed)
+    tickets = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        text = template.format(
+            n=rng.randint(2, 9999),
+            **{key: rng.choice(values) for key, values in FILLERS.items()}
+        )
+        tickets.append((text.split(",")[0][:60], text))
+    return tickets
+
+
+def percentile(values, p):
+    return sorted(values)[max(int(len(values) * p) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=5000)
+    parser.add_argument("--eval", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--thresholds", default="0.6,0.7,0.8,0.9,0.95")
+    args = parser.parse_args()
+
+    # Labels come from the stub; nothing here should wait on it or a cache
+    os.environ.update(
+        DATABASE_URL=os.environ.get("DATABASE_URL", "sqlite://"),
+        LLM_PROVIDER="fake",
+        FAKE_LLM_LATENCY_MS="0",
+        LLM_CACHE_ENABLED="false",
+        KNN_TRIAGE_ENABLED="true",
+    )
+    from backend.app.ai.triage import run_ai_triage
+    from backend.app.ai.vector_store import model
+    from backend.app.ai.knn_triage import knn_triage, ticket_text, FIELDS
+
+    history, evaluation = synth(args.history, seed=1), synth(args.eval, seed=2)
+
+    def labelled(tickets):
+        return [(ticket_text(t, d), run_ai_triage(t, d)) for t, d in tickets]
+
+    history_examples = labelled(history)
+    eval_examples = labelled(evaluation)
+
+    model.get()
+    start = time.perf_counter()
+    knn_triage.train([(text, {f: label[f] for f in FIELDS}) for text, label in history_examples])
+    print(f"trained on {len(history_examples):,} tickets in {time.perf_counter() - start:.2f}s")
+
+    # Latency of the whole fast path (embed + search + vote), one at a time
+    latencies = []
+    for title, description in evaluation[:200]:
+        start = time.perf_counter()
+        knn_triage.predict(title, description)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(
+        f"predict latency: p50 {statistics.median(latencies):.2f} ms, "
+        f"p95 {percentile(latencies, 0.95):.2f} ms"
+    )
+
+    # Concurrent callers share embedding batches
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(lambda ticket: knn_triage.predict(*ticket), evaluation))
+    print(f"throughput ({args.threads} threads): {len(evaluation) / (time.perf_counter() - start):,.0f} predictions/s")
+
+    embeddings = model.get().encode([text for text, _ in eval_examples])
+    votes = [knn_triage.vote(embedding) for embedding in embeddings]
+
+    print(f"\n{'threshold':>9} {'skip LLM':>9} {'agree':>7} " + " ".join(f"{f:>9}" for f in FIELDS))
+    for threshold in [float(t) for t in args.thresholds.split(",")]:
+        confident = [
+            (voted[0], label)
+            for voted, (_, label) in zip(votes, eval_examples)
+            if voted is not None and voted[1] >= threshold
+        ]
+        if not confident:
+            print(f"{threshold:>9.2f} {0:>8.1%}")
+            continue
+        agree = sum(all(p[f] == l[f] for f in FIELDS) for p, l in confident) / len(confident)
+        fields = [sum(p[f] == l[f] for p, l in confident) / len(confident) for f in FIELDS]
+        print(
+            f"{threshold:>9.2f} {len(confident) / len(eval_examples):>8.1%} {agree:>6.1%} "
+            + " ".join(f"{rate:>8.1%}" for rate in fields)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Triage under a degraded provider, using the fake LLM with injected latency
+and errors. Shows how often callers fall back, how long they wait, and what
+the circuit breaker did.
+
+    python -m backend.benchmarks.bench_llm_resilience --error-rate 0.6 --latency-ms 400
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["LLM_PROVIDER"] = "fake"
+
+from backend.app.ai import triage
+from backend.app.ai.llm_client import llm_manager, llm_stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--error-rate", type=float, default=0.6)
+    args = parser.parse_args()
+
+    client = llm_manager.client(triage.TRIAGE_TEMPERATURE)
+    client.latency_ms = args.latency_ms
+    client.error_rate = args.error_rate
+
+    def one(i):
+        start = time.perf_counter()
+        result = triage.run_ai_triage(f"Ticket {i}", "I cannot log in to my account")
+        return time.perf_counter() - start, result["ai_summary"] == "AI parsing failed."
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(one, range(args.requests)))
+
+    latencies = sorted(latency for latency, _ in results)
+    fallbacks = sum(1 for _, fell_back in results if fell_back)
+
+    print(f"requests={args.requests} fallbacks={fallbacks} ({fallbacks / args.requests:.0%})")
+    print(
+        f"latency p50={latencies[len(latencies) // 2] * 1000:.0f}ms "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:.0f}ms "
+        f"max={latencies[-1] * 1000:.0f}ms"
+    )
+    print(llm_stats())
+
+
+if __name__ == "__main__":
+    main()
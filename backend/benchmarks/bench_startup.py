@@ -0,0 +1,74 @@
+"""
+Cold-start cost of the backend: module import, app startup and first requests.
+Each run happens in a fresh interpreter so nothing is already imported.
+
+    python -m backend.benchmarks.bench_startup
+    python -m backend.benchmarks.bench_startup --warmup --output startup.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import backend.app.main as main
+t1 = time.perf_counter()
+
+from fastapi.testclient import TestClient
+from backend.app.core import startup
+from backend.app.ai.rag import retrieve_context
+
+result = {"import_seconds": t1 - t0}
+
+with TestClient(main.app) as client:
+    t2 = time.perf_counter()
+    result["startup_seconds"] = t2 - t1
+
+    if startup.WARMUP_ON_STARTUP:
+        while not (startup.readiness["warmed_up"] or startup.readiness["warm_up_error"]):
+            time.sleep(0.05)
+        result["warm_up_seconds"] = time.perf_counter() - t2
+
+    t3 = time.perf_counter()
+    client.get("/")
+    result["first_health_request_seconds"] = time.perf_counter() - t3
+
+    t4 = time.perf_counter()
+    retrieve_context("How do I reset my password?")
+    result["first_retrieval_seconds"] = time.perf_counter() - t4
+
+    t5 = time.perf_counter()
+    retrieve_context("Refund for a failed payment")
+    result["second_retrieval_seconds"] = time.perf_counter() - t5
+
+print(json.dumps(result))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--warmup", action="store_true", help="run with WARMUP_ON_STARTUP=true")
+    parser.add_argument("--output", help="write the measurements to this JSON file")
+    args = parser.parse_args()
+
+    env = dict(os.environ, WARMUP_ON_STARTUP="true" if args.warmup else "false")
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        env=env, capture_output=True, text=True, check=True
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["mode"] = "warmup" if args.warmup else "lazy"
+
+    for key, value in result.items():
+        print(f"{key:>30}: {value if isinstance(value, str) else f'{value:.3f}s'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
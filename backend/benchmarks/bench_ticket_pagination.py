@@ -0,0 +1,128 @@
+"""
+Page fetch latency at increasing depths of a large ticket table: keyset
+cursors (what the listing endpoints use) vs. LIMIT/OFFSET.
+
+    python -m backend.benchmarks.bench_ticket_pagination --tickets 2000000
+    python -m backend.benchmarks.bench_ticket_pagination --database-url postgresql://... --reuse
+
+Seeding drops and recreates the tables: point it at a scratch database.
+"""
+import os
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# Only the model metadata is used; the benchmark builds its own engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.orm import Session, joinedload
+
+from backend.app.core.database import Base
+from backend.app.users.models import User
+from backend.app.tickets.models import (
+    Ticket, TicketCategory, TicketPriority, TicketStatus
+)
+from backend.app.tickets.pagination import keyset_page, encode_cursor
+
+BATCH = 50_000
+STATUSES = [TicketStatus.PENDING_AGENT, TicketStatus.AUTO_RESOLVED, TicketStatus.CLOSED]
+
+
+def seed(engine, tickets, users):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i + 1, "email": f"u{i}@example.com", "password_hash": "x", "role": "USER"}
+            for i in range(users)
+        ])
+
+        for offset in range(0, tickets, BATCH):
+            rows = []
+            for i in range(offset, min(offset + BATCH, tickets)):
+                rows.append({
+                    "id": i + 1,
+                    "title": f"Ticket {i}",
+                    "description": "Benchmark ticket",
+                    "category": TicketCategory.GENERAL,
+                    "priority": TicketPriority.MEDIUM,
+                    "status": random.choice(STATUSES),
+                    "created_by": random.randint(1, users),
+                    "created_at": start + timedelta(seconds=i),
+                    "updated_at": start + timedelta(seconds=i),
+                })
+            conn.execute(insert(Ticket), rows)
+            print(f"seeded {offset + len(rows):,} tickets", end="\r")
+    print()
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def pending_query():
+    return (
+        select(Ticket)
+        .options(joinedload(Ticket.ai_metadata))
+        .where(Ticket.status == TicketStatus.PENDING_AGENT)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickets", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--depths", default="0,1000,10000,100000,500000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default="sqlite:///./bench_pagination.db")
+    parser.add_argument("--reuse", action="store_true", help="skip seeding an existing table")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if not args.reuse:
+        seed(engine, args.tickets, args.users)
+
+    limit = args.page_size
+
+    with Session(engine) as db:
+        pending = db.scalar(
+            select(func.count()).select_from(Ticket).where(Ticket.status == TicketStatus.PENDING_AGENT)
+        )
+        print(f"{pending:,} pending tickets, page size {limit}")
+        print(f"{'depth (rows)':>14} {'offset ms':>10} {'keyset ms':>10}")
+
+        for depth in [int(d) for d in args.depths.split(",")]:
+            if depth >= pending:
+                break
+
+            # The row just before the page is what a client's cursor encodes
+            cursor = None
+            if depth:
+                anchor = db.scalars(
+                    pending_query().order_by(Ticket.created_at, Ticket.id).offset(depth - 1).limit(1)
+                ).unique().one()
+                cursor = encode_cursor(anchor)
+
+            offset_ms = timed(lambda: db.scalars(
+                pending_query().order_by(Ticket.created_at, Ticket.id).offset(depth).limit(limit)
+            ).unique().all(), args.repeat)
+
+            keyset_ms = timed(lambda: db.scalars(
+                keyset_page(pending_query(), Ticket, cursor, limit)
+            ).unique().all(), args.repeat)
+
+            print(f"{depth:>14,} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
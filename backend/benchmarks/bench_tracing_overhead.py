@@ -0,0 +1,160 @@
+"""
+Cost of stage tracing. Each mode runs in a fresh interpreter, since the
+settings are read at import time:
+
+    off      TRACING_ENABLED=false (@traced returns the plain function)
+    on       Server-Timing on every request, nothing kept
+    logged   as on, every trace kept and written to a JSON lines file
+
+Reports the per-call cost of a traced function (inside and outside a
+trace) and POST /tickets/ + generate-draft latency through the app.
+
+    python -m backend.benchmarks.bench_tracing_overhead
+    python -m backend.benchmarks.bench_tracing_overhead --requests 500
+
+Writes to scratch databases next to --database-path.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+MODES = {
+    "off": {"TRACING_ENABLED": "false"},
+    "on": {"TRACING_ENABLED": "true", "TRACE_SAMPLE_RATE": "0", "TRACE_SLOW_MS": "0"},
+    "logged": {"TRACING_ENABLED": "true", "TRACE_SAMPLE_RATE": "1", "TRACE_SLOW_MS": "0"},
+}
+
+PROBE = r"""
+import sys, json, time, statistics
+from fastapi.testclient import TestClient
+
+import backend.app.main as main
+from backend.app.core import tracing
+from backend.app.core.database import SessionLocal
+from backend.app.core.security import hash_password
+from backend.app.users.models import User
+from backend.app.tickets.pipeline import _jobs
+
+requests, calls = int(sys.argv[1]), int(sys.argv[2])
+
+
+@tracing.traced("bench")
+def stage():
+    return None
+
+
+def per_call_ns():
+    start = time.perf_counter()
+    for _ in range(calls):
+        stage()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+result = {"outside_trace_ns": per_call_ns()}
+with tracing.start_trace("bench"):
+    # Stays under TRACE_MAX_SPANS: later calls take the cheap no-op path
+    start = time.perf_counter()
+    for _ in range(min(calls, tracing.TRACE_MAX_SPANS)):
+        stage()
+    result["inside_trace_ns"] = (
+        (time.perf_counter() - start) / min(calls, tracing.TRACE_MAX_SPANS) * 1e9
+    )
+
+
+def timed(client, method, url, **kwargs):
+    start = time.perf_counter()
+    response = getattr(client, method)(url, **kwargs)
+    elapsed = (time.perf_counter() - start) * 1000
+    assert response.status_code == 200, response.text
+    return elapsed
+
+
+with TestClient(main.app) as client:
+    with SessionLocal() as db:
+        db.add(User(email="bench-agent@example.com", password_hash=hash_password("x"), role="AGENT"))
+        db.commit()
+    client.post("/auth/register", json={"email": "bench-user@example.com", "password": "password1"})
+    user = client.post(
+        "/auth/login", data={"username": "bench-user@example.com", "password": "password1"}
+    ).json()["access_token"]
+    agent = client.post(
+        "/auth/login", data={"username": "bench-agent@example.com", "password": "x"}
+    ).json()["access_token"]
+    user_headers = {"Authorization": f"Bearer {user}"}
+    agent_headers = {"Authorization": f"Bearer {agent}"}
+
+    ticket = {"title": "Billing question", "description": "I was charged twice for my plan"}
+    for _ in range(20):
+        client.post("/tickets/", json=ticket, headers=user_headers)
+    _jobs.join()
+    ticket_id = client.post("/tickets/", json=ticket, headers=user_headers).json()["id"]
+    _jobs.join()
+
+    create, draft = [], []
+    for _ in range(requests):
+        create.append(timed(client, "post", "/tickets/", json=ticket, headers=user_headers))
+        # Triage runs on the workers: keep it out of the next measurement
+        _jobs.join()
+        draft.append(timed(client, "post", f"/tickets/{ticket_id}/generate-draft", headers=agent_headers))
+
+    for name, samples in (("create", create), ("draft", draft)):
+        result[f"{name}_p50_ms"] = statistics.median(samples)
+        result[f"{name}_mean_ms"] = statistics.fmean(samples)
+    result["kept_traces"] = tracing.tracing_stats()["kept_sampled"]
+
+print(json.dumps(result))
+"""
+
+
+def run(mode, args):
+    base, ext = os.path.splitext(args.database_path)
+    database = f"{base}_{mode}{ext}"
+    if os.path.exists(database):
+        os.remove(database)
+    trace_log = f"{base}_{mode}_traces.jsonl"
+    if os.path.exists(trace_log):
+        os.remove(trace_log)
+
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{database}",
+        LLM_PROVIDER="fake",
+        FAKE_LLM_LATENCY_MS="0",
+        LLM_CACHE_ENABLED="false",
+        WARMUP_ON_STARTUP="false",
+        TRACE_LOG_PATH=trace_log,
+        **MODES[mode],
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, str(args.requests), str(args.calls)],
+        env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200, help="ticket creations and drafts per mode")
+    parser.add_argument("--calls", type=int, default=200_000, help="traced function calls per mode")
+    parser.add_argument("--database-path", default="./bench_tracing.db")
+    args = parser.parse_args()
+
+    print(f"{args.requests} creates + drafts per mode; stub LLM with no latency")
+    print(
+        f"{'mode':>8} {'out ns':>8} {'in ns':>8} {'create p50':>11} {'mean':>7} "
+        f"{'draft p50':>10} {'mean':>7} {'kept':>6}"
+    )
+    for mode in MODES:
+        r = run(mode, args)
+        print(
+            f"{mode:>8} {r['outside_trace_ns']:>8.0f} {r['inside_trace_ns']:>8.0f} "
+            f"{r['create_p50_ms']:>11.2f} {r['create_mean_ms']:>7.2f} "
+            f"{r['draft_p50_ms']:>10.2f} {r['draft_mean_ms']:>7.2f} {r['kept_traces']:>6}"
+        )
+    print("(out/in ns: one call of a traced no-op function outside / inside a trace)")
+
+
+if __name__ == "__main__":
+    main()
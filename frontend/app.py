@@ -1,8 +1,21 @@
+import json
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 BASE_URL = "http://localhost:8000"
 
+# Ticket lists are also refreshed by pushed updates and after our own writes
+TICKET_CACHE_TTL_SECONDS = 30
+
+render_started = time.perf_counter()
+
 st.set_page_config(
     page_title="SupportIQ",
     page_icon="🤖",
@@ -24,23 +37,222 @@ if "selected_ticket" not in st.session_state:
 if "agent_draft" not in st.session_state:
     st.session_state.agent_draft = ""
 
+# ticket id -> {"etag", "messages"}; reruns only fetch what changed
+if "message_cache" not in st.session_state:
+    st.session_state.message_cache = {}
+
+# Cursors of the ticket-list pages shown so far ("Load more" appends one)
+if "page_cursors" not in st.session_state:
+    st.session_state.page_cursors = [None]
+
+# Part of every ticket-list cache key; bumping it invalidates this user's lists
+if "cache_generation" not in st.session_state:
+    st.session_state.cache_generation = 0
+
+if "render_times" not in st.session_state:
+    st.session_state.render_times = []
+
 # =====================================================
 # API FUNCTIONS
 # =====================================================
+@st.cache_resource
+def http_client():
+    # One keep-alive connection pool shared by every rerun and session
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+api = http_client()
+
+class ApiError(Exception):
+    pass
+
 def register_request(email, password):
-    return requests.post(
+    return api.post(
         f"{BASE_URL}/auth/register",
         json={"email": email, "password": password}
     )
 
 def login_request(email, password):
-    return requests.post(
+    return api.post(
         f"{BASE_URL}/auth/login",
         data={"username": email, "password": password}
     )
 
-def auth_headers():
-    return {"Authorization": f"Bearer {st.session_state.token}"}
+def auth_headers(token=None):
+    return {"Authorization": f"Bearer {token or st.session_state.token}"}
+
+def invalidate_tickets():
+    st.session_state.cache_generation += 1
+
+def run_parallel(*calls):
+    """Runs independent (fn, *args) calls concurrently, results in order."""
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=len(calls),
+        initializer=add_script_run_ctx,
+        initargs=(None, ctx)
+    ) as pool:
+        futures = [pool.submit(fn, *args) for fn, *args in calls]
+        return [future.result() for future in futures]
+
+PAGE_SIZE = 50
+
+@st.cache_data(ttl=TICKET_CACHE_TTL_SECONDS, show_spinner=False)
+def get_ticket_page(token, path, cursor, generation):
+    # Errors raise instead of returning, so they are never cached
+    params = {"limit": PAGE_SIZE}
+    if cursor:
+        params["cursor"] = cursor
+    r = api.get(f"{BASE_URL}{path}", headers=auth_headers(token), params=params)
+    if r.status_code != 200:
+        raise ApiError(r.status_code)
+    return r.json(), r.headers.get("X-Next-Cursor")
+
+def load_ticket_pages(token, path, cursors, generation):
+    # Keyset pages: cursors of pages already shown are known, fetch them together
+    try:
+        pages = run_parallel(*[(get_ticket_page, token, path, c, generation) for c in cursors])
+    except (ApiError, requests.RequestException):
+        return None, None
+    tickets = [t for page, _ in pages for t in page]
+    return tickets, pages[-1][1]
+
+def ticket_pages_call(path):
+    return (
+        load_ticket_pages,
+        st.session_state.token,
+        path,
+        list(st.session_state.page_cursors),
+        st.session_state.cache_generation
+    )
+
+def load_messages(token, ticket_id, cached):
+    """Thread cache entry {"etag", "messages"} after a conditional fetch."""
+    headers = auth_headers(token)
+    params = {}
+    if cached:
+        headers["If-None-Match"] = cached["etag"]
+        if cached["messages"]:
+            params["since"] = cached["messages"][-1]["id"]
+
+    r = api.get(f"{BASE_URL}/tickets/{ticket_id}/messages", headers=headers, params=params)
+
+    if r.status_code == 304:
+        return cached
+    if r.status_code != 200:
+        return cached or {"etag": None, "messages": []}
+
+    messages = (cached["messages"] if cached and "since" in params else []) + r.json()
+    return {"etag": r.headers.get("ETag"), "messages": messages}
+
+def messages_call(ticket_id):
+    if not ticket_id:
+        return (lambda: None,)
+    return (load_messages, st.session_state.token, ticket_id, st.session_state.message_cache.get(ticket_id))
+
+def store_messages(ticket_id, entry):
+    if entry is None:
+        return []
+    st.session_state.message_cache[ticket_id] = entry
+    return entry["messages"]
+
+def listen_events(token, inbox, stop):
+    # Background SSE reader: the server pushes ticket updates, nothing polls
+    backoff = 1
+    while not stop.is_set():
+        try:
+            with requests.get(
+                f"{BASE_URL}/events/stream",
+                headers={"Authorization": f"Bearer {token}"},
+                stream=True,
+                timeout=(5, 60)
+            ) as r:
+                backoff = 1
+                event = None
+                for line in r.iter_lines(decode_unicode=True):
+                    if stop.is_set():
+                        return
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:") and event and event.startswith("ticket."):
+                        inbox.put(json.loads(line[len("data:"):]))
+                    elif not line:
+                        event = None
+        except requests.RequestException:
+            pass
+        stop.wait(backoff)
+        backoff = min(backoff * 2, 30)
+
+def ensure_event_listener():
+    listener = st.session_state.get("event_listener")
+    if listener and listener["token"] == st.session_state.token:
+        return listener
+
+    stop_event_listener()
+    listener = {"token": st.session_state.token, "inbox": queue.Queue(), "stop": threading.Event()}
+    threading.Thread(
+        target=listen_events,
+        args=(listener["token"], listener["inbox"], listener["stop"]),
+        daemon=True
+    ).start()
+    st.session_state.event_listener = listener
+    return listener
+
+def stop_event_listener():
+    listener = st.session_state.get("event_listener")
+    if listener:
+        listener["stop"].set()
+        st.session_state.event_listener = None
+
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+@fragment(run_every=1)
+def watch_ticket_events():
+    # Only checks the local inbox; reruns the page when an update arrived
+    inbox = ensure_event_listener()["inbox"]
+    updates = []
+    while not inbox.empty():
+        updates.append(inbox.get_nowait())
+    if updates:
+        invalidate_tickets()
+        st.rerun()
+
+def load_more_button(next_cursor):
+    if next_cursor and st.button("Load more"):
+        st.session_state.page_cursors.append(next_cursor)
+        st.rerun()
+
+def stream_draft(ticket_id, placeholder):
+    # Render tokens as the server streams them (Server-Sent Events);
+    # None when generation failed, so no partial draft reaches the reply box
+    draft = ""
+    with api.post(
+        f"{BASE_URL}/tickets/{ticket_id}/generate-draft/stream",
+        headers=auth_headers(),
+        stream=True
+    ) as r:
+        if r.status_code != 200:
+            placeholder.error("Draft generation failed")
+            return None
+
+        event = None
+        for line in r.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:") and event is None:
+                draft += json.loads(line[len("data:"):])["token"]
+                placeholder.markdown(draft + "▌")
+            elif not line:
+                if event == "error":
+                    placeholder.error("Draft generation failed")
+                    return None
+                event = None
+
+    placeholder.empty()
+    return draft
 
 # =====================================================
 # UI HELPERS
@@ -48,6 +260,7 @@ def auth_headers():
 def status_badge(status):
     colors = {
         "OPEN": "#1f77b4",
+        "TRIAGING": "#9467bd",
         "PENDING_AGENT": "#d62728",
         "WAITING_FOR_USER": "#ff7f0e",
         "AUTO_RESOLVED": "#2ca02c",
@@ -65,39 +278,6 @@ def render_message(role, message):
 
     st.markdown(f"**{label}:** {message}")
 
-def urgency_score(ticket):
-    score = 0
-
-    if ticket.get("priority") == "HIGH":
-        score += 5
-
-    meta = ticket.get("ai_metadata") or {}
-    sentiment = str(meta.get("sentiment","")).lower()
-    confidence = meta.get("confidence",0)
-
-    if sentiment == "negative":
-        score += 3 * confidence
-
-    return score
-
-def escalation_reason(ticket):
-    meta = ticket.get("ai_metadata") or {}
-    sentiment = meta.get("sentiment")
-    risk = meta.get("risk")
-    priority = ticket.get("priority")
-
-    reasons = []
-    if priority == "HIGH":
-        reasons.append("high priority")
-    if sentiment == "negative":
-        reasons.append("negative sentiment")
-    if risk == "HIGH":
-        reasons.append("risk detected")
-
-    if reasons:
-        return "Escalation: " + ", ".join(reasons)
-    return None
-
 # =====================================================
 # HEADER
 # =====================================================
@@ -146,6 +326,7 @@ else:
 
     with col1:
         st.success(f"Logged in as {st.session_state.role}")
+        watch_ticket_events()
 
     with col2:
         if st.button("Logout"):
@@ -153,6 +334,9 @@ else:
             st.session_state.role=None
             st.session_state.selected_ticket=None
             st.session_state.agent_draft=""
+            st.session_state.page_cursors=[None]
+            st.session_state.message_cache={}
+            stop_event_listener()
             st.rerun()
 
     st.divider()
@@ -167,18 +351,22 @@ else:
         desc = st.text_area("Describe issue")
 
         if st.button("Submit"):
-            r = requests.post(f"{BASE_URL}/tickets/",headers=auth_headers(),
+            r = api.post(f"{BASE_URL}/tickets/",headers=auth_headers(),
                               json={"title":title,"description":desc})
             if r.status_code==200:
+                invalidate_tickets()
                 st.success("Ticket created")
                 st.rerun()
 
         st.divider()
         st.subheader("My Tickets")
 
-        r = requests.get(f"{BASE_URL}/tickets/my",headers=auth_headers())
-        if r.status_code==200:
-            tickets=r.json()
+        tid=st.session_state.selected_ticket
+        (tickets, next_cursor), thread = run_parallel(
+            ticket_pages_call("/tickets/my"),
+            messages_call(tid)
+        )
+        if tickets is not None:
 
             for t in tickets:
                 st.markdown(f"**{t['title']}** — {status_badge(t['status'])}",unsafe_allow_html=True)
@@ -189,22 +377,25 @@ else:
 
                 st.markdown("---")
 
+            load_more_button(next_cursor)
+
         if st.session_state.selected_ticket:
             tid=st.session_state.selected_ticket
             st.subheader(f"Conversation #{tid}")
 
-            msgs=requests.get(f"{BASE_URL}/tickets/{tid}/messages",headers=auth_headers()).json()
-            for m in msgs:
+            for m in store_messages(tid,thread):
                 render_message(m["sender_role"],m["message"])
 
             reply=st.text_area("Reply")
 
             if st.button("Send"):
-                requests.post(f"{BASE_URL}/tickets/{tid}/reply",headers=auth_headers(),json={"message":reply})
+                api.post(f"{BASE_URL}/tickets/{tid}/reply",headers=auth_headers(),json={"message":reply})
+                invalidate_tickets()
                 st.rerun()
 
             if st.button("Close Ticket"):
-                requests.post(f"{BASE_URL}/tickets/{tid}/close",headers=auth_headers())
+                api.post(f"{BASE_URL}/tickets/{tid}/close",headers=auth_headers())
+                invalidate_tickets()
                 st.session_state.selected_ticket=None
                 st.rerun()
 
@@ -215,11 +406,13 @@ else:
 
         st.subheader("Pending Tickets")
 
-        r=requests.get(f"{BASE_URL}/tickets/agent/pending",headers=auth_headers())
-        if r.status_code==200:
-            tickets=r.json()
-
-            tickets.sort(key=urgency_score,reverse=True)
+        # Queue and open conversation are independent: fetch them together
+        tid=st.session_state.selected_ticket
+        (tickets, next_cursor), thread = run_parallel(
+            ticket_pages_call("/tickets/agent/pending"),
+            messages_call(tid)
+        )
+        if tickets is not None:
 
             for t in tickets:
 
@@ -228,9 +421,10 @@ else:
                 confidence=round(meta.get("confidence",0),2)
 
                 st.markdown(f"**{t['title']}** — {status_badge(t['status'])}",unsafe_allow_html=True)
-                st.write(f"Priority: {t['priority']} | Category: {t['category']} | Sentiment: {sentiment} ({confidence})")
+                st.write(f"Priority: {t['priority']} | Category: {t['category']} | Sentiment: {sentiment} ({confidence}) | Urgency: {t.get('urgency_score',0)}")
 
-                reason=escalation_reason(t)
+                # Ranked and explained server-side (tickets/urgency.py)
+                reason=t.get("escalation_reason")
                 if reason:
                     st.warning(reason)
 
@@ -240,22 +434,35 @@ else:
 
                 st.markdown("---")
 
+            load_more_button(next_cursor)
+
         if st.session_state.selected_ticket:
             tid=st.session_state.selected_ticket
             st.subheader(f"Conversation #{tid}")
 
-            msgs=requests.get(f"{BASE_URL}/tickets/{tid}/messages",headers=auth_headers()).json()
-            for m in msgs:
+            for m in store_messages(tid,thread):
                 render_message(m["sender_role"],m["message"])
 
             if st.button("Generate AI Draft"):
-                d=requests.post(f"{BASE_URL}/tickets/{tid}/generate-draft",headers=auth_headers())
-                if d.status_code==200:
-                    st.session_state.agent_draft=d.json()["draft"]
+                streamed=stream_draft(tid,st.empty())
+                if streamed is not None:
+                    st.session_state.agent_draft=streamed
 
             draft=st.text_area("Agent Reply",value=st.session_state.agent_draft,height=150)
 
             if st.button("Send Reply"):
-                requests.post(f"{BASE_URL}/tickets/{tid}/reply",headers=auth_headers(),json={"message":draft})
+                api.post(f"{BASE_URL}/tickets/{tid}/reply",headers=auth_headers(),json={"message":draft})
+                invalidate_tickets()
                 st.session_state.agent_draft=""
                 st.rerun()
+
+    # =====================================================
+    # RENDER TIME
+    # =====================================================
+    render_ms=(time.perf_counter()-render_started)*1000
+    st.session_state.render_times=(st.session_state.render_times+[render_ms])[-20:]
+    st.caption(
+        f"Rendered in {render_ms:.0f} ms "
+        f"(avg {sum(st.session_state.render_times)/len(st.session_state.render_times):.0f} ms "
+        f"over last {len(st.session_state.render_times)})"
+    )
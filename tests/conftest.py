@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+# Settings are read at import time: point the app at a scratch database and
+# the stub LLM before any test imports it
+_scratch = tempfile.mkdtemp(prefix="ticket-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'test.db')}")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "0")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from backend.app.ai import llm_cache
+from backend.app.ai.triage import usable_response
+
+
+class StubLLM:
+    model_name = "stub"
+    temperature = 0
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=self.content)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = llm_cache.LLMResponseCache(
+        path=str(tmp_path / "llm.sqlite3"), ttl_seconds=3600, memory_entries=10, disk_entries=100
+    )
+    monkeypatch.setattr(llm_cache, "llm_cache", cache)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    return cache
+
+
+def test_unparseable_triage_is_not_cached(cache):
+    llm = StubLLM("Sorry, I cannot classify this ticket.")
+    messages = [HumanMessage(content="Title: refund\nDescription: charged twice")]
+
+    for _ in range(2):
+        llm_cache.cached_invoke(llm, messages, cacheable=usable_response)
+
+    # Both calls reached the model; nothing was stored for the prompt
+    assert llm.calls == 2
+    assert cache.get(llm_cache.cache_key(llm, messages)) is None
+    assert cache.stats["rejected"] == 2
+
+
+def test_valid_triage_is_cached(cache):
+    llm = StubLLM(json.dumps({
+        "category": "billing", "priority": "HIGH", "sentiment": "NEGATIVE",
+        "risk": "LOW", "confidence": 0.9, "ai_summary": "Charged twice.",
+    }))
+    messages = [HumanMessage(content="Title: refund\nDescription: charged twice")]
+
+    for _ in range(2):
+        llm_cache.cached_invoke(llm, messages, cacheable=usable_response)
+
+    assert llm.calls == 1
+    assert cache.stats["writes"] == 1
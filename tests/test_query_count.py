@@ -0,0 +1,31 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.app.main as main
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def login(client, email):
+    client.post("/auth/register", json={"email": email, "password": "password1"})
+    token = client.post(
+        "/auth/login", data={"username": email, "password": "password1"}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_x_db_queries_counts_the_request_statements(client):
+    headers = login(client, "query-count@example.com")
+
+    # User lookup, then the ticket list
+    first = client.get("/tickets/my", headers=headers)
+    assert first.status_code == 200
+    assert first.headers["X-DB-Queries"] == "2"
+
+    # The user now comes from the cache
+    second = client.get("/tickets/my", headers=headers)
+    assert second.headers["X-DB-Queries"] == "1"